@@ -33,6 +33,7 @@ from .database import \
 from .scraping_engine import \
         DailyScrapingEngine,\
         MassDataHarvestingEngine,\
+        ShardedHarvestingEngine,\
         ScrapingEngine,\
         DailyHarvestationProcess,\
         MassHarvestationProcess,\
@@ -41,4 +42,8 @@ from .scraping_engine import \
         
 from .mining_engine import MiningProcess
 
+from .mining_pipeline import \
+        MiningPipeline,\
+        PipelinedMiningProcess
+
 from .constants import *
\ No newline at end of file
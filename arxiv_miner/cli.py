@@ -4,6 +4,7 @@ this will be used for the Extracting the Important CLI information such as Datab
 Selection etc. Can be used as a gateway to integrate all the submodules into one cli invocation
 '''
 
+import os
 import click
 from functools import wraps
 import configparser
@@ -37,6 +38,8 @@ def db_cli(ctx,use_defaults,with_config,host,port,app_name=DEFAULT_APP_NAME):
     click.secho(args_str+'\n\n',fg='magenta')
     ctx.obj['db_class'] = client_class
     ctx.obj['db_args'] = args
+    if with_config is not None:
+        parsing_choice(with_config)
 
 
 def database_choice(use_defaults,with_config,host,port):
@@ -58,5 +61,24 @@ def database_choice(use_defaults,with_config,host,port):
         args = dict(index_name=Config.elasticsearch_index,host=host,port=port)
     return args, client_class
 
+def parsing_choice(with_config):
+    """parsing_choice 
+    Applies the `[parsing]` section of the configuration file to `Config`. 
+    """
+    config = configparser.ConfigParser()
+    config.read(with_config)
+    if 'parsing' not in config:
+        return
+    if 'section_extractor' in config['parsing']:
+        Config.section_extractor = config['parsing']['section_extractor']
+        # Spawned parsing processes read it from the environment
+        os.environ['ARXIV_MINER_SECTION_EXTRACTOR'] = Config.section_extractor
+    if 'stage_seconds' in config['parsing']:
+        Config.parse_stage_seconds = config['parsing']['stage_seconds']
+        os.environ['ARXIV_MINER_PARSE_STAGE_SECONDS'] = Config.parse_stage_seconds
+    if 'memory_mb' in config['parsing']:
+        Config.parse_memory_mb = config['parsing']['memory_mb']
+        os.environ['ARXIV_MINER_PARSE_MEMORY_MB'] = Config.parse_memory_mb
+
 if __name__ == '__main__':
     db_cli()
\ No newline at end of file
@@ -11,6 +11,18 @@ class Config(object):
     
     # Object Store 
     bucket_name = 'arxiv-papers-source-bucket'
+
+    # Latex Parsing
+    # Extracts the section headings : `tex2py` or `regex`. Refer `arxiv_miner.section_extractor`. 
+    # Read from the environment so that spawned parsing processes pick it up too.
+    section_extractor = os.environ.get('ARXIV_MINER_SECTION_EXTRACTOR','tex2py')
+    # Budgets of every parsing stage. Refer `arxiv_miner.parse_budget`. None keeps the defaults / no memory limit.
+    parse_stage_seconds = os.environ.get('ARXIV_MINER_PARSE_STAGE_SECONDS')
+    parse_memory_mb = os.environ.get('ARXIV_MINER_PARSE_MEMORY_MB')
+
+    # Serialization
+    # JSON codec of the files and the Elasticsearch requests : `auto`,`stdlib`,`orjson` or `msgspec`. Refer `arxiv_miner.serialization`.
+    json_codec = os.environ.get('ARXIV_MINER_JSON_CODEC','auto')
     
     @classmethod
     def get_defaults(cls,db_str):
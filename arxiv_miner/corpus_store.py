@@ -0,0 +1,224 @@
+"""
+Sharded on disk corpus of mined papers.
+
+`ArxivPaper.to_fs` writes three small JSON files into a directory per paper. A million papers
+make millions of inodes which slow down listing and backups. A `CorpusStore` keeps the
+records of the papers in a few large shard files instead :
+    - `corpus.json` : manifest with the compression of the records. Its presence makes a `root_papers_path` a corpus.
+    - `<writer>-<n>.shard` : records appended one after the other. Every record is a 4 byte big endian
+      length followed by the compressed JSON of the `ArxivRecord`.
+    - `<writer>-<n>.idx` : sidecar offset index of the shard. One `paper_id<TAB>offset<TAB>length<TAB>sequence` line per record.
+
+Every process appends to shards of its own so miners on the same corpus never write to the same file.
+Saving a paper again appends a new record which supersedes the old one. The `sequence` of a record is the
+time it was written in nanoseconds so the newest record wins whichever writer wrote it. Readers pick up the
+records of other writers by re-reading the index files (`refresh`) when they miss a paper and at most every
+`refresh_interval` seconds otherwise. `scan` reads the live records shard by
+shard in file order so listing, backups and bulk reloads are sequential I/O.
+Records are compressed with `zstd` when `zstandard` is installed and `zlib` otherwise.
+"""
+import os
+import time
+import zlib
+import struct
+from threading import Lock
+from typing import Dict,Iterator,Tuple
+from . import serialization
+from .utils import get_worker_id
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+MANIFEST_FILE_NAME = 'corpus.json'
+SHARD_SUFFIX = '.shard'
+INDEX_SUFFIX = '.idx'
+COMPRESSION_ZSTD = 'zstd'
+COMPRESSION_ZLIB = 'zlib'
+DEFAULT_SHARD_BYTES = 256*1024**2
+DEFAULT_REFRESH_SECONDS = 30
+RECORD_HEADER = struct.Struct('>I')
+
+
+def is_corpus_store(root_path):
+    return os.path.isfile(os.path.join(root_path,MANIFEST_FILE_NAME))
+
+
+class CorpusStore:
+    """CorpusStore
+    :param root_path: directory of the corpus. Created with a manifest when it isn't a corpus yet.
+    :param compression: `zstd` or `zlib` for a new corpus. Defaults to `zstd` when `zstandard` is installed.
+                        An existing corpus keeps the compression of its manifest.
+    :param shard_bytes: size after which a writer starts a new shard.
+    :param refresh_interval: seconds a `get` of a paper in the index trusts it before reading what other writers appended. 
+                             Every `refresh` opens the index file of every shard. 0 reads it on every `get`. 
+                             Papers missing from the index always make it `refresh`.
+    """
+    def __init__(self,root_path,compression=None,shard_bytes=DEFAULT_SHARD_BYTES,refresh_interval=DEFAULT_REFRESH_SECONDS):
+        self.root_path = root_path
+        self.shard_bytes = shard_bytes
+        self.refresh_interval = refresh_interval
+        self.last_refresh = None
+        self.last_sequence = 0
+        manifest_path = os.path.join(root_path,MANIFEST_FILE_NAME)
+        if os.path.isfile(manifest_path):
+            compression = serialization.load_json(manifest_path)['compression']
+        else:
+            if compression is None:
+                compression = COMPRESSION_ZSTD if zstandard is not None else COMPRESSION_ZLIB
+            os.makedirs(root_path,exist_ok=True)
+            serialization.save_json(dict(compression=compression),manifest_path)
+        if compression == COMPRESSION_ZSTD and zstandard is None:
+            raise ImportError("Corpus %s Is zstd Compressed Which Needs zstandard"%root_path)
+        self.compression = compression
+        self.lock = Lock()
+        self.index = {} # paper_id -> (shard_name,offset,length,sequence)
+        self.index_offsets = {} # idx file -> bytes of it already read
+        self.writer_pid = None
+        self.shard_file = None
+        self.index_file = None
+        self.refresh()
+
+    def _compress(self,data:bytes):
+        if self.compression == COMPRESSION_ZSTD:
+            return zstandard.ZstdCompressor(level=3).compress(data)
+        return zlib.compress(data)
+
+    def _decompress(self,data:bytes):
+        if self.compression == COMPRESSION_ZSTD:
+            return zstandard.ZstdDecompressor().decompress(data)
+        return zlib.decompress(data)
+
+    def shard_names(self):
+        return sorted(file_name[:-len(SHARD_SUFFIX)] for file_name in os.listdir(self.root_path) if file_name.endswith(SHARD_SUFFIX))
+
+    def _index_record(self,paper_id,location):
+        # Lines without a sequence predate it. Later lines of a shard supersede earlier ones.
+        current = self.index.get(paper_id)
+        if current is None or location[3] >= current[3]:
+            self.index[paper_id] = location
+
+    def refresh(self):
+        """refresh
+        Reads the index lines appended since the last `refresh`, including the ones of other writers.
+        Lines of records which weren't completely written are skipped.
+        """
+        with self.lock:
+            self.last_refresh = time.monotonic()
+            for shard_name in self.shard_names():
+                index_path = os.path.join(self.root_path,shard_name+INDEX_SUFFIX)
+                if not os.path.isfile(index_path):
+                    continue
+                with open(index_path,'rb') as f:
+                    f.seek(self.index_offsets.get(index_path,0))
+                    for line in f:
+                        if not line.endswith(b'\n'): # Being written
+                            break
+                        self.index_offsets[index_path] = self.index_offsets.get(index_path,0)+len(line)
+                        fields = line.decode('utf-8').rstrip('\n').split('\t')
+                        if len(fields) == 3:
+                            fields.append('0')
+                        if len(fields) != 4:
+                            continue
+                        self._index_record(fields[0],(shard_name,int(fields[1]),int(fields[2]),int(fields[3])))
+
+    def _open_shard(self):
+        writer_name = get_worker_id().replace('/','_')
+        shard_number = len([shard_name for shard_name in self.shard_names() if shard_name.startswith(writer_name+'-')])
+        shard_name = '%s-%05d'%(writer_name,shard_number)
+        self.writer_pid = os.getpid()
+        self.shard_file = open(os.path.join(self.root_path,shard_name+SHARD_SUFFIX),'ab')
+        self.index_file = open(os.path.join(self.root_path,shard_name+INDEX_SUFFIX),'ab')
+        self.shard_name = shard_name
+
+    def put(self,paper_id,record_json:dict):
+        """put
+        Appends the JSON of the `ArxivRecord` of `paper_id`. It replaces the previous record of the paper.
+        """
+        payload = self._compress(serialization.dumps(record_json))
+        with self.lock:
+            # A forked process writes to shards of its own.
+            if self.shard_file is None or self.writer_pid != os.getpid() or self.shard_file.tell() >= self.shard_bytes:
+                self.close()
+                self._open_shard()
+            offset = self.shard_file.tell()
+            self.shard_file.write(RECORD_HEADER.pack(len(payload))+payload)
+            self.shard_file.flush()
+            self.last_sequence = max(time.time_ns(),self.last_sequence+1)
+            # The index line is written once the record is so that readers never see a partial record.
+            self.index_file.write(('%s\t%d\t%d\t%d\n'%(paper_id,offset,len(payload),self.last_sequence)).encode('utf-8'))
+            self.index_file.flush()
+            self._index_record(paper_id,(self.shard_name,offset,len(payload),self.last_sequence))
+            self.index_offsets[self.index_file.name] = self.index_file.tell()
+
+    def _location(self,paper_id):
+        with self.lock:
+            location = self.index.get(paper_id)
+            index_fresh = self.last_refresh is not None and time.monotonic()-self.last_refresh < self.refresh_interval
+        if location is None or not index_fresh:
+            self.refresh()
+            with self.lock:
+                location = self.index.get(paper_id)
+        return location
+
+    def contains(self,paper_id):
+        return self._location(paper_id) is not None
+
+    def get(self,paper_id) -> dict:
+        """get
+        :return: JSON of the `ArxivRecord` of `paper_id` or None when the corpus doesn't hold it.
+        """
+        location = self._location(paper_id)
+        if location is None:
+            return None
+        shard_name,offset,length,_ = location
+        with open(os.path.join(self.root_path,shard_name+SHARD_SUFFIX),'rb') as f:
+            f.seek(offset+RECORD_HEADER.size)
+            return serialization.loads(self._decompress(f.read(length)))
+
+    def ids(self):
+        self.refresh()
+        with self.lock:
+            return list(self.index.keys())
+
+    def __len__(self):
+        self.refresh()
+        with self.lock:
+            return len(self.index)
+
+    def scan(self) -> Iterator[Tuple[str,dict]]:
+        """scan
+        Yields (paper_id,record JSON) of every paper reading each shard from start to end. Superseded records are skipped.
+        """
+        self.refresh()
+        shard_entries:Dict[str,list] = {}
+        with self.lock:
+            for paper_id,(shard_name,offset,length,_) in self.index.items():
+                shard_entries.setdefault(shard_name,[]).append((offset,length,paper_id))
+        for shard_name in sorted(shard_entries):
+            with open(os.path.join(self.root_path,shard_name+SHARD_SUFFIX),'rb') as f:
+                for offset,length,paper_id in sorted(shard_entries[shard_name]):
+                    f.seek(offset+RECORD_HEADER.size)
+                    yield paper_id,serialization.loads(self._decompress(f.read(length)))
+
+    def close(self):
+        if self.shard_file is not None:
+            self.shard_file.close()
+            self.index_file.close()
+            self.shard_file = None
+            self.index_file = None
+
+
+corpus_stores = {} # root_path -> `CorpusStore` or None when it isn't a corpus
+corpus_stores_lock = Lock()
+
+def get_corpus_store(root_path) -> CorpusStore:
+    """get_corpus_store
+    The `CorpusStore` at `root_path` shared within the process or None when `root_path` isn't a corpus.
+    Paths which aren't a corpus are remembered too so that every `ArxivPaper` doesn't look for the manifest.
+    """
+    root_path = os.path.abspath(root_path)
+    with corpus_stores_lock:
+        if root_path not in corpus_stores:
+            corpus_stores[root_path] = CorpusStore(root_path) if is_corpus_store(root_path) else None
+        return corpus_stores[root_path]
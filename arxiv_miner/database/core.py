@@ -30,12 +30,55 @@ class ArxivDatabase:
         """
         raise NotImplementedError()
 
+    def query_many(self,paper_ids:List[str]) -> List[str]:
+        """query_many 
+        Check the existance of many paper_ids in one go. 
+        Returns the subset of `paper_ids` which exist in the Database.
+        """
+        raise NotImplementedError()
+
+    def save_many_identities(self,identities:List[ArxivIdentity],parsed_research:List[ArxivSematicParsedResearch]=[]) -> List[str]:
+        """save_many_identities 
+        Save many identities (along with their `ArxivSematicParsedResearch`) to Database in one go.
+        Returns the paper_ids which were saved.
+        """
+        raise NotImplementedError()
+
     def get_unmined_paper(self) -> ArxivRecord:
         """get_unmined_data 
         Extract one Unmined Paper from the collection of papers. 
         """
         raise NotImplementedError()
 
+    def claim_unmined_papers(self,n,worker_id,lease_seconds) -> List[ArxivRecord]:
+        """claim_unmined_papers 
+        Atomically mark up to `n` unmined papers as being mined by `worker_id` for `lease_seconds`. 
+        Papers whose lease expired can be claimed again. Quarantined papers are never claimed. 
+        Returns the `ArxivRecord`s of the claimed papers. 
+        """
+        raise NotImplementedError()
+
+    def renew_leases(self,paper_ids:List[str],worker_id,lease_seconds) -> int:
+        """renew_leases 
+        Extend the leases `worker_id` holds on `paper_ids` to `lease_seconds` from now. 
+        Returns the number of leases renewed.
+        """
+        raise NotImplementedError()
+
+    def release_expired_leases(self,stale_seconds=None) -> int:
+        """release_expired_leases 
+        Return papers whose lease expired to the pool of unmined papers. When `stale_seconds` is given, 
+        papers marked as mining without a lease which weren't updated for `stale_seconds` are returned too. 
+        Returns the number of papers released.
+        """
+        raise NotImplementedError()
+
+    def queue_stats(self) -> dict:
+        """queue_stats 
+        Counts of `queued`,`in_flight`,`expired`,`mined` and `quarantined` papers. 
+        """
+        raise NotImplementedError()
+
     def get_semantic_parsed_research(self,paper_id) -> ArxivSematicParsedResearch:
         """get_semantic_parsed_research 
         extract the `ArxivSematicParsedResearch` object from the Datasource
@@ -48,9 +91,25 @@ class ArxivDatabase:
         """
         raise NotImplementedError()
 
-    def set_mined(self,identity:ArxivIdentity,mined_status:bool) -> None:
+    def set_mined(self,identity:ArxivIdentity,mined_status:bool,reset_claim_count=False) -> None:
         """mark_mined 
         Set ArxivIdentity as Mined 
+        Mined papers and papers set with `reset_claim_count` (eg. to be re-mined) count their claims from 0 again 
+        and are taken out of quarantine. 
+        """
+        raise NotImplementedError()
+
+    def release_claims(self,paper_ids:List[str],worker_id) -> int:
+        """release_claims 
+        Hand back papers `worker_id` claimed but never started mining. Their claims aren't counted. 
+        Returns the number of papers released.
+        """
+        raise NotImplementedError()
+
+    def quarantine_paper(self,identity:ArxivIdentity,reason,min_claim_count=0) -> None:
+        """quarantine_paper 
+        Drop the lease of the paper and mark it as quarantined if it was claimed at least `min_claim_count` times. 
+        Quarantined papers aren't claimed again until they are reset with `set_mined`. 
         """
         raise NotImplementedError()
 
@@ -60,6 +119,24 @@ class ArxivDatabase:
         """
         raise NotImplementedError()
 
+    def enable_write_behind(self,max_actions=500,flush_interval=5,max_retries=3):
+        """enable_write_behind 
+        Buffer the writes of mined papers and send them in batches by size or time. 
+        """
+        raise NotImplementedError()
+
+    def flush(self):
+        """flush 
+        Write out whatever is buffered. A no-op for clients that don't buffer writes. 
+        """
+        return []
+
+    def paper_id_stream(self):
+        """paper_id_stream 
+        Stream the paper_ids of all records in the Database. 
+        """
+        raise NotImplementedError()
+
     def pipeline_stats(self):
         raise NotImplementedError()
 
@@ -6,16 +6,18 @@ from ..record import \
         ArxivPaperStatus,\
         ArxivSematicParsedResearch, Author, CoreOntology,\
         D2D
-from ..utils import get_date_range_from_today
+from ..utils import get_date_range_from_today,get_worker_id,parse_timestamp
 from ..paper import ArxivPaper
 from ..logger import create_logger
+from .. import serialization
 from ..exception import \
         ArxivDatabaseConnectionException,\
         ElasticsearchMissingException,\
         ElasticsearchIndexMissingException
 try:
     import elasticsearch # Do a Safe Import Because of DataLayer Integration
-    from elasticsearch.exceptions import NotFoundError
+    from elasticsearch.exceptions import NotFoundError,SerializationError
+    from elasticsearch.serializer import JSONSerializer
     from elasticsearch_dsl import Search,Q,A
 except ImportError:
     raise ElasticsearchMissingException()
@@ -30,10 +32,18 @@ import json
 from dataclasses import dataclass,field
 import re
 DEFAULT_TIME_RANGE = 30
+DEFAULT_LEASE_SECONDS = 3600
+# Claims are made over a random sample of `CLAIM_CANDIDATE_FACTOR*n` candidates so that concurrent miners rarely collide
+CLAIM_CANDIDATE_FACTOR = 4
+# Papers claimed this many times without being mined (their miners crashed or hung) are quarantined instead.
+MAX_PAPER_CLAIMS = 5
 from luqum.elasticsearch import ElasticsearchQueryBuilder
 from luqum.parser import parser
 
+import time
 import asyncio
+from collections import deque
+from threading import Thread,Lock,Event
 from functools import wraps, partial
 
 def async_wrap(func):
@@ -45,6 +55,126 @@ def async_wrap(func):
         return await loop.run_in_executor(executor, pfunc)
     return run 
 
+class BulkWriteBuffer:
+    """BulkWriteBuffer
+    Write-behind buffer of `_bulk` actions. Actions are collected across calls and sent 
+    as one `_bulk` request once `max_actions` are held or every `flush_interval` seconds. 
+        - Items rejected with a retryable status (429/5xx) are retried up to `max_retries` times with backoff. 
+        - Items which still fail or fail for good are logged and their ids kept in `failed_ids`. 
+
+    :param es: `elasticsearch.Elasticsearch` client
+    :param max_actions: number of actions which triggers a flush
+    :param flush_interval: seconds after which held actions are flushed. None to flush only by size.
+    :param max_retries: retries of an item which failed with a retryable status
+    """
+    retry_status_codes = (429,500,502,503,504)
+    max_failed_ids = 10000
+
+    def __init__(self,es,max_actions=500,flush_interval=5,max_retries=3,retry_delay=1):
+        self.es = es
+        self.max_actions = max_actions
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.actions = [] # List of (header,source) pairs. source is None for deletes.
+        self.lock = Lock() # Guards `actions`
+        self.flush_lock = Lock() # Keeps flushes in order
+        self.failed_ids = deque(maxlen=self.max_failed_ids)
+        self.num_flushed = 0
+        self.logger = create_logger(self.__class__.__name__)
+        self.closed = Event()
+        self.flush_thread = None
+        if flush_interval is not None:
+            self.flush_thread = Thread(target=self._flush_periodically,daemon=True)
+            self.flush_thread.start()
+
+    def __len__(self):
+        return len(self.actions)
+
+    def add(self,header:dict,source:dict=None):
+        with self.lock:
+            self.actions.append((header,source))
+            should_flush = len(self.actions) >= self.max_actions
+        if should_flush:
+            self.flush()
+
+    def _flush_periodically(self):
+        while not self.closed.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                self.logger.error("Periodic Flush Failed : %s"%str(e))
+
+    @staticmethod
+    def _to_body(actions):
+        body = []
+        for header,source in actions:
+            body.append(header)
+            if source is not None:
+                body.append(source)
+        return body
+
+    def flush(self):
+        """flush 
+        Send all held actions. 
+        :returns List[str] : `_id`s of items which could not be written. 
+        """
+        with self.flush_lock:
+            with self.lock:
+                actions,self.actions = self.actions,[]
+            failed_ids = []
+            attempt = 0
+            while len(actions) > 0:
+                try:
+                    bulk_resp = self.es.bulk(self._to_body(actions))
+                except Exception:
+                    # Hold on to the actions so the next flush sends them again.
+                    with self.lock:
+                        self.actions = actions + self.actions
+                    raise
+                retry_actions = []
+                if bulk_resp['errors']:
+                    for action,item in zip(actions,bulk_resp['items']):
+                        item_resp = list(item.values())[0]
+                        if 'error' not in item_resp:
+                            continue
+                        if item_resp.get('status') in self.retry_status_codes and attempt < self.max_retries:
+                            retry_actions.append(action)
+                        else:
+                            self.logger.error("Bulk Write Of %s Failed : %s"%(item_resp['_id'],str(item_resp['error'])))
+                            failed_ids.append(item_resp['_id'])
+                self.num_flushed += len(actions) - len(retry_actions)
+                actions = retry_actions
+                if len(actions) > 0:
+                    time.sleep(self.retry_delay*(2**attempt))
+                    attempt += 1
+            self.failed_ids.extend(failed_ids)
+            return failed_ids
+
+    def close(self):
+        self.closed.set()
+        return self.flush()
+
+
+class CodecJSONSerializer(JSONSerializer):
+    """CodecJSONSerializer
+    Serializer of the Elasticsearch client using the codec of `arxiv_miner.serialization`.
+    """
+    def dumps(self,data):
+        if isinstance(data,(str,bytes)):
+            return data
+        try:
+            return serialization.dumps(data).decode('utf-8')
+        except TypeError: # Types only the default serializer knows. eg. Decimal
+            return super().dumps(data)
+
+    def loads(self,s):
+        try:
+            return serialization.loads(s)
+        except serialization.DECODE_ERRORS as e:
+            raise SerializationError(s,e)
+
+
 class ArxivElasticSeachDatabaseClient(ArxivDatabase):
     def __init__(self,index_name=None,host='localhost',port=9200,auth=None):
         if index_name == None:
@@ -52,14 +182,15 @@ class ArxivElasticSeachDatabaseClient(ArxivDatabase):
         self.index_name = index_name
         self.status_index_name = index_name+'_status'
         self.parsed_research_index_name = index_name + '_parsed_research'
+        self.write_buffer = None
         if port is None:
             src_str = f'{host}'
         else:
             src_str = f'{host}:{port}'
         if auth is None:
-            self.es = elasticsearch.Elasticsearch(src_str,timeout=30, max_retries=10)
+            self.es = elasticsearch.Elasticsearch(src_str,timeout=30, max_retries=10, serializer=CodecJSONSerializer())
         else:
-            self.es = elasticsearch.Elasticsearch(src_str,http_auth=auth,timeout=30, max_retries=10)
+            self.es = elasticsearch.Elasticsearch(src_str,http_auth=auth,timeout=30, max_retries=10, serializer=CodecJSONSerializer())
         if not self.es.ping():
             if port is None:
                 raise ArxivDatabaseConnectionException(src_str,80,'')
@@ -147,6 +278,23 @@ class ArxivElasticSeachDatabaseClient(ArxivDatabase):
         # print(newrecords)
         self.es.bulk(newrecords)
 
+
+    def _bulk(self,actions:List[dict]):
+        """_bulk 
+        Runs the `actions` through the `_bulk` API. 
+        :returns List[str] : `_id`s of the items which failed. 
+        """
+        if len(actions) == 0:
+            return []
+        bulk_resp = self.es.bulk(actions)
+        if not bulk_resp['errors']:
+            return []
+        failed_ids = []
+        for item in bulk_resp['items']:
+            item_resp = list(item.values())[0]
+            if 'error' in item_resp:
+                failed_ids.append(item_resp['_id'])
+        return failed_ids
     
     def query(self,paper_id) -> ArxivRecord:
         """query [summary]
@@ -161,68 +309,356 @@ class ArxivElasticSeachDatabaseClient(ArxivDatabase):
         Save the identity to Database. One Can Overwrite the Values. 
         """
         self._save_paper(ArxivRecord(identity=identity),ArxivPaperStatus(scraped=True))
+
+    def query_many(self,paper_ids:List[str]) -> List[str]:
+        """query_many 
+        One `mget` over the record and status index for all `paper_ids`. 
+        Like `query`, a paper exists only if both its record and status exist. 
+        """
+        if len(paper_ids) == 0:
+            return []
+        docs = []
+        for paper_id in paper_ids:
+            docs.append({'_index':self.index_name,'_id':paper_id})
+            docs.append({'_index':self.status_index_name,'_id':paper_id})
+        mget_resp = self.es.mget(body={'docs':docs},_source=False)
+        found_indexes = {}
+        for doc in mget_resp['docs']:
+            if doc.get('found',False):
+                found_indexes.setdefault(doc['_id'],set()).add(doc['_index'])
+        return [
+            paper_id for paper_id in paper_ids \
+                if len(found_indexes.get(paper_id,[])) == 2
+        ]
+
+    def save_many_identities(self,identities:List[ArxivIdentity],parsed_research:List[ArxivSematicParsedResearch]=[]) -> List[str]:
+        """save_many_identities 
+        Writes the record, status and parsed research docs for all `identities` in one `_bulk` request. 
+        :returns List[str] : paper_ids whose docs were all written.
+        """
+        actions = []
+        for identity in identities:
+            actions.extend([
+                {"index":{"_index":self.index_name,"_id":identity.identity}},
+                ArxivRecord(identity=identity).to_json(),
+                {"index":{"_index":self.status_index_name,"_id":identity.identity}},
+                ArxivPaperStatus(scraped=True).to_json(),
+            ])
+        for research in parsed_research:
+            actions.extend([
+                {"index":{"_index":self.parsed_research_index_name,"_id":research.identity.identity}},
+                research.to_json(),
+            ])
+        failed_ids = set(self._bulk(actions))
+        return [identity.identity for identity in identities if identity.identity not in failed_ids]
         
     def get_unmined_paper(self) -> ArxivRecord:
         """get_unmined_data 
-        Extract one Random Unmined Paper from database 
-        and mark that paper as mining=True
-        Finds Latest Undone docs, Find's status and hits archieve. 
+        Extract one Unmined Paper from database 
+        and mark that paper as mining=True. 
+        Shorthand for `claim_unmined_papers` with a single paper.
         """
-        # Find Unprocessed Document : `paper_processing_meta` holds that data. 
-            # .query('bool',**{'paper_processing_meta.mined':None})\
-        search_obj = Search()
-        final_filter = [
-            Q('range',**TextSearchFilter._date_query('03/01/2019','12/01/2019'))
-        ]
-        search = Search(using=self.es, index=self.index_name)
-                # .query('bool',filter=final_filter)\
-        query= search\
-                .query(~Q('exists',field='paper_processing_meta.mined'))\
-                .sort('-identity.published')\
-                .source(['_id'])
-
-        query = query[0:100] # Extract 50 records
-        resp = query.execute()
-        id_list = list(map(lambda x: x.meta.id, resp.hits))
-        id_filter = Q('terms',**{'_id':id_list})
-        # Search status index
-        query = Q ('bool',\
-                must=[ # Must not contain this field 
-                    Q('match',**{'mining':False}), 
-                    Q('match',**{'mined':False})  
-                ]  
-            )
-        s = Search(using=self.es, index=self.status_index_name) \
-            .query(query)\
-            .filter(id_filter)
-        search_resp = s.execute()
-        if len(search_resp.hits) == 0:
+        claimed_records = self.claim_unmined_papers(1,get_worker_id())
+        if len(claimed_records) == 0:
             return None
+        return claimed_records[0]
+
+    def _claimable_status_query(self):
+        # Unmined papers which no one is mining or whose lease expired.
+        return Q('bool',\
+                must=[Q('match',**{'mined':False})],\
+                must_not=[Q('match',**{'quarantined':True})],\
+                should=[
+                    Q('match',**{'mining':False}),
+                    Q('range',**{'leased_until':{'lt':datetime.datetime.now().isoformat()}})
+                ],\
+                minimum_should_match=1
+            )
+
+    def claim_unmined_papers(self,n,worker_id,lease_seconds=DEFAULT_LEASE_SECONDS) -> List[ArxivRecord]:
+        """claim_unmined_papers 
+        Atomically claim up to `n` unmined papers for `worker_id`. 
+            1. One search over the status index for claimable papers along with their `_seq_no`/`_primary_term`. 
+            2. One `_bulk` which leases the papers with `if_seq_no`/`if_primary_term`. A paper claimed 
+               by another miner in the meantime fails with a version conflict and is skipped. 
+            3. One `mget` of the records of the papers that were claimed. 
+        The lease lasts `lease_seconds`. Once it expires the paper is claimable again so papers 
+        of crashed miners get picked back up. Candidates which were already claimed `MAX_PAPER_CLAIMS` 
+        times are quarantined in the same `_bulk` instead of being claimed. 
+        :returns List[ArxivRecord] : records of the claimed papers. Can be less than `n`. 
+        """
+        search = Search(using=self.es, index=self.status_index_name)\
+                .query(self._claimable_status_query())\
+                .sort('-created_on')\
+                .extra(seq_no_primary_term=True)
+        search = search[0:n*CLAIM_CANDIDATE_FACTOR]
+        search_resp = search.execute()
+        candidates = [hit.to_dict() for hit in search_resp.hits.hits]
+        if len(candidates) == 0:
+            return []
+        candidates = random.sample(candidates,min(n,len(candidates)))
         
-        hit_choice = random.choice(search_resp.hits.hits)
-        
-        status_dict = hit_choice.to_dict() # elasticsearch-dsl directly returns the doc.
-        status = ArxivPaperStatus.from_json(status_dict['_source'])
-        status.mining = True # Mark as Mining in status index
-        status.update()
+        actions = []
+        quarantined_ids = set()
+        for candidate in candidates:
+            status = ArxivPaperStatus.from_json(candidate['_source'])
+            if status.claim_count >= MAX_PAPER_CLAIMS:
+                status.quarantine('Claimed %d Times Without Being Mined'%status.claim_count)
+                quarantined_ids.add(candidate['_id'])
+            else:
+                status.lease(worker_id,lease_seconds)
+            actions.extend([
+                {"index":{
+                    "_index":self.status_index_name,
+                    "_id":candidate['_id'],
+                    "if_seq_no":candidate['_seq_no'],
+                    "if_primary_term":candidate['_primary_term'],
+                }},
+                status.to_json()
+            ])
+        failed_ids = set(self._bulk(actions))
+        claimed_ids = [candidate['_id'] for candidate in candidates if candidate['_id'] not in failed_ids and candidate['_id'] not in quarantined_ids]
+        if len(claimed_ids) == 0:
+            return []
         
-        record = self._get_record(status_dict['_id'])
-        self._save_status(status,record.identity) # Update DB Document to avoid reextraction
-        return record
+        mget_resp = self.es.mget(body={'ids':claimed_ids},index=self.index_name)
+        return [
+            self._record_from_source(doc) for doc in mget_resp['docs'] if doc.get('found',False)
+        ]
+
+    def renew_leases(self,paper_ids:List[str],worker_id,lease_seconds=DEFAULT_LEASE_SECONDS) -> int:
+        """renew_leases 
+        One `update_by_query` extending the leases `worker_id` holds on `paper_ids`. 
+        Papers which were reclaimed by other workers in the meantime are left untouched. 
+        """
+        now = datetime.datetime.now()
+        leased_until = now + datetime.timedelta(seconds=lease_seconds)
+        update_resp = self.es.update_by_query(
+            index=self.status_index_name,
+            body={
+                'query':Q('bool',filter=[
+                    Q('ids',values=paper_ids),
+                    Q('match',**{'mining':True})
+                ]).to_dict(),
+                'script':{
+                    'source':"""
+                        if (ctx._source.worker_id == params.worker_id) {
+                            ctx._source.leased_until = params.leased_until;
+                            ctx._source.updated_on = params.updated_on;
+                        } else {
+                            ctx.op = 'noop';
+                        }
+                    """,
+                    'lang':'painless',
+                    'params':{
+                        'worker_id':worker_id,
+                        'leased_until':leased_until.isoformat(),
+                        'updated_on':now.isoformat()
+                    }
+                }
+            },
+            conflicts='proceed'
+        )
+        return update_resp['updated']
+
+    def release_claims(self,paper_ids:List[str],worker_id) -> int:
+        """release_claims 
+        One `update_by_query` which drops the leases `worker_id` holds on `paper_ids` and takes back their claims 
+        from `claim_count`. Papers which were reclaimed by other workers in the meantime are left untouched. 
+        """
+        if len(paper_ids) == 0:
+            return 0
+        update_resp = self.es.update_by_query(
+            index=self.status_index_name,
+            body={
+                'query':Q('bool',filter=[
+                    Q('ids',values=paper_ids),
+                    Q('match',**{'mining':True})
+                ]).to_dict(),
+                'script':{
+                    'source':"""
+                        if (ctx._source.worker_id == params.worker_id) {
+                            ctx._source.mining = false;
+                            ctx._source.worker_id = null;
+                            ctx._source.leased_until = null;
+                            ctx._source.updated_on = params.updated_on;
+                            if (ctx._source.claim_count != null && ctx._source.claim_count > 0) {
+                                ctx._source.claim_count -= 1;
+                            }
+                        } else {
+                            ctx.op = 'noop';
+                        }
+                    """,
+                    'lang':'painless',
+                    'params':{
+                        'worker_id':worker_id,
+                        'updated_on':datetime.datetime.now().isoformat()
+                    }
+                }
+            },
+            conflicts='proceed'
+        )
+        return update_resp['updated']
+
+    def _expired_lease_query(self,now,stale_seconds=None):
+        expired = [
+            Q('range',**{'leased_until':{'lt':now.isoformat()}})
+        ]
+        if stale_seconds is not None:
+            stale_before = now - datetime.timedelta(seconds=stale_seconds)
+            expired.append(Q('bool',\
+                must_not=[Q('exists',field='leased_until')],\
+                filter=[Q('range',**{'updated_on':{'lt':stale_before.isoformat()}})]
+            ))
+        return Q('bool',\
+            filter=[Q('match',**{'mining':True})],\
+            should=expired,\
+            minimum_should_match=1
+        )
+
+    def release_expired_leases(self,stale_seconds=None) -> int:
+        """release_expired_leases 
+        One `update_by_query` which sets `mining=False` and drops the lease of papers whose lease expired. 
+        With `stale_seconds`, papers left as `mining` without a lease for longer than that are released as well. 
+        """
+        now = datetime.datetime.now()
+        update_resp = self.es.update_by_query(
+            index=self.status_index_name,
+            body={
+                'query':self._expired_lease_query(now,stale_seconds=stale_seconds).to_dict(),
+                'script':{
+                    'source':"""
+                        ctx._source.mining = false;
+                        ctx._source.worker_id = null;
+                        ctx._source.leased_until = null;
+                        ctx._source.updated_on = params.updated_on;
+                    """,
+                    'lang':'painless',
+                    'params':{
+                        'updated_on':now.isoformat()
+                    }
+                }
+            },
+            conflicts='proceed'
+        )
+        return update_resp['updated']
+
+    def queue_stats(self) -> dict:
+        """queue_stats 
+        One search with a `filters` aggregation over the status index.
+        :returns dict : counts of 
+            - `queued` : unmined papers which no one is mining. 
+            - `in_flight` : papers being mined under a live lease. 
+            - `expired` : papers marked as mining with an expired lease. These get claimed again or released by the reaper. 
+            - `mined` : papers which were mined.
+            - `quarantined` : papers which won't be claimed again. 
+        """
+        now = datetime.datetime.now()
+        search = Search(using=self.es, index=self.status_index_name)[:0]
+        search.aggs.bucket('queue','filters',filters={
+            'queued':Q('bool',filter=[Q('match',**{'mined':False}),Q('match',**{'mining':False})],must_not=[Q('match',**{'quarantined':True})]),
+            'in_flight':Q('bool',filter=[
+                Q('match',**{'mining':True}),
+                Q('range',**{'leased_until':{'gte':now.isoformat()}})
+            ]),
+            'expired':Q('bool',filter=[
+                Q('match',**{'mining':True}),
+                Q('range',**{'leased_until':{'lt':now.isoformat()}})
+            ]),
+            'mined':Q('match',**{'mined':True}),
+            'quarantined':Q('match',**{'quarantined':True}),
+        })
+        search_resp = search.execute()
+        buckets = search_resp.aggregations.queue.buckets
+        return {
+            queue_state:buckets[queue_state].doc_count \
+                for queue_state in ['queued','in_flight','expired','mined','quarantined']
+        }
 
-    def set_mined(self,identity:ArxivIdentity,mined_status:bool) -> None:
-        # Marks The paper according to mining bool returned.
-        status = self._get_status(identity.identity)
-        status.mining = False
-        status.mined = mined_status
-        status.update()
-        self._save_status(status,identity)
+    def enable_write_behind(self,max_actions=500,flush_interval=5,max_retries=3):
+        """enable_write_behind 
+        Route `save_record`, `set_mined`, `set_semantic_parsed_research`, `set_many_parsed_research`
+        (and `set_many_authors`/`set_many_ontology`) through a `BulkWriteBuffer` so that the writes of 
+        many papers go out as one `_bulk` request. Writes become visible only once flushed. 
+        Call `flush` before exiting. 
+        """
+        if self.write_buffer is None:
+            self.write_buffer = BulkWriteBuffer(self.es,max_actions=max_actions,flush_interval=flush_interval,max_retries=max_retries)
+        return self.write_buffer
+
+    def flush(self):
+        if self.write_buffer is None:
+            return []
+        return self.write_buffer.flush()
+
+    def _write_index_action(self,index_name,doc_id,doc):
+        if self.write_buffer is not None:
+            self.write_buffer.add({"index":{"_index":index_name,"_id":doc_id}},doc)
+        else:
+            self.es.index(index=index_name,id=doc_id,body=doc)
+
+    def set_mined(self,identity:ArxivIdentity,mined_status:bool,reset_claim_count=False) -> None:
+        """set_mined 
+        Marks The paper according to mining bool returned and drops its lease. 
+        A partial update so the status isn't read first. Mined papers and papers set with `reset_claim_count` 
+        start counting their claims towards `MAX_PAPER_CLAIMS` from 0 again and are taken out of quarantine. 
+        """
+        status_update = dict(
+            mined=mined_status,
+            mining=False,
+            worker_id=None,
+            leased_until=None,
+            updated_on=datetime.datetime.now().isoformat()
+        )
+        if mined_status or reset_claim_count:
+            status_update['claim_count'] = 0
+            status_update['quarantined'] = False
+            status_update['quarantine_reason'] = None
+        if self.write_buffer is not None:
+            self.write_buffer.add(
+                {"update":{"_index":self.status_index_name,"_id":identity.identity,"retry_on_conflict":3}},
+                {"doc":status_update}
+            )
+        else:
+            self.es.update(index=self.status_index_name,id=identity.identity,body={"doc":status_update},retry_on_conflict=3)
+
+    def quarantine_paper(self,identity:ArxivIdentity,reason,min_claim_count=0) -> None:
+        """quarantine_paper 
+        Drops the lease of the paper and marks it as quarantined once it was claimed `min_claim_count` times. 
+        A scripted update so the status isn't read first. 
+        """
+        status_script = {
+            'source':"""
+                ctx._source.mined = false;
+                ctx._source.mining = false;
+                ctx._source.worker_id = null;
+                ctx._source.leased_until = null;
+                ctx._source.updated_on = params.updated_on;
+                if (ctx._source.claim_count != null && ctx._source.claim_count >= params.min_claim_count) {
+                    ctx._source.quarantined = true;
+                    ctx._source.quarantine_reason = params.reason;
+                }
+            """,
+            'lang':'painless',
+            'params':{
+                'reason':reason,
+                'min_claim_count':min_claim_count,
+                'updated_on':datetime.datetime.now().isoformat()
+            }
+        }
+        if self.write_buffer is not None:
+            self.write_buffer.add(
+                {"update":{"_index":self.status_index_name,"_id":identity.identity,"retry_on_conflict":3}},
+                {"script":status_script}
+            )
+        else:
+            self.es.update(index=self.status_index_name,id=identity.identity,body={"script":status_script},retry_on_conflict=3)
 
     def save_record(self,record:ArxivRecord) -> None:
         """save_record 
         Save ArxivRecord which could be mined/unmined to database.
         """
-        self._save_record(record)
+        self._write_index_action(self.index_name,record.identity.identity,record.to_json())
 
     def get_semantic_parsed_research(self,paper_id):
         try: 
@@ -231,9 +667,16 @@ class ArxivElasticSeachDatabaseClient(ArxivDatabase):
             return None
 
     def set_many_parsed_research(self,records:List[ArxivSematicParsedResearch]):
+        if self.write_buffer is not None:
+            for record in records:
+                self.write_buffer.add({"index":{"_index":self.parsed_research_index_name,"_id":record.identity.identity}},record.to_json())
+            return
         self._save_many_parsed_research(records)
         
     def set_semantic_parsed_research(self,record:ArxivSematicParsedResearch):
+        if self.write_buffer is not None:
+            self.set_many_parsed_research([record])
+            return
         self._save_semantic_parsed_research(record)
     
     def record_stream(self) -> ArxivRecord:
@@ -247,6 +690,17 @@ class ArxivElasticSeachDatabaseClient(ArxivDatabase):
         for hit in search_obj.scan():
             yield ArxivRecord.from_json(hit.to_dict())
 
+    def paper_id_stream(self):
+        """paper_id_stream
+        Stream the `_id` of every record from ES without fetching the `_source`. 
+        :yield: [str]
+        """
+        search_obj = Search(using=self.es, index=self.index_name)\
+                            .query(Q())\
+                            .source(False)
+        for hit in search_obj.scan():
+            yield hit.meta.id
+
     def id_stream(self,id_list):
         for arxiv_id in id_list:
             record_obj , _ = self._get_paper(paper_id=arxiv_id)
@@ -669,7 +1123,7 @@ class DateAggregation(Aggregation):
         arr = []
         for doc in doc_list:
             arr.append(dict(
-                key=dateparser.parse(doc['key_as_string']),
+                key=parse_timestamp(doc['key_as_string']),
                 metric=doc[metric_name]
             ))
         return arr
@@ -825,6 +1279,10 @@ class KeywordsTextSearch(ArxivElasticTextSearch):
         )
 
     def set_many_authors(self,authorslist:List[Author]):
+        if self.write_buffer is not None:
+            for r in authorslist:
+                self.write_buffer.add({"index":{"_index":self.authors_index,"_id":r.name}},D2D(r))
+            return
         newrecords = []
         for r in authorslist:
             newrecords.extend([{
@@ -838,6 +1296,10 @@ class KeywordsTextSearch(ArxivElasticTextSearch):
         self.es.bulk(newrecords)
 
     def set_many_ontology(self,ontologylist:List[str]):
+        if self.write_buffer is not None:
+            for ontstr in ontologylist:
+                self.write_buffer.add({"index":{"_index":self.ontology_index,"_id":ontstr}},D2D(CoreOntology(value=ontstr)))
+            return
         newrecords = []
         for ontstr in ontologylist:
             newrecords.extend([{
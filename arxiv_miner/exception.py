@@ -54,6 +54,37 @@ class DetexBinaryAbsent(LatexParserException):
         msg = "Exception Raised Because Of No Detex Binary"
         super(DetexBinaryAbsent, self).__init__(msg)
 
+
+class DetexTimeoutException(LatexParserException):
+    def __init__(self,timeout):
+        self.timeout = timeout
+        msg = "Detex Was Killed After Running For More Than %s Seconds"%str(timeout)
+        super(DetexTimeoutException, self).__init__(msg)
+
+    def __reduce__(self): # Raised in the workers of the parsing pool
+        return (self.__class__,(self.timeout,))
+
+
+class ParseTimeoutException(LatexParserException):
+    def __init__(self,timeout):
+        self.timeout = timeout
+        msg = "Parsing Was Stopped After Running For More Than %s Seconds"%str(timeout)
+        super(ParseTimeoutException, self).__init__(msg)
+
+    def __reduce__(self): # Raised in the workers of the parsing pool
+        return (self.__class__,(self.timeout,))
+
+class ParseBudgetExceededException(LatexParserException):
+    def __init__(self,stage,budget,limit):
+        self.stage = stage
+        self.budget = budget
+        self.limit = limit
+        msg = "Parsing Stage %s Went Over Its %s Budget Of %s"%(stage,budget,str(limit))
+        super(ParseBudgetExceededException, self).__init__(msg)
+
+    def __reduce__(self): # Raised in the workers of the parsing pool
+        return (self.__class__,(self.stage,self.budget,self.limit))
+
 class CorruptArxivRecordException(Exception):
      def __init__(self):
         msg = "ArxivRecord Is Corrupt And Cannot Load From Dict"
@@ -88,4 +119,9 @@ class ElasticsearchMissingException(DepsMissingException):
 class ElasticsearchIndexMissingException(Exception):
     def __init__(self):
         msg = 'Index To Elasticsearch Cannot Be None'
-        super(ElasticsearchIndexMissingException, self).__init__(msg)
\ No newline at end of file
+        super(ElasticsearchIndexMissingException, self).__init__(msg)
+
+class RetryBudgetExhaustedException(Exception):
+    def __init__(self,attempts,throttled_seconds,error_message):
+        msg = "Gave Up After %d Attempts And %.1f Seconds of Backoff \n\n %s"%(attempts,throttled_seconds,error_message)
+        super(RetryBudgetExhaustedException, self).__init__(msg)
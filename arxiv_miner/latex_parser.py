@@ -1,24 +1,71 @@
 from tex2py import tex2py 
 from typing import List
 import os 
-from subprocess import Popen, PIPE
+import time
+import signal
+from subprocess import Popen, PIPE, DEVNULL, TimeoutExpired
+from threading import BoundedSemaphore,Lock
+from concurrent.futures import ThreadPoolExecutor
 import json
 from .exception import \
         LatexParserException,\
         LatexToTextException,\
         MaxSectionSizeException,\
-        DetexBinaryAbsent
+        DetexBinaryAbsent,\
+        DetexTimeoutException,\
+        ParseTimeoutException,\
+        ParseBudgetExceededException
 
 from .semantic_parsing import Section
+from .section_extractor import \
+        RegexSectionExtractor,\
+        SECTION_EXTRACTOR_TEX2PY,\
+        SECTION_EXTRACTOR_REGEX,\
+        SECTION_EXTRACTORS
+from .config import Config
+from .parse_budget import ParseBudget
 
+# Bump when a change to the parsers changes their output. It invalidates the `ParseCache`.
+PARSER_VERSION = '1'
 
-def get_tex_tree(tex_path):
+def get_tex_tree(tex_path,section_extractor=SECTION_EXTRACTOR_TEX2PY):
+    """get_tex_tree 
+    Tree of the sections of a tex file. With the `regex` `section_extractor` it is a `HeadingTree` 
+    which reads the same way as the `tex2py` tree. 
+    """
+    if section_extractor == SECTION_EXTRACTOR_REGEX:
+        return RegexSectionExtractor().extract_from_file(tex_path)
     with open(tex_path,'r') as f:
         data = f.read()
     tex_root_node = tex2py(data)
     return tex_root_node
 
 
+def get_tex_tree_from_source(tex_source:bytes,section_extractor=SECTION_EXTRACTOR_TEX2PY):
+    """get_tex_tree_from_source 
+    `get_tex_tree` for the contents of a tex file held in memory. 
+    """
+    if section_extractor == SECTION_EXTRACTOR_REGEX:
+        return RegexSectionExtractor().extract(tex_source.decode('utf-8',errors='replace'))
+    return tex2py(tex_source.decode('utf-8'))
+
+
+def split_candidates(split_value:str,split_upto=0.5,split_bins=10):
+    """split_candidates 
+    The word prefixes of `split_value` which `split_match` tries, longest first. Refer `split_match`.
+    :returns List[String]
+    """
+    split_value = split_value.split(' ') # This make it remove words instead of the characters. 
+    sb = [i for i in range(split_bins)]
+    split_mul = (1-split_upto)/split_bins
+    # Spread the `split_bins` according to the how much the split needs to happen. 
+    split_range = [1-float((i)*split_mul) for i in sb]
+    # index at which the new `split_value` will be determined. Order is descending to ensure largest match. 
+    slice_indices = [int(len(split_value)*split_val) for split_val in split_range] 
+    # creates the split strings.     
+    return [' '.join(split_value[:index]) for index in slice_indices] 
+
+
 def split_match(split_value:str,splitting_string:str,split_upto=0.5,split_bins=10):
     """split_match 
     Splits a Keep Splitting a `splitting_string` based on the value of `split_value`.
@@ -39,15 +86,7 @@ def split_match(split_value:str,splitting_string:str,split_upto=0.5,split_bins=1
                                         - The purpose of doing this is to ensure a partial match of a string can help extract the split text 
     :returns splitted_text : List[String] : [s1,s2] or []
     """
-    split_value = split_value.split(' ') # This make it remove words instead of the characters. 
-    sb = [i for i in range(split_bins)]
-    split_mul = (1-split_upto)/split_bins
-    # Spread the `split_bins` according to the how much the split needs to happen. 
-    split_range = [1-float((i)*split_mul) for i in sb]
-    # index at which the new `split_value` will be determined. Order is descending to ensure largest match. 
-    slice_indices = [int(len(split_value)*split_val) for split_val in split_range] 
-    # creates the split strings.     
-    split_values_to_checks = [' '.join(split_value[:index]) for index in slice_indices] 
+    split_values_to_checks = split_candidates(split_value,split_upto=split_upto,split_bins=split_bins)
     
     for split_val in split_values_to_checks:
         if split_val == '': # In case of empty seperator leaave it. 
@@ -59,14 +98,116 @@ def split_match(split_value:str,splitting_string:str,split_upto=0.5,split_bins=1
     return []
 
 
+DEFAULT_DETEX_TIMEOUT = 120
+
+
+class DetexPool:
+    """DetexPool 
+    Runs `detex` for all the parsers of a process. `detex` reads one document until EOF and exits
+    so its processes can't be kept alive and reused. Instead the pool :
+        - Bounds the number of `detex` processes running at once to `max_workers`. 
+        - Passes the latex in through stdin and takes the text from stdout. No temporary files. 
+        - Kills runs which take longer than `timeout`.
+        - Keeps the time taken by every run.  
+    Use `get_detex_pool` to share one pool per `detex_path`.
+
+    :param detex_path: path to the detex binary
+    :param max_workers: `detex` processes allowed to run at once. Defaults to the number of cores. 
+    :param timeout: seconds after which a `detex` run is killed. None for no limit. 
+    """
+    def __init__(self,detex_path,max_workers=None,timeout=DEFAULT_DETEX_TIMEOUT):
+        self.detex_path = detex_path
+        if max_workers is None:
+            max_workers = os.cpu_count()
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.slots = BoundedSemaphore(max_workers)
+        self.stats_lock = Lock()
+        self.num_calls = 0
+        self.num_timeouts = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def _record(self,seconds,timed_out=False):
+        with self.stats_lock:
+            self.num_calls+=1
+            self.total_seconds+=seconds
+            self.max_seconds = max(self.max_seconds,seconds)
+            if timed_out:
+                self.num_timeouts+=1
+
+    def run(self,latex_source:bytes=None,latex_document_path=None):
+        """run 
+        Extracts the text of `latex_source` or of the file at `latex_document_path` with `detex`. 
+        :raises DetexTimeoutException: when `detex` runs longer than `timeout`
+        :return: Tuple(bytes,float) : the text and the seconds the `detex` run took.
+        """
+        command = [self.detex_path]
+        if latex_document_path is not None:
+            command.append(latex_document_path)
+        with self.slots:
+            start = time.monotonic()
+            process = Popen(command,\
+                            stdin=DEVNULL if latex_source is None else PIPE,\
+                            stdout=PIPE,\
+                            close_fds=False,\
+                            start_new_session=True) # Own process group so that a timeout kills whatever `detex` started
+            try:
+                (output, err) = process.communicate(input=latex_source,timeout=self.timeout)
+            except TimeoutExpired:
+                os.killpg(process.pid,signal.SIGKILL)
+                process.communicate()
+                self._record(time.monotonic()-start,timed_out=True)
+                raise DetexTimeoutException(self.timeout)
+            except BaseException: # Interrupted. eg. By the timeout of a `ParsingPool` job.
+                os.killpg(process.pid,signal.SIGKILL)
+                process.wait()
+                raise
+            seconds = time.monotonic()-start
+        self._record(seconds)
+        return output,seconds
+
+    def map(self,latex_sources:List[bytes]):
+        """map 
+        Runs `detex` on many sources at once. 
+        :return: List[Tuple(bytes,float)] in the order of `latex_sources`
+        """
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return list(executor.map(lambda latex_source: self.run(latex_source=latex_source),latex_sources))
+
+    def stats(self):
+        with self.stats_lock:
+            return dict(
+                calls=self.num_calls,
+                timeouts=self.num_timeouts,
+                total_seconds=self.total_seconds,
+                max_seconds=self.max_seconds,
+                mean_seconds=self.total_seconds/self.num_calls if self.num_calls > 0 else 0.0
+            )
+
+
+detex_pools = {}
+detex_pools_lock = Lock()
+
+def get_detex_pool(detex_path,max_workers=None,timeout=DEFAULT_DETEX_TIMEOUT):
+    """get_detex_pool 
+    The `DetexPool` of `detex_path` shared within the process. Created with `max_workers` and `timeout` on first use. 
+    """
+    with detex_pools_lock:
+        if detex_path not in detex_pools:
+            detex_pools[detex_path] = DetexPool(detex_path,max_workers=max_workers,timeout=timeout)
+        return detex_pools[detex_path]
+
+
 class LatexToText():
     """LatexToText 
     This class will manage the conversion of the latex document into text. 
     It uses `detex` to extract the text from tex Files. 
+    `detex` runs through a `DetexPool`. The time taken by the last call is kept in `last_call_seconds`.
     """
     detex_path = os.path.join(os.path.abspath(os.path.dirname(__file__)),'detex')
 
-    def __init__(self,detex_path=None):
+    def __init__(self,detex_path=None,detex_pool:DetexPool=None):
         # check binary existance. 
         if not self.binary_exists(self.detex_path):
             if detex_path is None:
@@ -75,6 +216,10 @@ class LatexToText():
                 raise DetexBinaryAbsent()
             else:
                 self.detex_path = detex_path
+        if detex_pool is None:
+            detex_pool = get_detex_pool(self.detex_path)
+        self.detex_pool = detex_pool
+        self.last_call_seconds = None
         
     @staticmethod
     def binary_exists(detex_path):
@@ -86,10 +231,24 @@ class LatexToText():
     
     def __call__(self,latex_document_path):
         try:
-            process = Popen([self.detex_path, latex_document_path], stdout=PIPE)
-            (output, err) = process.communicate()
-            exit_code = process.wait()
+            output,self.last_call_seconds = self.detex_pool.run(latex_document_path=latex_document_path)
             return output
+        except (DetexTimeoutException,ParseTimeoutException,ParseBudgetExceededException,MemoryError):
+            # Kept as is so that `error_class` can tell timeouts and budgets apart from parse errors.
+            raise
+        except Exception as e:
+            print(e)
+            raise LatexToTextException()
+
+    def from_source(self,latex_source:bytes):
+        """from_source 
+        Extracts the text of a tex file held in memory. The source is fed to `detex` through stdin. 
+        """
+        try:
+            output,self.last_call_seconds = self.detex_pool.run(latex_source=latex_source)
+            return output
+        except (DetexTimeoutException,ParseTimeoutException,ParseBudgetExceededException,MemoryError):
+            raise
         except Exception as e:
             print(e)
             raise LatexToTextException()
@@ -105,6 +264,7 @@ class LatexInformationParser(object):
     Use the `section_extraction` method to extract the document information
     sections from the single/document Latex setup. This returns a Sequential Tree like structure with sub sequences. 
     This will use `tex2py` like functions to extract the document structure from the tex documents. 
+    `section_extractor` picks `tex2py` or the faster `RegexSectionExtractor`. Defaults to `Config.section_extractor`
     
     ## `text_extraction`:
     Will extract text from the Latex File. uses `opendetex` to extract the text from latex. 
@@ -112,11 +272,21 @@ class LatexInformationParser(object):
     ## `collate_sections` : 
     This will collate the information text and sections extracted based on the strategy of the extraction. 
 
+    Every stage runs under the time and memory budgets of the `parse_budget`. Refer `ParseBudget`. 
+
     """
     max_section_limit = 30 # Maximum number of sections to allow for extraction
-    def __init__(self,max_section_limit=20,detex_path=None):
+    def __init__(self,max_section_limit=20,detex_path=None,section_extractor=None,parse_budget:ParseBudget=None):
         self.max_section_limit = max_section_limit
+        if parse_budget is None:
+            parse_budget = ParseBudget()
+        self.parse_budget = parse_budget
         self.text_extractor = LatexToText(detex_path=detex_path)
+        if section_extractor is None:
+            section_extractor = Config.section_extractor
+        if section_extractor not in SECTION_EXTRACTORS:
+            raise ValueError("Section Extractor %s Not In %s"%(section_extractor,str(SECTION_EXTRACTORS)))
+        self.section_extractor = section_extractor
 
     
     def section_extraction(self,tex_file_path) -> List[Section]:
@@ -0,0 +1,94 @@
+"""
+Batched Arxiv API metadata.
+
+Mining needs the Arxiv API response of a paper to know its latest version, which the scrapers leave unknown
+(refer `ArxivIdentity.from_oa2_response`) and the `ParseCache` aliases use. `ArxivMetadataCache` gets the responses of many papers with one `arxiv.query(id_list=[...])` and
+keeps them for a while, so the papers claimed together by a miner cost one API request instead of one each.
+"""
+import arxiv
+from threading import Lock
+from typing import List
+from expiringdict import ExpiringDict
+from .record import ArxivIdentity,ArxivRecord
+from .rate_limiter import RetryPolicy
+from .exception import ArxivAPIException
+from .logger import create_logger
+
+DEFAULT_METADATA_CACHE_SIZE = 10000
+DEFAULT_METADATA_CACHE_TTL = 6*3600
+DEFAULT_METADATA_BATCH_SIZE = 100
+
+
+def response_paper_id(arxiv_response):
+    """response_paper_id
+    Id without the version of an Arxiv API response. Eg. `http://arxiv.org/abs/hep-th/9901001v2` -> `hep-th/9901001`
+    """
+    id_version = arxiv_response['id'].split('/abs/')[-1]
+    return id_version[:id_version.rfind('v')]
+
+
+class ArxivMetadataCache:
+    """ArxivMetadataCache
+    :param retry_policy: `RetryPolicy` of the API requests.
+    :param max_size: papers kept.
+    :param max_age_seconds: seconds a response is kept. Newer versions published meanwhile aren't seen.
+    :param batch_size: ids per API request.
+    """
+    def __init__(self,\
+                retry_policy:RetryPolicy=None,\
+                max_size=DEFAULT_METADATA_CACHE_SIZE,\
+                max_age_seconds=DEFAULT_METADATA_CACHE_TTL,\
+                batch_size=DEFAULT_METADATA_BATCH_SIZE):
+        if retry_policy is None:
+            retry_policy = RetryPolicy(max_retries=4,base_delay=3)
+        self.retry_policy = retry_policy
+        self.batch_size = batch_size
+        self.responses = ExpiringDict(max_size,max_age_seconds=max_age_seconds)
+        self.lock = Lock()
+        self.num_queries = 0
+        self.num_hits = 0
+        self.logger = create_logger(self.__class__.__name__)
+
+    def prefetch(self,paper_ids:List[str]):
+        """prefetch
+        Gets the responses of the `paper_ids` which aren't cached with one API request per `batch_size` ids.
+        """
+        with self.lock:
+            missing_ids = [paper_id for paper_id in dict.fromkeys(paper_ids) if paper_id not in self.responses]
+        for batch_start in range(0,len(missing_ids),self.batch_size):
+            id_batch = missing_ids[batch_start:batch_start+self.batch_size]
+            arxiv_responses = self.retry_policy.call(arxiv.query,id_list=id_batch,max_results=len(id_batch))
+            with self.lock:
+                self.num_queries+=1
+                for arxiv_response in arxiv_responses:
+                    self.responses[response_paper_id(arxiv_response)] = arxiv_response
+
+    def prefetch_records(self,records:List[ArxivRecord]):
+        """prefetch_records
+        `prefetch` for the papers claimed together by a miner. Papers fetch their own metadata when the batch fails.
+        """
+        paper_ids = [record.identity.identity for record in records]
+        try:
+            self.prefetch(paper_ids)
+        except Exception as e:
+            self.logger.error('Failed Fetching Metadata Of %d Papers : %s'%(len(paper_ids),str(e)))
+
+    def get(self,paper_id):
+        """get
+        :return: `ArxivIdentity`,dict : like `ArxivPaper.extract_meta_from_remote`.
+        :raises ArxivAPIException: when the API has no paper with the id.
+        """
+        with self.lock:
+            arxiv_response = self.responses.get(paper_id)
+            if arxiv_response is not None:
+                self.num_hits+=1
+        if arxiv_response is None:
+            self.prefetch([paper_id])
+            arxiv_response = self.responses.get(paper_id)
+        if arxiv_response is None:
+            raise ArxivAPIException(paper_id,'Paper Not Found In Arxiv API Response')
+        return ArxivIdentity.from_arxiv_response(arxiv_response),arxiv_response
+
+    def stats(self):
+        with self.lock:
+            return dict(queries=self.num_queries,hits=self.num_hits,cached=len(self.responses))
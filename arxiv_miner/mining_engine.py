@@ -14,6 +14,17 @@ from .logger import create_logger
 from .exception import ArxivAPIException
 from .ontology_miner import OntologyMiner
 from .paper import ArxivPaper,ResearchPaperFactory
+from .rate_limiter import TokenBucket,RetryPolicy
+from .utils import get_worker_id
+from .parse_cache import ParseCache,default_parse_cache_path,DEFAULT_PARSE_CACHE_BYTES
+from .source_store import SourceStore,get_source_store
+from .metadata_cache import ArxivMetadataCache
+from .parsing_pool import get_parsing_pool
+from .work_queue import \
+    LeaseWorkQueue,\
+    LeaseHeartbeat,\
+    DEFAULT_CLAIM_BATCH_SIZE,\
+    DEFAULT_LEASE_SECONDS
 import time
 from multiprocessing import Process,Event
 from signal import signal, SIGINT
@@ -30,28 +41,89 @@ class MiningEngine:
     """ 
     Run as Isolated Process 
         - Query Database For Unmined Paper
+            - Papers come from a `LeaseWorkQueue` which claims `claim_batch_size` at a time. 
+              A claim is a lease of `lease_seconds` for the engine's `worker_id`.
         - Mine Paper : With ArxivPaper Object. 
             - If Arxiv Acts Bitchy with 500 Errors Wait and Mine. 
+        - With `write_behind` the writes of many papers are sent to the database together. 
+        - With `in_memory_latex` only the `.tex` files of the latex sources are read and they never touch the disk. 
+        - The parsing results are kept in a `ParseCache` of `parse_cache_size` bytes at `parse_cache_path` (`.parse_cache` 
+          under the `data_root_path` by default) so papers whose latex source didn't change are not parsed again when 
+          they are re-mined. `use_parse_cache=False` parses every paper. 
+        - With a `source_store_uri` the latex sources are read from the `SourceStore` there (eg. a harvest) 
+          and the ones downloaded from arxiv are written to it. 
+        - Sources are downloaded straight from the id of the claimed record. The Arxiv API is asked for the 
+          metadata (eg. the latest versions) with one request for all the claimed papers. 
+        - With `parsing_pool_workers` the tex files of a paper are parsed in parallel on the `ParsingPool` of the 
+          engine's process, each under the timeout of the pool. Otherwise they are parsed one after the other. 
     """
     def __init__(self,\
             database:ArxivDatabase,\
             data_root_path,\
-            detex_path):
+            detex_path,\
+            claim_batch_size=DEFAULT_CLAIM_BATCH_SIZE,\
+            lease_seconds=DEFAULT_LEASE_SECONDS,\
+            write_behind=False,\
+            in_memory_latex=False,\
+            parse_cache_path=None,\
+            parse_cache_size=DEFAULT_PARSE_CACHE_BYTES,\
+            source_store_uri=None,\
+            parsing_pool_workers=None,\
+            use_parse_cache=True):
 
         self.db = database
+        if write_behind:
+            self.db.enable_write_behind()
         self.data_root_path = data_root_path
         self.detex_path = detex_path
+        self.in_memory_latex = in_memory_latex
+        self.parse_cache = None
+        if use_parse_cache:
+            if parse_cache_path is None:
+                parse_cache_path = default_parse_cache_path(data_root_path)
+            self.parse_cache = ParseCache(parse_cache_path,max_bytes=parse_cache_size)
+        self.source_store = None
+        if source_store_uri is not None:
+            self.source_store = get_source_store(source_store_uri)
+        self.metadata_cache = ArxivMetadataCache()
+        # The pool is created on first use so that a `MiningProcess` creates it in its own process.
+        self.parsing_pool_workers = parsing_pool_workers
+        self.last_source_from_store = False # Whether the last paper was mined without asking arxiv for its source. 
+        self.worker_id = get_worker_id()+"-"+random_string(4)
+        self.work_queue = LeaseWorkQueue(database,\
+                                        worker_id=self.worker_id,\
+                                        claim_batch_size=claim_batch_size,\
+                                        lease_seconds=lease_seconds)
         self.logger = create_logger(self.__class__.__name__+"__"+random_string())
 
+    def release_claimed_papers(self):
+        """release_claimed_papers 
+        Hand back the claimed papers which were not mined so that other miners can pick them up before the lease expires.
+        """
+        self.work_queue.release_all()
+
+    @property
+    def parsing_pool(self):
+        if self.parsing_pool_workers is None:
+            return None
+        return get_parsing_pool(max_workers=self.parsing_pool_workers)
+
     def mine_record(self,paper_record:ArxivRecord):
         paper_obj = ArxivPaper.from_arxiv_record(self.data_root_path,\
                                                     paper_record,\
-                                                    detex_path=self.detex_path)
+                                                    detex_path=self.detex_path,\
+                                                    in_memory=self.in_memory_latex,\
+                                                    parse_cache=self.parse_cache,\
+                                                    source_store=self.source_store,\
+                                                    metadata_cache=self.metadata_cache,\
+                                                    parsing_pool=self.parsing_pool)
         try:
             paper_obj.mine_paper()
         except Exception as e:
             self.logger.error('Failed Mining Paper : %s\n\n%s'%(paper_obj.identity.identity,str(e)))
             return None
+        finally:
+            self.last_source_from_store = paper_obj.source_from_store
         
         return paper_obj
     
@@ -62,12 +134,14 @@ class MiningEngine:
         3. Create `ArxivSematicParsedResearch` from `ArxivRecord` and save it .
         3. save Record and Mark as Mined. 
         """
-        paper_record = self.db.get_unmined_paper()
+        paper_record = self.work_queue.next()
         paper_mined = False
         if not paper_record: 
             return None,paper_mined
         
         self.logger.info("Mining Paper %s"%paper_record.identity.identity)
+        # The versions of the paper and the rest of the claimed papers with one request to the Arxiv API.
+        self.metadata_cache.prefetch_records([paper_record]+self.work_queue.pending())
         paper_obj = self.mine_record(paper_record)
 
         if paper_obj is not None:
@@ -94,7 +168,7 @@ class MiningEngine:
             research_object=ResearchPaperFactory.from_arxiv_record(paper_record),\
             ontology=ontology
         ))
-        self.db.set_mined(paper_record.identity,paper_mined)
+        self.work_queue.finish(paper_record,paper_mined)
         
         return paper_record,paper_mined
 
@@ -103,20 +177,38 @@ class SourceHarvestingEngine:
     """ 
     Run as Isolated Process 
         - Given a List of Ids, It will download the Tar source and Put it into a folder. Otherwise it will wait for arxiv to Forgive :) 
+        - Requests are paced by a `TokenBucket` at one per `scrape_sleep_time` seconds. Failed 
+          requests back off through a `RetryPolicy` starting at `error_sleep_time` seconds 
+          or wait for the `Retry-After` arxiv sends.
 
     Args : 
         id_list : List[str] : list of strings that will be used for the 
+        rate_limiter : TokenBucket : Optional limiter to share with other harvesters. 
+        retry_policy : RetryPolicy : Optional policy to share with other harvesters. 
+        source_store : SourceStore : Optional store the sources are written to. Papers it already holds are skipped. 
     """
-    def __init__(self,id_list:List[str],data_root_path,error_sleep_time=5,scrape_sleep_time=3):
+    def __init__(self,id_list:List[str],data_root_path,error_sleep_time=5,scrape_sleep_time=3,rate_limiter:TokenBucket=None,retry_policy:RetryPolicy=None,source_store:SourceStore=None):
         super().__init__()
         self.id_list = id_list
         self.data_root_path = data_root_path
         self.logger = create_logger(self.__class__.__name__+"__"+random_string())
         self.error_sleep_time = error_sleep_time
         self.scrape_sleep_time = scrape_sleep_time
+        if rate_limiter is None:
+            rate_limiter = TokenBucket(1/scrape_sleep_time)
+        if retry_policy is None:
+            retry_policy = RetryPolicy(base_delay=error_sleep_time,rate_limiter=rate_limiter)
+        self.rate_limiter = rate_limiter
+        self.retry_policy = retry_policy
+        self.source_store = source_store
 
     def harvest_one(self,arxiv_id:str):
-        paper = ArxivPaper(arxiv_id,self.data_root_path,build_paper=False)
+        """harvest_one 
+        :return: path of the downloaded tar file. None when the `source_store` already holds it.
+        """
+        if self.source_store is not None and self.source_store.contains(arxiv_id):
+            return None
+        paper = ArxivPaper(arxiv_id,self.data_root_path,build_paper=False,retry_policy=self.retry_policy,source_store=self.source_store)
         download_path = paper.download_latex()
         return download_path
 
@@ -129,10 +221,11 @@ class SourceHarvestingEngine:
             arxiv_id = self.id_list.pop()
             try:
                 download_path = self.harvest_one(arxiv_id)
-                harvest_papers_paths.append((arxiv_id,download_path))
-                time.sleep(self.scrape_sleep_time)
+                if download_path is not None:
+                    harvest_papers_paths.append((arxiv_id,download_path))
             except Exception as e: # Upon exception. Try 3 times by adding it back to list. If still Failure then dont use it. 
-                self.logger.error(f"Latex Download {str(e)} For ID {arxiv_id}. Will be Sleeping for {self.error_sleep_time}")
+                # The `retry_policy` already backed off for transient errors so there is no sleep here.
+                self.logger.error(f"Latex Download {str(e)} For ID {arxiv_id}.")
                 if arxiv_id in retry_map:
                     if retry_map[arxiv_id] > 3:
                         continue 
@@ -142,8 +235,10 @@ class SourceHarvestingEngine:
                 else:
                     retry_map[arxiv_id]=1
                     self.id_list.append(arxiv_id)
-                time.sleep(self.error_sleep_time)
         
+        retry_stats = self.retry_policy.stats()
+        self.logger.info("Harvested %d Papers. Retried %d Times. Throttled For %.1f Seconds By Retries And %.1f Seconds By Rate Limits"%(\
+            len(harvest_papers_paths),retry_stats['retries'],retry_stats['throttled_seconds'],self.rate_limiter.throttled_seconds))
         return harvest_papers_paths
         
 class MiningProcess(Process,MiningEngine):
@@ -154,11 +249,22 @@ class MiningProcess(Process,MiningEngine):
             mining_interval=5,\
             mining_limit=30,
             empty_wait_time = 600,
-            sleep_interval_count = 10):
+            sleep_interval_count = 10,
+            claim_batch_size = DEFAULT_CLAIM_BATCH_SIZE,
+            lease_seconds = DEFAULT_LEASE_SECONDS,
+            write_behind = False,
+            in_memory_latex = False,
+            parse_cache_path = None,
+            parse_cache_size = DEFAULT_PARSE_CACHE_BYTES,
+            source_store_uri = None,
+            parsing_pool_workers = None,
+            use_parse_cache = True):
         
         # Instantiate The Processes
         Process.__init__(self,daemon=False) # Making it a deamon process. 
-        MiningEngine.__init__(self,database,data_root_path,detex_path)
+        MiningEngine.__init__(self,database,data_root_path,detex_path,claim_batch_size=claim_batch_size,lease_seconds=lease_seconds,in_memory_latex=in_memory_latex,parse_cache_path=parse_cache_path,parse_cache_size=parse_cache_size,source_store_uri=source_store_uri,parsing_pool_workers=parsing_pool_workers,use_parse_cache=use_parse_cache)
+        # The flush thread of the write buffer has to start in the mining process itself.
+        self.write_behind = write_behind
         
         self.mining_interval = mining_interval
         self.empty_wait_time = empty_wait_time
@@ -181,6 +287,11 @@ class MiningProcess(Process,MiningEngine):
         exit(0)
 
     def start_mining(self):
+        if self.write_behind:
+            self.db.enable_write_behind()
+        # Keeps the leases of the claimed papers alive while this process is.
+        heartbeat = LeaseHeartbeat(self.work_queue)
+        heartbeat.start()
         while True:
             if self.mining_limit is not None:
                 if self.num_mined == self.mining_limit:
@@ -190,7 +301,9 @@ class MiningProcess(Process,MiningEngine):
             # Sleep Every `sleep_interval_count` records 
             if self.num_mined % self.sleep_interval_count == 0 and self.num_mined > 0:
                 time.sleep(self.empty_wait_time)
-            time.sleep(self.mining_interval)
+            # Papers whose source came from the `source_store` didn't bother arxiv so there is nothing to wait for.
+            if not self.last_source_from_store:
+                time.sleep(self.mining_interval)
             paper_record,mined_status = self._paper_mining_logic()
             self.num_mined+=1
             if not paper_record: # Sleep If DB says There are Unmined Papers
@@ -204,6 +317,8 @@ class MiningProcess(Process,MiningEngine):
                 continue
             self.logger.info('Saved Paper To DB : %s Completed Mining %d Paper'%(paper_record.identity.identity,self.num_mined))
 
-        
+        heartbeat.stop()
+        self.release_claimed_papers()
+        self.db.flush()
         self.logger.info('Miner Mined : %d'%self.num_mined)
     
\ No newline at end of file
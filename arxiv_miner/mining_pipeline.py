@@ -0,0 +1,363 @@
+"""
+Staged mining pipeline.
+
+`MiningEngine` downloads, parses and indexes one paper at a time so the box idles on
+the network while downloading and on the database while indexing. `MiningPipeline` splits
+mining into stages which run concurrently and are sized on their own:
+
+    claim --> [fetch_queue] --> fetch (threads) --> parse (process pool) --> [index_queue] --> index (batched)
+
+    - fetch : Downloads the latex source of claimed papers. Network bound so it runs on threads
+      sharing one rate limiter. Papers whose latest version is in the `ParseCache` skip the download
+      and the parse and go straight to the index stage. Sources are downloaded from the ids of the
+      records so the Arxiv API is only asked for the latest versions the `ParseCache` needs, with one
+      request for all the claimed papers.
+    - parse : Extracts and parses the tar files with `ArxivPaper.mine_from_tarball`. CPU bound so it
+      runs on a process pool. The pool already parses many papers at once, so the tex files of a paper are
+      parsed one after the other in its worker rather than on a `ParsingPool` of their own. Every parsing stage
+      is still bounded by the `ParseBudget`.
+    - index : Builds the `ArxivSematicParsedResearch` and writes batches of papers to the database.
+
+Queues between stages are bounded so a slow stage holds back the ones before it.
+"""
+import os
+import functools
+import time
+import queue
+import multiprocessing
+from multiprocessing import Process,Event
+from concurrent.futures import ProcessPoolExecutor
+from threading import Thread,BoundedSemaphore,Lock
+from signal import signal, SIGINT
+from typing import List
+from .database import ArxivDatabase
+from .record import ArxivRecord,ArxivSematicParsedResearch,Ontology,Author
+from .logger import create_logger
+from .ontology_miner import OntologyMiner
+from .paper import ArxivPaper,ResearchPaperFactory
+from .rate_limiter import TokenBucket,RetryPolicy
+from .work_queue import \
+    LeaseWorkQueue,\
+    LeaseHeartbeat,\
+    DEFAULT_CLAIM_BATCH_SIZE,\
+    DEFAULT_LEASE_SECONDS
+from .utils import get_worker_id
+from .parse_cache import ParseCache,get_parse_cache,default_parse_cache_path,DEFAULT_PARSE_CACHE_BYTES
+from .source_store import get_source_store
+from .metadata_cache import ArxivMetadataCache
+from .mining_engine import random_string
+
+# Marks the end of the stream in the stage queues.
+STAGE_END = None
+
+
+def mine_tarball(data_root_path,detex_path,record_json,tarball_path,in_memory=False,parse_cache_path=None,parse_cache_size=DEFAULT_PARSE_CACHE_BYTES):
+    """mine_tarball
+    Parse stage. Runs in the process pool so it takes and returns plain JSON.
+    :param parse_cache_path: directory of the `ParseCache` shared by the workers. None to parse without a cache.
+    :return: Tuple(dict,bool,str) : record json, whether the paper was mined, error message.
+    """
+    record = ArxivRecord.from_json(record_json)
+    parse_cache = None
+    if parse_cache_path is not None:
+        parse_cache = get_parse_cache(parse_cache_path,max_bytes=parse_cache_size)
+    paper = ArxivPaper.from_arxiv_record(data_root_path,record,detex_path=detex_path,in_memory=in_memory,parse_cache=parse_cache)
+    try:
+        paper.mine_from_tarball(tarball_path)
+    except Exception as e:
+        return record_json,False,str(e)
+    return paper.to_arxiv_record().to_json(),True,None
+
+
+class MiningPipeline:
+    """MiningPipeline
+    Mines papers from the database with concurrent fetch, parse and index stages.
+
+    :param database: `ArxivDatabase`
+    :param data_root_path: directory where the tar files are downloaded.
+    :param detex_path: path to the detex binary
+    :param num_fetch_workers: threads downloading latex sources.
+    :param num_parse_workers: processes parsing latex. Defaults to the number of cores.
+    :param index_batch_size: papers written to the database together.
+    :param index_flush_interval: seconds after which a partial batch is written.
+    :param fetch_queue_size: claimed papers waiting to be downloaded.
+    :param requests_per_second: rate of requests to arxiv shared by all fetch workers.
+    :param mining_limit: papers to mine before stopping. None to mine until told to stop.
+    :param empty_wait_time: seconds to wait when there are no papers to mine.
+    :param write_behind: buffer the database writes so batches of papers share `_bulk` requests.
+    :param in_memory_latex: parse only the `.tex` files read from the tar files instead of extracting them to disk.
+    :param parse_cache_path: directory of the `ParseCache`. Defaults to `.parse_cache` under the `data_root_path`.
+    :param use_parse_cache: False to parse every paper without a `ParseCache`.
+    :param parse_cache_size: bytes after which the least recently used parsing results are evicted.
+    :param source_store_uri: `SourceStore` the fetch stage reads the sources from before asking arxiv. Downloaded sources are written to it.
+    """
+    def __init__(self,\
+                database:ArxivDatabase,\
+                data_root_path,\
+                detex_path,\
+                num_fetch_workers=4,\
+                num_parse_workers=None,\
+                index_batch_size=20,\
+                index_flush_interval=30,\
+                fetch_queue_size=20,\
+                requests_per_second=1,\
+                claim_batch_size=DEFAULT_CLAIM_BATCH_SIZE,\
+                lease_seconds=DEFAULT_LEASE_SECONDS,\
+                mining_limit=None,\
+                empty_wait_time=600,\
+                write_behind=True,\
+                in_memory_latex=False,\
+                parse_cache_path=None,\
+                parse_cache_size=DEFAULT_PARSE_CACHE_BYTES,\
+                source_store_uri=None,\
+                use_parse_cache=True):
+        self.db = database
+        if write_behind:
+            self.db.enable_write_behind(max_actions=10*index_batch_size,flush_interval=index_flush_interval)
+        self.data_root_path = data_root_path
+        self.detex_path = detex_path
+        self.in_memory_latex = in_memory_latex
+        if not use_parse_cache:
+            parse_cache_path = None
+        elif parse_cache_path is None:
+            parse_cache_path = default_parse_cache_path(data_root_path)
+        self.parse_cache_path = parse_cache_path
+        self.parse_cache_size = parse_cache_size
+        self.parse_cache = None
+        if parse_cache_path is not None:
+            self.parse_cache = ParseCache(parse_cache_path,max_bytes=parse_cache_size)
+        self.source_store = None
+        if source_store_uri is not None:
+            self.source_store = get_source_store(source_store_uri)
+        self.num_fetch_workers = num_fetch_workers
+        if num_parse_workers is None:
+            num_parse_workers = os.cpu_count()
+        self.num_parse_workers = num_parse_workers
+        self.index_batch_size = index_batch_size
+        self.index_flush_interval = index_flush_interval
+        self.mining_limit = mining_limit
+        self.empty_wait_time = empty_wait_time
+
+        self.worker_id = get_worker_id()+"-"+random_string(4)
+        self.work_queue = LeaseWorkQueue(database,\
+                                        worker_id=self.worker_id,\
+                                        claim_batch_size=claim_batch_size,\
+                                        lease_seconds=lease_seconds)
+        self.retry_policy = RetryPolicy(base_delay=5,rate_limiter=TokenBucket(requests_per_second))
+        self.metadata_cache = ArxivMetadataCache(retry_policy=self.retry_policy)
+        self.fetch_queue = queue.Queue(maxsize=fetch_queue_size)
+        self.index_queue = queue.Queue()
+        # Papers being parsed or waiting to be indexed. Released by the index stage.
+        self.parse_slots = BoundedSemaphore(2*num_parse_workers+index_batch_size)
+        self.parse_pool = None
+        self.exit = Event()
+        self.stats_lock = Lock()
+        self.stats = dict(claimed=0,cached=0,fetched=0,fetch_failed=0,parsed=0,parse_failed=0,indexed=0,released=0)
+        self.logger = create_logger(self.__class__.__name__+"__"+random_string())
+
+    def _count(self,stat_name,num=1):
+        with self.stats_lock:
+            self.stats[stat_name]+=num
+
+    def _limit_reached(self):
+        return self.mining_limit is not None and self.stats['claimed'] >= self.mining_limit
+
+    ############ Stages ############
+
+    def _claim_stage(self):
+        while not self.exit.is_set() and not self._limit_reached():
+            paper_record = self.work_queue.next()
+            if paper_record is None:
+                self.logger.info("No Record Found Sleeping For %d"%self.empty_wait_time)
+                self.exit.wait(self.empty_wait_time)
+                continue
+            self._count('claimed')
+            self.metadata_cache.prefetch_records([paper_record]+self.work_queue.pending())
+            self.fetch_queue.put(paper_record)
+        for _ in range(self.num_fetch_workers):
+            self.fetch_queue.put(STAGE_END)
+
+    def _fetch_stage(self):
+        while True:
+            paper_record = self.fetch_queue.get()
+            if paper_record is STAGE_END:
+                break
+            paper = ArxivPaper.from_arxiv_record(self.data_root_path,paper_record,detex_path=self.detex_path,parse_cache=self.parse_cache,source_store=self.source_store,metadata_cache=self.metadata_cache)
+            paper.retry_policy = self.retry_policy
+            try:
+                if paper.mine_from_cached_version():
+                    self._count('cached')
+                    self.parse_slots.acquire()
+                    self.index_queue.put((paper.to_arxiv_record(),True))
+                    continue
+                tarball_path = paper.download_latex()
+            except Exception as e:
+                self.logger.error('Failed Downloading Paper : %s\n\n%s'%(paper_record.identity.identity,str(e)))
+                self._count('fetch_failed')
+                self.parse_slots.acquire()
+                self.index_queue.put((paper_record,False))
+                continue
+            self._count('fetched')
+            self.parse_slots.acquire()
+            parse_future = self.parse_pool.submit(mine_tarball,\
+                                                self.data_root_path,\
+                                                self.detex_path,\
+                                                paper.to_arxiv_record().to_json(),\
+                                                tarball_path,\
+                                                in_memory=self.in_memory_latex,\
+                                                parse_cache_path=self.parse_cache_path,\
+                                                parse_cache_size=self.parse_cache_size)
+            parse_future.add_done_callback(functools.partial(self._on_parsed,paper_record))
+
+    def _on_parsed(self,paper_record:ArxivRecord,parse_future):
+        try:
+            record_json,paper_mined,error_message = parse_future.result()
+        except Exception as e: # The worker process died. The paper is indexed as not mined which releases its lease.
+            self.logger.error('Parse Worker Failed On Paper : %s\n\n%s'%(paper_record.identity.identity,str(e)))
+            self._count('parse_failed')
+            self.index_queue.put((paper_record,False))
+            return
+        if not paper_mined:
+            self.logger.error('Failed Mining Paper : %s\n\n%s'%(record_json['identity']['identity'],error_message))
+            self._count('parse_failed')
+        else:
+            self._count('parsed')
+        self.index_queue.put((ArxivRecord.from_json(record_json),paper_mined))
+
+    def _index_stage(self):
+        batch = []
+        last_flush = time.time()
+        while True:
+            try:
+                item = self.index_queue.get(timeout=self.index_flush_interval)
+            except queue.Empty:
+                item = None
+            else:
+                if item is STAGE_END:
+                    break
+                batch.append(item)
+            if len(batch) >= self.index_batch_size or \
+                    (len(batch) > 0 and time.time() - last_flush >= self.index_flush_interval):
+                self._index_batch(batch)
+                batch = []
+                last_flush = time.time()
+        if len(batch) > 0:
+            self._index_batch(batch)
+
+    def _index_batch(self,batch:List[tuple]):
+        """_index_batch
+        Writes a batch of `(ArxivRecord,mined)` to the database. Does the same writes as
+        `MiningEngine._paper_mining_logic` but with the parsed research, authors and ontology
+        of the whole batch in one request each.
+        """
+        try:
+            for paper_record,paper_mined in batch:
+                if paper_mined:
+                    self.db.save_record(paper_record)
+
+            parsed_research = [
+                ArxivSematicParsedResearch(\
+                    identity=paper_record.identity,\
+                    research_object=ResearchPaperFactory.from_arxiv_record(paper_record),\
+                    ontology=Ontology()
+                ) for paper_record,_ in batch
+            ]
+            if OntologyMiner.is_minable:
+                mined_ontologies = {
+                    research.identity.identity:ontology \
+                        for research,ontology in OntologyMiner.mine_lots_of_papers(parsed_research)
+                }
+                ontology_union = set()
+                for research in parsed_research:
+                    if research.identity.identity in mined_ontologies:
+                        research.ontology = mined_ontologies[research.identity.identity]
+                        ontology_union.update(research.ontology.union)
+                try:
+                    self.db.set_many_ontology(list(ontology_union))
+                except:
+                    self.logger.info("No Ontology Saved")
+
+            try:
+                self.db.set_many_authors([Author(name=author) for paper_record,_ in batch for author in paper_record.identity.authors])
+            except:
+                self.logger.info("No Author Saved")
+            self.db.set_many_parsed_research(parsed_research)
+
+            for paper_record,paper_mined in batch:
+                self.work_queue.finish(paper_record,paper_mined)
+            self._count('indexed',len(batch))
+            self.logger.info('Indexed %d Papers. Pipeline Stats : %s'%(len(batch),str(self.stats)))
+        except Exception as e:
+            self.logger.error('Failed Indexing Batch Of %d Papers : %s'%(len(batch),str(e)))
+            self._release_batch(batch)
+        finally:
+            for _ in batch:
+                self.parse_slots.release()
+
+    def _release_batch(self,batch:List[tuple]):
+        """_release_batch
+        Hands the papers of a batch which failed indexing back to the pool. When the database can't 
+        be reached either, the leases are no longer renewed so the reaper returns the papers once they expire.
+        """
+        for paper_record,_ in batch:
+            try:
+                self.work_queue.complete(paper_record.identity,False)
+            except Exception as e:
+                self.logger.error('Failed Releasing Paper : %s : %s'%(paper_record.identity.identity,str(e)))
+                self.work_queue.abandon(paper_record.identity)
+        self._count('released',len(batch))
+
+    ############ ############
+
+    def run(self):
+        """run
+        Runs all stages until `mining_limit` papers are claimed or `stop` is called, then drains the stages.
+        :return: dict of the number of papers which went through each stage.
+        """
+        heartbeat = LeaseHeartbeat(self.work_queue)
+        heartbeat.start()
+        # Workers are spawned rather than forked since other threads of this process may hold locks when they start.
+        self.parse_pool = ProcessPoolExecutor(max_workers=self.num_parse_workers,mp_context=multiprocessing.get_context('spawn'))
+        fetch_threads = [Thread(target=self._fetch_stage,daemon=True) for _ in range(self.num_fetch_workers)]
+        index_thread = Thread(target=self._index_stage,daemon=True)
+        for thread in fetch_threads:
+            thread.start()
+        index_thread.start()
+
+        self._claim_stage()
+
+        for thread in fetch_threads:
+            thread.join()
+        # Waits for the running parses and their callbacks
+        self.parse_pool.shutdown(wait=True)
+        self.index_queue.put(STAGE_END)
+        index_thread.join()
+
+        heartbeat.stop()
+        self.work_queue.release_all()
+        self.db.flush()
+        self.logger.info('Pipeline Finished : %s'%str(self.stats))
+        return self.stats
+
+    def stop(self):
+        self.exit.set()
+
+
+class PipelinedMiningProcess(Process):
+    """PipelinedMiningProcess
+    Runs a `MiningPipeline` in its own process. Takes the same arguments as `MiningPipeline`.
+    """
+    def __init__(self,database:ArxivDatabase,data_root_path,detex_path,**pipeline_kwargs):
+        Process.__init__(self,daemon=False)
+        self.database = database
+        self.data_root_path = data_root_path
+        self.detex_path = detex_path
+        self.pipeline_kwargs = pipeline_kwargs
+
+    def run(self):
+        pipeline = MiningPipeline(self.database,self.data_root_path,self.detex_path,**self.pipeline_kwargs)
+        def shutdown(signal_received, frame):
+            pipeline.logger.info('SIGINT or CTRL-C detected. Draining the pipeline')
+            pipeline.stop()
+        signal(SIGINT, shutdown)
+        pipeline.run()
@@ -3,6 +3,7 @@ import shutil
 import glob
 import arxiv
 import tarfile
+from urllib.request import urlopen
 from typing import List,Tuple
 import datetime
 from .exception import *
@@ -20,15 +21,33 @@ from .semantic_parsing import \
 
 from .latex_parser import \
     get_tex_tree,\
+    get_tex_tree_from_source,\
     split_match,\
     LatexInformationParser
 
+from .section_locator import SectionLocator
+from .parsing_pool import ParsingPool,get_parsing_pool
+from .root_document import RootDocument,RootDocumentResolver
+from .parse_cache import ParseCache,HashingReader,file_digest
+from .source_store import SourceStore,SOURCE_SUFFIX
+from .metadata_cache import ArxivMetadataCache
+from .corpus_store import get_corpus_store
+from .parse_budget import \
+    ParseBudget,\
+    STAGE_SECTION_EXTRACTION,\
+    STAGE_TEXT_EXTRACTION,\
+    STAGE_COLLATE_SECTIONS,\
+    QUARANTINED_ERROR_CLASSES,\
+    error_class
+
 from .record import \
     ArxivIdentity,\
     ArxivLatexParsingResult,\
     ArxivPaperProcessingMeta,\
     ArxivRecord
 
+from .rate_limiter import RetryPolicy
+
 class ArxivPaper(ArxivRecord):
     """ArxivPaper
     This object helps download the Paper from Arxiv,
@@ -44,15 +63,42 @@ class ArxivPaper(ArxivRecord):
     :param `paper_id` : id of the Arxiv Paper. Eg. : 1904.03367
     :param `root_papers_path` : Path to directory of papers. 
     :param `build_paper` : Default=True. Ensures that the paper is scraped and data is built. 
+    :param `retry_policy` : `RetryPolicy` for the calls to the Arxiv API. Defaults to one policy shared by all papers in the process.
+    :param `in_memory` : Default=False. Only reads the `.tex` files of the latex source into `tex_sources` instead of 
+                         extracting the whole tar file (figures and all) to `latex_root_path`. Unless the latex is stored 
+                         or there is a `source_store`, the source is streamed from arxiv and never touches the disk. 
+    :param `parse_cache` : `ParseCache` holding the parsing results of latex sources. A source which was parsed before 
+                           is not parsed again and the latest version of a paper which was parsed before is not even downloaded. 
+    :param `metadata_cache` : `ArxivMetadataCache` the Arxiv API responses are read from when the identity is fetched. 
+    :param `source_store` : `SourceStore` holding harvested latex sources. Sources are read from it before asking arxiv 
+                            and the ones downloaded from arxiv are written to it. 
+    :param `parsing_pool` : `ParsingPool` the tex files of the paper are parsed on in parallel, each under the timeout of the pool. 
+                            None parses them one after the other in this process. 
+    When `root_papers_path` is a `CorpusStore`, `to_fs` and `from_fs` save and load the paper from its shards 
+    instead of a directory per paper. 
     :raises ArxivFSLoadingError: Error when loading class from FS
     """
+    retry_policy = RetryPolicy(max_retries=4,base_delay=3)
+    source_url_prefix = 'https://arxiv.org/src/'
 
-    def __init__(self,paper_id,root_papers_path,build_paper=True,detex_path=None):
+    def __init__(self,paper_id,root_papers_path,build_paper=True,detex_path=None,retry_policy=None,in_memory=False,parse_cache:ParseCache=None,source_store:SourceStore=None,metadata_cache:ArxivMetadataCache=None,parsing_pool:ParsingPool=None):
         super().__init__()
+        if retry_policy is not None:
+            self.retry_policy = retry_policy
         self.paper_root_path = os.path.join(root_papers_path,paper_id)
         self.latex_root_path = os.path.join(self.paper_root_path,'latex')
         self.detex_path = detex_path
         self.paper_id = paper_id
+        self.in_memory = in_memory
+        self.tex_sources = {} # path the file would be extracted to -> contents. Used when `in_memory`
+        self.parse_cache = parse_cache
+        self.arxiv_response = None # Response of the Arxiv API for the paper. Set by `fetch_identity`
+        self.metadata_cache = metadata_cache
+        self.source_store = source_store
+        self.parsing_pool = parsing_pool
+        self._in_source_store = None
+        self.source_from_store = False # Whether the latex source was read from the `source_store` rather than arxiv.
+        self.corpus_store = get_corpus_store(root_papers_path)
         if build_paper: # Builds and Saves to FS. 
             self._build_paper()
         # scan for the presence of the object in the FS.
@@ -68,9 +114,54 @@ class ArxivPaper(ArxivRecord):
 
     @property
     def tex_files(self):
+        if self.in_memory:
+            return list(self.tex_sources.keys())
         file_names = list(glob.glob(os.path.join(self.latex_root_path,"**/*.tex"),recursive=True))
         return file_names
 
+    @property
+    def tarball_path(self):
+        return os.path.join(self.paper_root_path,self.paper_id.replace('/','_')+SOURCE_SUFFIX)
+
+    @property
+    def source_url(self):
+        """source_url 
+        URL of the latex source tar file. Needs only the id. The version of an `identity` fetched with `fetch_identity` 
+        is pinned so that the source matches it, otherwise it is the latest version.
+        """
+        source_id = self.paper_id
+        if self.arxiv_response is not None and self.identity.version is not None:
+            source_id = '%sv%d'%(source_id,self.identity.version)
+        return self.source_url_prefix+source_id
+
+    @property
+    def in_source_store(self):
+        if self.source_store is None:
+            return False
+        if self._in_source_store is None:
+            self._in_source_store = self.source_store.contains(self.paper_id)
+        return self._in_source_store
+
+    def tex_file_size(self,tex_file):
+        if self.in_memory:
+            return len(self.tex_sources[tex_file])
+        return os.path.getsize(tex_file)
+
+    def read_tex_file(self,tex_file) -> bytes:
+        if self.in_memory:
+            return self.tex_sources[tex_file]
+        with open(tex_file,'rb') as f:
+            return f.read()
+
+    @property
+    def source_alias(self):
+        """source_alias 
+        `ParseCache` alias of the latex source of the version of the paper in `identity`. None when the version isn't known.
+        """
+        if self.identity is None or self.identity.version is None:
+            return None
+        return '%sv%s'%(self.identity.identity,self.identity.version)
+
     @property
     def tex_processing_file_path(self):
         return os.path.join(self.paper_root_path,self.latex_parsing_result_file_name)
@@ -169,19 +260,106 @@ class ArxivPaper(ArxivRecord):
         return format_str
 
     def _buid_from_fs(self,meta_only = False):
+        if self.corpus_store is not None:
+            self._load_from_corpus_store(meta_only=meta_only)
+            return
         self._load_metadata_from_fs()
         if not meta_only:
             self._load_parsed_document_from_fs()
 
+    def _load_from_corpus_store(self,meta_only=False):
+        record_json = self.corpus_store.get(self.paper_id)
+        if record_json is None:
+            raise ArxivFSLoadingError(os.path.join(self.corpus_store.root_path,self.paper_id))
+        record = ArxivRecord.from_json(record_json)
+        self.identity = record.identity
+        self.paper_processing_meta = record.paper_processing_meta
+        self.latex_parsing_result = record.latex_parsing_result
+        if not meta_only:
+            self.latex_parsed_document = record.latex_parsed_document
+
     ############ Core Methods for Data Processing Methods for Latex ############
 
-    def _extract_info_from_latex(self):
+    def _to_parse_cache_entry(self):
+        return dict(
+            paper_processing_meta = self.paper_processing_meta.to_json(),
+            latex_parsing_result = self.latex_parsing_result.to_json(),
+            latex_parsed_document = None if self.latex_parsed_document is None else self.latex_parsed_document.to_json(),
+        )
+
+    @staticmethod
+    def _usable_parse_cache_entry(entry):
+        # Caches written before budget and timeout failures were skipped may still hold them.
+        return entry is not None and entry['latex_parsing_result'].get('error_class') not in QUARANTINED_ERROR_CLASSES
+
+    def _load_parse_cache_entry(self,entry):
+        self.paper_processing_meta = ArxivPaperProcessingMeta(**entry['paper_processing_meta'])
+        self.paper_processing_meta.updated_on = datetime.datetime.now()
+        self.latex_parsing_result = ArxivLatexParsingResult(**entry['latex_parsing_result'])
+        self.latex_parsed_document = None
+        if entry['latex_parsed_document'] is not None:
+            self.latex_parsed_document = ArxivDocument.from_json(entry['latex_parsed_document'])
+            # The same source may be shared by many papers. 
+            for meta_key,meta_value in self.identity_meta.items():
+                setattr(self.latex_parsed_document,meta_key,meta_value)
+            self.latex_parsing_result.section_list = self.latex_parsed_document.subsections
+
+    def mine_from_cached_version(self):
+        """mine_from_cached_version 
+        Sets the `identity` of the paper from the Arxiv API and loads the parsing results of its latest 
+        version from the `parse_cache`. Arxiv never changes a version once it is published so the source needs no download. 
+        Sources held in the `source_store` are hashed and looked up by `mine_from_tarball` instead without asking arxiv. 
+        :return: True when the results were in the cache. 
+        """
+        if self.parse_cache is None or self.in_source_store:
+            return False
+        try:
+            self.fetch_identity()
+        except Exception as e:
+            raise ArxivAPIException(self.paper_id,str(e))
+        if self.source_alias is None:
+            return False
+        entry = self.parse_cache.get_by_alias(self.source_alias)
+        if not self._usable_parse_cache_entry(entry):
+            return False
+        self._load_parse_cache_entry(entry)
+        return True
+
+    def _mine_from_parse_cache(self,source_digest):
+        """_mine_from_parse_cache 
+        Loads the parsing results of the latex source with the SHA-256 `source_digest` from the `parse_cache`.
+        :return: True when the source was parsed before. 
+        """
+        if self.parse_cache is None or source_digest is None:
+            return False
+        entry = self.parse_cache.get(source_digest)
+        if not self._usable_parse_cache_entry(entry):
+            return False
+        self._load_parse_cache_entry(entry)
+        if self.source_alias is not None:
+            self.parse_cache.put_alias(self.source_alias,source_digest)
+        return True
+
+    def _extract_info_from_latex(self,source_digest=None):
+        """_extract_info_from_latex 
+        :param source_digest: SHA-256 of the latex source tar file. The results are saved to the `parse_cache` under it.
+        """
+        self._parse_latex()
+        # Budgets and timeouts depend on the load of the box and on the budgets themselves. They aren't cached so a later parse can succeed.
+        if self.latex_parsing_result.error_class in QUARANTINED_ERROR_CLASSES:
+            return
+        if self.parse_cache is not None and source_digest is not None:
+            self.parse_cache.put(source_digest,self._to_parse_cache_entry())
+            if self.source_alias is not None:
+                self.parse_cache.put_alias(self.source_alias,source_digest)
+
+    def _parse_latex(self):
         # $ Set some Common Meta WRT the Paper. 
         self.paper_processing_meta = ArxivPaperProcessingMeta()
         self.paper_processing_meta.latex_files = len(self.tex_files)
         self.paper_processing_meta.pdf_only = True if len(self.tex_files) == 0 else False
 
-        latex_processor = ArxivLatexParser(detex_path=self.detex_path)
+        latex_processor = ArxivLatexParser(detex_path=self.detex_path,parsing_pool=self.parsing_pool)
         paper_procesesing_results,arxiv_parsed_doc = latex_processor(self) # Latex_processor on paper.
         self.paper_processing_meta.mined = True if not paper_procesesing_results.parsing_error and not self.paper_processing_meta.pdf_only else False
         
@@ -205,19 +383,134 @@ class ArxivPaper(ArxivRecord):
             Currently using Remote API. 
             Moving forward can directly be using `ArxivIdentity`. 
         """
-        try:
-            # $ Set the Arxiv Object to ensure Proper extraction
-            identity,paper = self.extract_meta_from_remote(self.paper_id)
-            self.identity = identity
+        if self.mine_from_cached_version():
+            pass
+        elif self.in_memory and not store_latex and self.source_store is None:
+            source_digest = self.stream_latex()
+            if not self._mine_from_parse_cache(source_digest):
+                self._extract_info_from_latex(source_digest=source_digest)
+            self.tex_sources = {}
+        else:
+            downloaded_data = self.download_latex()
+            self.mine_from_tarball(downloaded_data,store_latex=store_latex)
+        if save_data:
+            self.to_fs()
 
+    ############ Public Facing Core Methods for Data Processing Methods for Latex ############
+    def download_latex(self):
+        """download_latex 
+        Downloads latex from arxiv as a tar file in the `self.paper_root_path`. 
+        Ideally called seperately from the `mine_paper` method or from the ArxivPaper(build_paper=True)
+
+        It will just download the latex tar source. The `identity` is set from the Arxiv API first (through the `metadata_cache` 
+        when there is one) so that it holds the version the scrapers leave unknown.
+        Sources held in the `source_store` are read from it without asking arxiv. Sources downloaded from arxiv are written to the `source_store`. 
+        :raises ArxivAPIException: Arxiv showed the finger. 
+        :return: [str] path of the downloaded tar file 
+        """
+        if self.arxiv_response is None:
+            try:
+                self.fetch_identity()
+            except Exception as e:
+                raise ArxivAPIException(self.paper_id,str(e))
+        if self.in_source_store:
+            tarball_path = self.source_store.fetch(self.paper_id,self.tarball_path)
+            if tarball_path is not None:
+                self.source_from_store = True
+                return tarball_path
+        try:
             if not dir_exists(self.paper_root_path):
                 os.makedirs(self.paper_root_path)
             # $ Download the paper. 
-            downloaded_data = arxiv.download(paper,dirpath=self.paper_root_path,slugify=lambda paper: paper.get('id').split('/')[-1],prefer_source_tarfile=True)
+            downloaded_data = self.tarball_path
+            if os.path.exists(downloaded_data):
+                # May be a hard link to a `source_store` file written by older versions. Writing it in place would truncate the store's copy.
+                os.remove(downloaded_data)
+            response = self.retry_policy.call(urlopen,self.source_url)
+            with response,open(downloaded_data,'wb') as f:
+                shutil.copyfileobj(response,f)
+            if self.source_store is not None:
+                self.source_store.put(self.paper_id,downloaded_data)
+            return downloaded_data
+        except Exception as e:
+            raise ArxivAPIException(self.paper_id,str(e))
+
+    def stream_latex(self):
+        """stream_latex 
+        Streams the latex source tar file from arxiv and keeps only its `.tex` files in `tex_sources`. 
+        Nothing is written to disk. The `identity` is set from the Arxiv API first like `download_latex`.
+        :raises ArxivAPIException: Arxiv showed the finger. 
+        :return: [str] SHA-256 of the tar file 
+        """
+        try:
+            if self.arxiv_response is None:
+                self.fetch_identity()
+            response = self.retry_policy.call(urlopen,self.source_url)
+            with response:
+                source = HashingReader(response)
+                with tarfile.open(fileobj=source,mode='r|*') as tar:
+                    self._load_tex_sources(tar)
+                source.drain()
+            return source.hexdigest()
         except Exception as e:
             raise ArxivAPIException(self.paper_id,str(e))
+
+    def fetch_identity(self):
+        """fetch_identity 
+        Sets the `identity` of the paper from the Arxiv API or the `metadata_cache`. 
+        :return: dict : the API response. Kept in `arxiv_response`.
+        """
+        if self.metadata_cache is not None:
+            self.identity,self.arxiv_response = self.metadata_cache.get(self.paper_id)
+        else:
+            self.identity,self.arxiv_response = self.extract_meta_from_remote(self.paper_id,retry_policy=self.retry_policy)
+        return self.arxiv_response
+
+    def _load_tex_sources(self,tar:tarfile.TarFile):
+        """_load_tex_sources 
+        Reads the `.tex` members of `tar` into `tex_sources`. Works on tar files opened in stream mode 
+        since the members are read in order. 
+        """
+        self.tex_sources = {}
+        for member in tar:
+            if not member.isfile() or not member.name.endswith('.tex'):
+                continue
+            tex_file = os.path.join(self.latex_root_path,os.path.normpath(member.name))
+            self.tex_sources[tex_file] = tar.extractfile(member).read()
+        
+    def mine_paper(self,store_latex=False):
+        """mine_paper 
+        This is an Exposed Method which will help mine LateX For the Paper
+        It will `NOT STORE TO FS`
+        """
+        self._build_paper(save_data=False,store_latex=store_latex)
+
+    def mine_from_tarball(self,tarball_path,store_latex=False):
+        """mine_from_tarball 
+        Extracts the latex source tar file downloaded with `download_latex` and parses it. 
+        Needs no network so it can run apart from the download. 
+        It will `NOT STORE TO FS`
+        :param tarball_path: path of the tar file. 
+        :param store_latex: keep the tar file once it is parsed. 
+        """
+        source_digest = None
+        if self.parse_cache is not None:
+            source_digest = file_digest(tarball_path)
+            if self._mine_from_parse_cache(source_digest):
+                # $ Parsed before. Nothing to extract. 
+                if not store_latex:
+                    os.remove(tarball_path)
+                return
+        if self.in_memory:
+            with tarfile.open(tarball_path) as tar:
+                self._load_tex_sources(tar)
+            if not store_latex:
+                os.remove(tarball_path)
+            self._extract_info_from_latex(source_digest=source_digest)
+            self.tex_sources = {}
+            return
         # $ Extract Files in Folder.
-        with tarfile.open(downloaded_data) as tar:
+        with tarfile.open(tarball_path) as tar:
             def is_within_directory(directory, target):
                 
                 abs_directory = os.path.abspath(directory)
@@ -241,44 +534,11 @@ class ArxivPaper(ArxivRecord):
 
         # $ Remove the Tar File.
         if not store_latex:
-            os.remove(downloaded_data)
+            os.remove(tarball_path)
         # $ Save the Metadata
-        self._extract_info_from_latex()
+        self._extract_info_from_latex(source_digest=source_digest)
 
         shutil.rmtree(self.latex_root_path) # remove Latex source data.
-        # print("Extracted Latex Data")
-        if save_data:
-            self.to_fs()
-
-    ############ Public Facing Core Methods for Data Processing Methods for Latex ############
-    def download_latex(self):
-        """download_latex 
-        Downloads latex from arxiv as a tar file in the `self.paper_root_path`. 
-        Ideally called seperately from the `mine_paper` method or from the ArxivPaper(build_paper=True)
-
-        It will just download the latex tar source. 
-        :raises ArxivAPIException: Arxiv showed the finger. 
-        :return: [str] path of the downloaded tar file 
-        """
-        try:
-            # $ Set the Arxiv Object to ensure Proper extraction
-            identity,paper = self.extract_meta_from_remote(self.paper_id)
-            self.identity = identity
-
-            if not dir_exists(self.paper_root_path):
-                os.makedirs(self.paper_root_path)
-            # $ Download the paper. 
-            downloaded_data = arxiv.download(paper,dirpath=self.paper_root_path,slugify=lambda paper: paper.get('id').split('/')[-1],prefer_source_tarfile=True)
-            return downloaded_data
-        except Exception as e:
-            raise ArxivAPIException(self.paper_id,str(e))
-        
-    def mine_paper(self,store_latex=False):
-        """mine_paper 
-        This is an Exposed Method which will help mine LateX For the Paper
-        It will `NOT STORE TO FS`
-        """
-        self._build_paper(save_data=False,store_latex=store_latex)
 
     
     ############  ############ ############ ############ ############ ############ ############
@@ -287,29 +547,36 @@ class ArxivPaper(ArxivRecord):
     @classmethod
     def from_fs(cls,paper_id,root_papers_path,detex_path=None):
         paper = cls(paper_id,root_papers_path,build_paper=False,detex_path=detex_path)
-        if not dir_exists(paper.paper_root_path):
+        if paper.corpus_store is None and not dir_exists(paper.paper_root_path):
             raise ArxivFSLoadingError(paper.paper_root_path)
         paper._buid_from_fs()
         return paper
     
     def to_fs(self):
+        if self.corpus_store is not None:
+            self.corpus_store.put(self.paper_id,self.to_arxiv_record().to_json())
+            try:
+                os.rmdir(self.paper_root_path) # Left empty by mining. Leaves stored latex alone.
+            except OSError:
+                pass
+            return
         self._save_metadata_to_fs()
         self._save_parsed_document_to_fs()
     
     @classmethod
-    def from_arxiv_id(cls,axid,root_papers_path,detex_path=None):
-        axobj = cls(axid,root_papers_path,build_paper=True,detex_path=detex_path)
+    def from_arxiv_id(cls,axid,root_papers_path,detex_path=None,in_memory=False,parse_cache:ParseCache=None,source_store:SourceStore=None):
+        axobj = cls(axid,root_papers_path,build_paper=True,detex_path=detex_path,in_memory=in_memory,parse_cache=parse_cache,source_store=source_store)
         return axobj
 
     ############ ############ ######################## ############ ############
     ############ Portability Methods To Make `ArxivPaper` a Processing Object that can reside anywhere.  ############
     @classmethod
-    def from_arxiv_record(cls,root_papers_path,record:ArxivRecord,detex_path=None):
+    def from_arxiv_record(cls,root_papers_path,record:ArxivRecord,detex_path=None,in_memory=False,parse_cache:ParseCache=None,source_store:SourceStore=None,metadata_cache:ArxivMetadataCache=None,parsing_pool:ParsingPool=None):
         """from_arxiv_record 
         classmethod that creates an `ArxivPaper` object from its Parent Record class. 
         This method
         """
-        paper = cls(record.identity.identity,root_papers_path,build_paper=False,detex_path=detex_path)
+        paper = cls(record.identity.identity,root_papers_path,build_paper=False,detex_path=detex_path,in_memory=in_memory,parse_cache=parse_cache,source_store=source_store,metadata_cache=metadata_cache,parsing_pool=parsing_pool)
         paper.identity = record.identity
         paper.latex_parsed_document = record.latex_parsed_document
         paper.paper_processing_meta = record.paper_processing_meta
@@ -335,23 +602,31 @@ class ArxivPaper(ArxivRecord):
     ############  ############ ############ ######################## ############ ############
     
     @staticmethod
-    def extract_meta_from_remote(paper_id):
+    def extract_meta_from_remote(paper_id,retry_policy:RetryPolicy=None):
         """_extract_meta_from_remote 
         Make API call to Remote for Extraction of `ArxivIdentity` for paper_id
+        :param retry_policy: `RetryPolicy` for the call. Defaults to `ArxivPaper.retry_policy`
         :return `ArxivIdentity`,dict : dict hold arxiv API response. 
         """
+        if retry_policy is None:
+            retry_policy = ArxivPaper.retry_policy
         # $ Query Paper
-        paper = arxiv.query(id_list=[paper_id])[0]
+        paper = retry_policy.call(arxiv.query,id_list=[paper_id])[0]
         # $ Set the Arxiv Object to ensure Proper extraction
         return ArxivIdentity.from_arxiv_response(paper),paper
 
 
 class SingleDocumentLatexParser(LatexInformationParser):
-    def __init__(self, max_section_limit=20,detex_path=None):
-        super().__init__(max_section_limit=max_section_limit,detex_path=detex_path)
+    def __init__(self, max_section_limit=20,detex_path=None,section_extractor=None,parse_budget:ParseBudget=None):
+        super().__init__(max_section_limit=max_section_limit,detex_path=detex_path,section_extractor=section_extractor,parse_budget=parse_budget)
     
     def section_extraction(self,tex_file_path) -> List[Section]:
-        tex_node = get_tex_tree(tex_file_path)
+        return self._sections_from_tex_tree(get_tex_tree(tex_file_path,section_extractor=self.section_extractor))
+
+    def section_extraction_from_source(self,tex_source:bytes) -> List[Section]:
+        return self._sections_from_tex_tree(get_tex_tree_from_source(tex_source,section_extractor=self.section_extractor))
+
+    def _sections_from_tex_tree(self,tex_node) -> List[Section]:
         if len(tex_node.branches) > self.max_section_limit:
             raise MaxSectionSizeException(len(tex_node.branches),self.max_section_limit)
         
@@ -367,6 +642,32 @@ class SingleDocumentLatexParser(LatexInformationParser):
     def text_extraction(self,latex_path):
         return self.text_extractor(latex_path)
 
+    def extract_sections_and_text(self,latex_path,tex_source:bytes=None):
+        """extract_sections_and_text 
+        Runs `section_extraction` and `text_extraction` on a tex file. 
+        When `tex_source` is given the file is parsed from its contents instead of from `latex_path`. 
+        """
+        with self.parse_budget.stage(STAGE_SECTION_EXTRACTION):
+            if tex_source is not None:
+                sections = self.section_extraction_from_source(tex_source)
+            else:
+                sections = self.section_extraction(latex_path)
+        with self.parse_budget.stage(STAGE_TEXT_EXTRACTION):
+            if tex_source is not None:
+                tex_in_text = self.text_extractor.from_source(tex_source)
+            else:
+                tex_in_text = self.text_extraction(latex_path)
+        return sections,tex_in_text
+
+    def parse_tex_file(self,latex_path,tex_source:bytes=None,split_upto=0.2,split_bins=10):
+        """parse_tex_file 
+        Extracts the sections of one tex file and fills them with its text. 
+        :return: Tuple(List[Section],bool) : sections and weather some section was not found.
+        """
+        sections,tex_in_text = self.extract_sections_and_text(latex_path,tex_source=tex_source)
+        with self.parse_budget.stage(STAGE_COLLATE_SECTIONS):
+            return self.collate_sections(tex_in_text,sections,split_upto=split_upto,split_bins=split_bins)
+
             
     @staticmethod
     def split_and_find_section(curr_text,curr_sec_name,prev_section,split_upto=0.2,split_bins=10):
@@ -400,6 +701,20 @@ class SingleDocumentLatexParser(LatexInformationParser):
         return curr_text,True
 
     
+    @staticmethod
+    def locate_section(section_locator:SectionLocator,curr_sec_name,prev_section):
+        """locate_section 
+        `split_and_find_section` over a `SectionLocator`. Splits the remaining text at `curr_sec_name`
+        and allocates the text before it to the `prev_section` object. 
+        :returns Find_status : weather the section was found.
+        """
+        portion_before_section = section_locator.locate(curr_sec_name)
+        if portion_before_section is None:
+            return False
+        if prev_section is not None:
+            prev_section.text = portion_before_section
+        return True
+    
     def collate_sections(self,paper_text,section_list:List[Section],split_upto=0.2,split_bins=10):
         """collate_sections 
         Gets Latex compiled text string and 
@@ -407,30 +722,32 @@ class SingleDocumentLatexParser(LatexInformationParser):
         to fill Text content of the `Section` objects which were discovered in 
         `section_extraction`
 
+        The sections are located with one `SectionLocator` over the whole text. This gives the 
+        same results as calling `split_and_find_section` for every section and subsection. 
+
         :param paper_text: text in string of from text_extraction]
         :type section_list: List[Section]
         :return: List[Section] : filled with text attributed
         """
-        current_text_split = []
         prev_section = None
-        curr_text = str(paper_text)
-        unfound_sections = []
+        section_names = []
+        for s in section_list:
+            section_names.append(s.name)
+            section_names.extend(ss.name for ss in s.subsections)
+        section_locator = SectionLocator(str(paper_text),section_names,split_upto=split_upto,split_bins=split_bins)
         some_section_not_found = False
         for index,s in enumerate(section_list):
-            curr_text,section_status = self.split_and_find_section(curr_text,s.name,prev_section,split_upto=split_upto,split_bins=split_bins)
+            section_status = self.locate_section(section_locator,s.name,prev_section)
             if not section_status: # If couldn't match section add it here. 
                 some_section_not_found = True
-            # print('\n\t'+s.name)                
             prev_section = s 
             for ss in s.subsections:
-                curr_text,section_status = self.split_and_find_section(curr_text,ss.name,prev_section,split_upto=split_upto,split_bins=split_bins)
+                section_status = self.locate_section(section_locator,ss.name,prev_section)
                 if not section_status:
                     some_section_not_found = True
-                    # print("Cannot Match For :",ss.name)
                 prev_section = ss
-                # print('\n\t\t'+ss.name)
             if index == len(section_list)-1:
-                s.text = curr_text
+                s.text = section_locator.remainder()
         return section_list,some_section_not_found
     
     def from_arxiv_paper(self,paper:ArxivPaper,lowest_section_match_percent=0.2,number_to_tries=10):
@@ -449,18 +766,26 @@ class SingleDocumentLatexParser(LatexInformationParser):
         max_size = 0
         file_results = {}
         for file_path in paper.tex_files:
-            if os.path.getsize(file_path) > max_size:
+            file_size = paper.tex_file_size(file_path)
+            if largest_file is None or file_size > max_size:
                 largest_file = file_path
+                max_size = file_size
         latex_path = largest_file
-        sections = self.section_extraction(latex_path)
-        tex_in_text = self.text_extraction(latex_path)
-        sections,some_section_not_found = self.collate_sections(tex_in_text,sections,split_upto=lowest_section_match_percent,split_bins=number_to_tries)
+        sections,some_section_not_found = self.parse_tex_file(latex_path,\
+                                                            tex_source=paper.tex_sources.get(latex_path),\
+                                                            split_upto=lowest_section_match_percent,\
+                                                            split_bins=number_to_tries)
         file_results[latex_path] = some_section_not_found
         return sections,some_section_not_found,file_results
 
 class MultiDocumentLatexParser(SingleDocumentLatexParser):
-    def __init__(self, max_section_limit=20, detex_path=None):
-        super().__init__(max_section_limit=max_section_limit, detex_path=detex_path)
+    """MultiDocumentLatexParser 
+    Parses every tex file of the paper. With a `parsing_pool` the files are parsed in parallel 
+    on the pool and a file running over the timeout of the pool is marked as failed. 
+    """
+    def __init__(self, max_section_limit=20, detex_path=None, parsing_pool:ParsingPool=None, section_extractor=None, parse_budget:ParseBudget=None):
+        super().__init__(max_section_limit=max_section_limit, detex_path=detex_path, section_extractor=section_extractor, parse_budget=parse_budget)
+        self.parsing_pool = parsing_pool
     
 
     def from_arxiv_paper(self,paper:ArxivPaper,lowest_section_match_percent=0.2,number_to_tries=10):
@@ -478,11 +803,28 @@ class MultiDocumentLatexParser(SingleDocumentLatexParser):
         collected_sections = []
         snf = False
         file_results = {}
-        for latex_path in paper.tex_files:
+        if self.parsing_pool is not None:
+            parse_futures = [
+                (latex_path,self.parsing_pool.submit(parse_tex_file,\
+                                                    self.max_section_limit,\
+                                                    self.text_extractor.detex_path,\
+                                                    self.section_extractor,\
+                                                    latex_path,\
+                                                    paper.tex_sources.get(latex_path),\
+                                                    lowest_section_match_percent,\
+                                                    number_to_tries,\
+                                                    parse_budget=self.parse_budget)) \
+                    for latex_path in paper.tex_files
+            ]
+        for index,latex_path in enumerate(paper.tex_files):
             try:
-                sections = self.section_extraction(latex_path)
-                tex_in_text = self.text_extraction(latex_path)
-                sections,some_section_not_found = self.collate_sections(tex_in_text,sections,split_upto=lowest_section_match_percent,split_bins=number_to_tries)
+                if self.parsing_pool is not None:
+                    sections,some_section_not_found = self.parsing_pool.result(parse_futures[index][1])
+                else:
+                    sections,some_section_not_found = self.parse_tex_file(latex_path,\
+                                                                        tex_source=paper.tex_sources.get(latex_path),\
+                                                                        split_upto=lowest_section_match_percent,\
+                                                                        split_bins=number_to_tries)
                 file_results[latex_path] = True
                 if some_section_not_found:
                     snf = some_section_not_found
@@ -491,19 +833,61 @@ class MultiDocumentLatexParser(SingleDocumentLatexParser):
                 file_results[latex_path] = False
         return collected_sections,snf,file_results
 
+class RootDocumentLatexParser(SingleDocumentLatexParser):
+    """RootDocumentLatexParser 
+    Parses only the root document of the paper (the file with the `\\documentclass`) with the files it 
+    `\\input`s, `\\include`s or `\\subfile`s inlined. Refer `RootDocumentResolver`. 
+    """
+    def resolve(self,paper:ArxivPaper) -> RootDocument:
+        """resolve 
+        :return: the flattened `RootDocument` of the paper or None if none of its tex files is a root document. 
+        """
+        tex_sources = {tex_file:paper.read_tex_file(tex_file) for tex_file in paper.tex_files}
+        return RootDocumentResolver(tex_sources).resolve()
+
+    def from_root_document(self,root_document:RootDocument,lowest_section_match_percent=0.2,number_to_tries=10):
+        """from_root_document 
+        :return: Tuple (
+            found_sections:List[Section],
+            some_section_not_found:bool,
+            latex_files_status_dict:dict
+        ) 
+        """
+        sections,some_section_not_found = self.parse_tex_file(root_document.root_path,\
+                                                            tex_source=root_document.source,\
+                                                            split_upto=lowest_section_match_percent,\
+                                                            split_bins=number_to_tries)
+        file_results = {root_document.root_path:some_section_not_found}
+        return sections,some_section_not_found,file_results
+
+    def from_arxiv_paper(self,paper:ArxivPaper,lowest_section_match_percent=0.2,number_to_tries=10):
+        root_document = self.resolve(paper)
+        if root_document is None:
+            raise LatexParserException("No Root Document With a \\documentclass Found")
+        return self.from_root_document(root_document,lowest_section_match_percent=lowest_section_match_percent,number_to_tries=number_to_tries)
+
+
 class ArxivLatexParser():
     """
     Parses Arxiv Latex Documents with `LatexInformationParser` according 
-        - Based on Number of latex Pages (Chooses `SingleDocumentLatexParser` | `MultiDocumentLatexParser`)
+        - Parses only the root document with its includes when one is found (`RootDocumentLatexParser`). Turned off with `resolve_root_document=False`
+        - Otherwise Based on Number of latex Pages (Chooses `SingleDocumentLatexParser` | `MultiDocumentLatexParser`)
             - Parsing is Ment to create Tree Like `Section` Datastructures.  
     
     :return: Tuple(`ArxivLatexParsingResult`,`ArxivDocument`)
     """
     parsing_result_name = 'Symantic Parsing Result'
 
-    def __init__(self,max_section_limit=20, detex_path=None):
-        self.single_doc_parser = SingleDocumentLatexParser(max_section_limit=max_section_limit, detex_path=detex_path)
-        self.multi_doc_parser = MultiDocumentLatexParser(max_section_limit=max_section_limit, detex_path=detex_path)
+    def __init__(self,max_section_limit=20, detex_path=None, parsing_pool:ParsingPool=None, section_extractor=None, resolve_root_document=True, parse_budget:ParseBudget=None):
+        self.max_section_limit = max_section_limit
+        self.resolve_root_document = resolve_root_document
+        self.root_doc_parser = RootDocumentLatexParser(max_section_limit=max_section_limit, detex_path=detex_path, section_extractor=section_extractor, parse_budget=parse_budget)
+        self.detex_path = detex_path
+        self.parsing_pool = parsing_pool
+        self.single_doc_parser = SingleDocumentLatexParser(max_section_limit=max_section_limit, detex_path=detex_path, section_extractor=section_extractor, parse_budget=parse_budget)
+        self.multi_doc_parser = MultiDocumentLatexParser(max_section_limit=max_section_limit, detex_path=detex_path, parsing_pool=parsing_pool, section_extractor=section_extractor, parse_budget=parse_budget)
+        self.section_extractor = self.single_doc_parser.section_extractor
+        self.parse_budget = self.single_doc_parser.parse_budget
     
     def __call__(self,paper:ArxivPaper,lowest_section_match_percent=0.2,number_to_tries=10):
         parsing_result = ArxivLatexParsingResult()
@@ -513,8 +897,17 @@ class ArxivLatexParser():
             parsing_result.parsing_error = True
             return parsing_result,None
         
+        root_document = None
+        if self.resolve_root_document:
+            try:
+                root_document = self.root_doc_parser.resolve(paper)
+            except Exception:
+                root_document = None
+
         # Selected Parser for Latex based On Size.            
-        if paper.paper_processing_meta.latex_files >=4:
+        if root_document is not None:
+            selected_parser = self.root_doc_parser
+        elif paper.paper_processing_meta.latex_files >=4:
             selected_parser = self.multi_doc_parser
             # parsing_result.latex_parsing_method = 
         elif paper.paper_processing_meta.latex_files >=1:
@@ -523,18 +916,55 @@ class ArxivLatexParser():
         parsing_result.latex_parsing_method = selected_parser.__class__.__name__
         # Run the parser and see the results. 
         try:
-            collected_sections,some_sections_failed,file_results = selected_parser.from_arxiv_paper(paper,lowest_section_match_percent=lowest_section_match_percent,number_to_tries=number_to_tries)
+            if root_document is not None:
+                collected_sections,some_sections_failed,file_results = self.root_doc_parser.from_root_document(root_document,lowest_section_match_percent=lowest_section_match_percent,number_to_tries=number_to_tries)
+            else:
+                collected_sections,some_sections_failed,file_results = selected_parser.from_arxiv_paper(paper,lowest_section_match_percent=lowest_section_match_percent,number_to_tries=number_to_tries)
             parsing_result.section_list = collected_sections
             parsing_result.some_section_failed = some_sections_failed
             parsing_result.file_results = [{'name':k,'status':file_results[k]} for k in file_results]
         except Exception as e:
             parsing_result.error_message = str(e)
+            parsing_result.error_class = error_class(e)
             parsing_result.parsing_error = True
         
         arxiv_parsed_doc = self._build_document_from_paper(paper,parsing_result)
         
         return parsing_result,arxiv_parsed_doc
 
+    def parse_many(self,papers:List[ArxivPaper],lowest_section_match_percent=0.2,number_to_tries=10):
+        """parse_many 
+        Parses many papers in parallel on the `parsing_pool` (the shared pool of the process if none was given). 
+        The papers need their latex extracted or held `in_memory` and their `paper_processing_meta` set like `__call__`. 
+        :return: List[Tuple(`ArxivLatexParsingResult`,`ArxivDocument`)] in the order of `papers`. 
+                 Papers which failed or ran over the timeout of the pool get a result with `parsing_error`. 
+        """
+        parsing_pool = self.parsing_pool
+        if parsing_pool is None:
+            parsing_pool = get_parsing_pool()
+        parse_futures = [
+            parsing_pool.submit(parse_paper_latex,\
+                                self.max_section_limit,\
+                                self.detex_path,\
+                                self.section_extractor,\
+                                self.resolve_root_document,\
+                                os.path.dirname(paper.paper_root_path),\
+                                paper.to_arxiv_record().to_json(),\
+                                paper.in_memory,\
+                                paper.tex_sources,\
+                                lowest_section_match_percent,\
+                                number_to_tries,\
+                                parse_budget=self.parse_budget) \
+                for paper in papers
+        ]
+        results = []
+        for parse_future in parse_futures:
+            try:
+                results.append(parsing_pool.result(parse_future))
+            except Exception as e:
+                results.append((ArxivLatexParsingResult(parsing_error=True,error_message=str(e),error_class=error_class(e)),None))
+        return results
+
     def _build_document_from_paper(self,paper:ArxivPaper,result:ArxivLatexParsingResult):
         if result.section_list is None : 
             return None
@@ -544,6 +974,28 @@ class ArxivLatexParser():
         return sectionised_data
 
 
+def parse_tex_file(max_section_limit,detex_path,section_extractor,latex_path,tex_source,split_upto,split_bins,parse_budget:ParseBudget=None):
+    """parse_tex_file 
+    `SingleDocumentLatexParser.parse_tex_file` as a job of the `ParsingPool`. 
+    """
+    parser = SingleDocumentLatexParser(max_section_limit=max_section_limit,detex_path=detex_path,section_extractor=section_extractor,parse_budget=parse_budget)
+    return parser.parse_tex_file(latex_path,tex_source=tex_source,split_upto=split_upto,split_bins=split_bins)
+
+
+def parse_paper_latex(max_section_limit,detex_path,section_extractor,resolve_root_document,root_papers_path,record_json,in_memory,tex_sources,lowest_section_match_percent,number_to_tries,parse_budget:ParseBudget=None):
+    """parse_paper_latex 
+    `ArxivLatexParser.__call__` on one paper as a job of the `ParsingPool`. 
+    """
+    paper = ArxivPaper.from_arxiv_record(root_papers_path,ArxivRecord.from_json(record_json),detex_path=detex_path,in_memory=in_memory)
+    paper.tex_sources = tex_sources
+    latex_processor = ArxivLatexParser(max_section_limit=max_section_limit,\
+                                        detex_path=detex_path,\
+                                        section_extractor=section_extractor,\
+                                        resolve_root_document=resolve_root_document,\
+                                        parse_budget=parse_budget)
+    return latex_processor(paper,lowest_section_match_percent=lowest_section_match_percent,number_to_tries=number_to_tries)
+
+
 class ResearchPaperFactory:
     """ 
     Given Raw Unstructured `Section`ised documents, 
@@ -0,0 +1,178 @@
+"""
+Columnar export of the parsed research.
+
+`ParquetExporter` writes `ArxivSematicParsedResearch` records into Parquet files partitioned
+by the month the paper was published (`published_month=YYYY-MM/part-<run>-<n>.parquet`), so
+analytics jobs read the columns they need (eg. `title` and `abstract`) instead of whole JSON documents :
+    - identity columns : `id`,`url`,`title`,`abstract`,`categories`,`published`,`updated`,`authors`,`journal_reference`,`version`
+    - one `large_string` column with the text of every semantic section and its subsections (`introduction`,`methodology`...)
+    - `unknown_sections` : list of the name and text of the sections which matched none.
+    - `parsing_stats` : struct of the `ResearchPaper.parsing_results`.
+    - `ontology_syntactic`,`ontology_semantic`,`ontology_union`,`ontology_enhanced` : list columns and `ontology_mined`.
+
+Records are buffered per partition and written as a row group every `batch_size` records. At
+most `max_buffered_rows` records are held in memory. Needs `pyarrow`.
+"""
+import os
+import time
+from typing import Iterable
+from .record import ArxivSematicParsedResearch
+from .utils import parse_timestamp
+from .logger import create_logger
+try:
+    import pyarrow
+    import pyarrow.parquet as parquet
+except ImportError:
+    pyarrow = None
+
+DEFAULT_EXPORT_BATCH_SIZE = 1000
+DEFAULT_MAX_BUFFERED_ROWS = 20000
+PARTITION_COLUMN = 'published_month'
+UNKNOWN_PARTITION = 'unknown'
+SEMANTIC_SECTIONS = ['introduction','related_works','methodology','experiments','results','dataset','conclusion','limitations']
+ONTOLOGY_LISTS = ['syntactic','semantic','union','enhanced']
+
+
+def research_schema():
+    string_list = pyarrow.list_(pyarrow.string())
+    fields = [
+        ('id',pyarrow.string()),
+        ('url',pyarrow.string()),
+        ('title',pyarrow.string()),
+        ('abstract',pyarrow.large_string()),
+        ('categories',string_list),
+        ('published',pyarrow.string()),
+        ('updated',pyarrow.string()),
+        ('authors',string_list),
+        ('journal_reference',pyarrow.string()),
+        ('version',pyarrow.int32()),
+    ]
+    fields.extend((section_name,pyarrow.large_string()) for section_name in SEMANTIC_SECTIONS)
+    fields.append(('unknown_sections',pyarrow.list_(pyarrow.struct([('name',pyarrow.string()),('text',pyarrow.large_string())]))))
+    fields.append(('parsing_stats',pyarrow.struct([
+        ('active',pyarrow.bool_()),
+        ('section_matches',string_list),
+        ('num_un_matched',pyarrow.int64()),
+    ])))
+    fields.extend(('ontology_'+ontology_list,string_list) for ontology_list in ONTOLOGY_LISTS)
+    fields.append(('ontology_mined',pyarrow.bool_()))
+    return pyarrow.schema(fields)
+
+
+def published_month(published):
+    try:
+        return parse_timestamp(published).strftime('%Y-%m')
+    except (AttributeError,ValueError,TypeError):
+        return UNKNOWN_PARTITION
+
+
+def section_text(section_json):
+    """section_text
+    Text of a section JSON followed by the text of its subsections.
+    """
+    texts = [section_json['text']] if len(section_json['text']) > 0 else []
+    for subsection_json in section_json['subsections']:
+        subsection_text = section_text(subsection_json)
+        if len(subsection_text) > 0:
+            texts.append(subsection_text)
+    return '\n'.join(texts)
+
+
+def research_row(research:ArxivSematicParsedResearch):
+    """research_row
+    Columns of a record. Read from its JSON so that the `research_object` isn't built.
+    :return: (partition,dict)
+    """
+    research_json = research.to_json()
+    identity = research_json['identity']
+    research_object = research_json['research_object']
+    row = dict(
+        id=identity['identity'],
+        url=identity['url'],
+        title=identity['title'],
+        abstract=identity['abstract'],
+        categories=identity['categories'],
+        published=identity['published'],
+        updated=identity['updated'],
+        authors=identity['authors'],
+        journal_reference=identity['journal_reference'],
+        version=identity['version'],
+    )
+    for section_name in SEMANTIC_SECTIONS:
+        row[section_name] = section_text(research_object[section_name])
+    row['unknown_sections'] = [dict(name=section_json['name'],text=section_text(section_json)) \
+                                for section_json in research_object['unknown_sections']]
+    row['parsing_stats'] = research_json['parsing_stats']
+    for ontology_list in ONTOLOGY_LISTS:
+        row['ontology_'+ontology_list] = research_json['ontology'][ontology_list]
+    row['ontology_mined'] = research_json['ontology']['mined']
+    return published_month(identity['published']),row
+
+
+class ParquetExporter:
+    """ParquetExporter
+    :param output_path: directory of the partitions.
+    :param batch_size: records per row group.
+    :param max_buffered_rows: records held in memory across all partitions. The fullest partitions are written out past it.
+    :param compression: parquet compression codec.
+    """
+    def __init__(self,output_path,batch_size=DEFAULT_EXPORT_BATCH_SIZE,max_buffered_rows=DEFAULT_MAX_BUFFERED_ROWS,compression='zstd'):
+        if pyarrow is None:
+            raise ImportError("ParquetExporter Needs pyarrow")
+        self.output_path = output_path
+        self.batch_size = batch_size
+        self.max_buffered_rows = max(max_buffered_rows,batch_size)
+        self.compression = compression
+        self.schema = research_schema()
+        self.run_id = str(int(time.time()))
+        self.buffers = {} # partition -> rows
+        self.num_buffered = 0
+        self.writers = {} # partition -> `ParquetWriter`
+        self.num_exported = 0
+        self.logger = create_logger(self.__class__.__name__)
+
+    def _writer(self,partition):
+        if partition not in self.writers:
+            partition_path = os.path.join(self.output_path,'%s=%s'%(PARTITION_COLUMN,partition))
+            os.makedirs(partition_path,exist_ok=True)
+            file_path = os.path.join(partition_path,'part-%s-%d.parquet'%(self.run_id,os.getpid()))
+            self.writers[partition] = parquet.ParquetWriter(file_path,self.schema,compression=self.compression)
+        return self.writers[partition]
+
+    def _flush_partition(self,partition):
+        rows = self.buffers.pop(partition,[])
+        if len(rows) == 0:
+            return
+        self._writer(partition).write_table(pyarrow.Table.from_pylist(rows,schema=self.schema))
+        self.num_buffered-=len(rows)
+        self.num_exported+=len(rows)
+
+    def add(self,research:ArxivSematicParsedResearch):
+        partition,row = research_row(research)
+        self.buffers.setdefault(partition,[]).append(row)
+        self.num_buffered+=1
+        if len(self.buffers[partition]) >= self.batch_size:
+            self._flush_partition(partition)
+        while self.num_buffered > self.max_buffered_rows:
+            self._flush_partition(max(self.buffers,key=lambda partition:len(self.buffers[partition])))
+
+    def export(self,research_stream:Iterable[ArxivSematicParsedResearch],print_every=10000):
+        """export
+        Writes every record of `research_stream` (eg. `ArxivElasticSeachDatabaseClient.parsed_research_stream()`) and closes the files.
+        :return: number of records exported.
+        """
+        num_added = 0
+        for research in research_stream:
+            self.add(research)
+            num_added+=1
+            if num_added % print_every == 0:
+                self.logger.info("Exported %d Records"%num_added)
+        self.close()
+        return self.num_exported
+
+    def close(self):
+        for partition in list(self.buffers):
+            self._flush_partition(partition)
+        for writer in self.writers.values():
+            writer.close()
+        self.writers = {}
@@ -0,0 +1,126 @@
+"""
+Budgets of the latex parsing stages.
+
+A single pathological tex file can keep `section_extraction` (`tex2py`), `text_extraction` (`detex`)
+or `collate_sections` busy for minutes or make them eat all the memory of the box. `ParseBudget`
+bounds every stage with :
+    - a wall clock budget, enforced with `SIGALRM`. Works only on the main thread of a process,
+      which is where the miners and the workers of the `ParsingPool` parse.
+    - an optional memory budget, enforced by lowering the `RLIMIT_AS` of the process for the duration
+      of the stage. An allocation over it raises `MemoryError` in the stage.
+
+A stage going over a budget raises `ParseBudgetExceededException`. `error_class` sorts the errors of
+the parsers so that the papers which went over a budget can be quarantined instead of retried.
+"""
+import time
+import signal
+import threading
+from contextlib import contextmanager
+from .exception import ParseBudgetExceededException,ParseTimeoutException,DetexTimeoutException
+from .config import Config
+try:
+    import resource
+except ImportError: # Not on windows
+    resource = None
+
+STAGE_SECTION_EXTRACTION = 'section_extraction'
+STAGE_TEXT_EXTRACTION = 'text_extraction'
+STAGE_COLLATE_SECTIONS = 'collate_sections'
+PARSE_STAGES = [STAGE_SECTION_EXTRACTION,STAGE_TEXT_EXTRACTION,STAGE_COLLATE_SECTIONS]
+DEFAULT_STAGE_SECONDS = {
+    STAGE_SECTION_EXTRACTION:120,
+    STAGE_TEXT_EXTRACTION:120,
+    STAGE_COLLATE_SECTIONS:60,
+}
+
+# `ArxivLatexParsingResult.error_class`
+ERROR_CLASS_PARSE_ERROR = 'parse_error'
+ERROR_CLASS_BUDGET_EXCEEDED = 'budget_exceeded'
+ERROR_CLASS_TIMEOUT = 'timeout'
+# These depend on the load of the box so the papers are retried and only quarantined when they keep failing. Refer `LeaseWorkQueue.finish`
+QUARANTINED_ERROR_CLASSES = [ERROR_CLASS_BUDGET_EXCEEDED,ERROR_CLASS_TIMEOUT]
+
+
+def error_class(exception:Exception):
+    if isinstance(exception,ParseBudgetExceededException):
+        return ERROR_CLASS_BUDGET_EXCEEDED
+    if isinstance(exception,(ParseTimeoutException,DetexTimeoutException)):
+        return ERROR_CLASS_TIMEOUT
+    return ERROR_CLASS_PARSE_ERROR
+
+
+def address_space_bytes():
+    with open('/proc/self/statm','r') as f:
+        return int(f.read().split()[0])*resource.getpagesize()
+
+
+class ParseBudget:
+    """ParseBudget
+    :param stage_seconds: dict : stage -> seconds it may run. Stages missing from it aren't timed. 
+                          Defaults to `Config.parse_stage_seconds` (all stages) or `DEFAULT_STAGE_SECONDS`
+    :param memory_bytes: memory a stage may allocate on top of what the process holds when it starts. 
+                         Defaults to `Config.parse_memory_mb`. None for no limit.
+    """
+    def __init__(self,stage_seconds=None,memory_bytes=None):
+        if stage_seconds is None and Config.parse_stage_seconds is not None:
+            stage_seconds = {stage:float(Config.parse_stage_seconds) for stage in PARSE_STAGES}
+        elif stage_seconds is None:
+            stage_seconds = DEFAULT_STAGE_SECONDS
+        if memory_bytes is None and Config.parse_memory_mb is not None:
+            memory_bytes = int(float(Config.parse_memory_mb)*1024**2)
+        self.stage_seconds = stage_seconds
+        self.memory_bytes = memory_bytes
+
+    @contextmanager
+    def stage(self,stage_name):
+        """stage
+        Runs the body of the `with` block under the budgets of `stage_name`.
+        :raises ParseBudgetExceededException:
+        """
+        with self._time_budget(stage_name),self._memory_budget(stage_name):
+            yield
+
+    @contextmanager
+    def _time_budget(self,stage_name):
+        seconds = self.stage_seconds.get(stage_name)
+        if seconds is None or threading.current_thread() is not threading.main_thread():
+            yield
+            return
+        # The job timer of the `ParsingPool` uses the same alarm. It is put back once the stage is over.
+        previous_handler = signal.getsignal(signal.SIGALRM)
+        outer_remaining,_ = signal.getitimer(signal.ITIMER_REAL)
+        outer_first = 0 < outer_remaining <= seconds
+        outer_fired = []
+        def on_alarm(signal_received,frame):
+            if outer_first and callable(previous_handler):
+                outer_fired.append(True)
+                previous_handler(signal_received,frame)
+            raise ParseBudgetExceededException(stage_name,'seconds',seconds)
+        start = time.monotonic()
+        signal.signal(signal.SIGALRM,on_alarm)
+        signal.setitimer(signal.ITIMER_REAL,outer_remaining if outer_first else seconds)
+        try:
+            yield
+        finally:
+            signal.setitimer(signal.ITIMER_REAL,0)
+            signal.signal(signal.SIGALRM,previous_handler)
+            if outer_remaining > 0 and len(outer_fired) == 0:
+                signal.setitimer(signal.ITIMER_REAL,max(outer_remaining-(time.monotonic()-start),0.001))
+
+    @contextmanager
+    def _memory_budget(self,stage_name):
+        if self.memory_bytes is None or resource is None:
+            yield
+            return
+        previous_limit = resource.getrlimit(resource.RLIMIT_AS)
+        stage_limit = address_space_bytes()+self.memory_bytes
+        if previous_limit[0] != resource.RLIM_INFINITY:
+            stage_limit = min(stage_limit,previous_limit[0])
+        resource.setrlimit(resource.RLIMIT_AS,(stage_limit,previous_limit[1]))
+        try:
+            yield
+        except MemoryError:
+            resource.setrlimit(resource.RLIMIT_AS,previous_limit)
+            raise ParseBudgetExceededException(stage_name,'memory',self.memory_bytes)
+        finally:
+            resource.setrlimit(resource.RLIMIT_AS,previous_limit)
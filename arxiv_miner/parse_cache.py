@@ -0,0 +1,226 @@
+"""
+Content addressed cache of parsed papers.
+
+Re-mining a paper (after `remine_data.py` or a parser upgrade) downloads and parses its
+latex source again even when the source hasn't changed. `ParseCache` keeps the parsing
+results of every source tar file under the SHA-256 of the tar file so that an unchanged
+source is never parsed twice :
+    - `entries/<ab>/<sha256>.json.gz` : gzipped JSON of the parsed document, the parsing result and the processing metadata.
+    - `aliases/<paper_id>v<version>` : SHA-256 of the source of a version of a paper. ArXiv versions never
+      change so a paper whose latest version has an alias is served without downloading anything.
+
+Everything lives under a directory named after `PARSER_VERSION` and the section extractor so
+that parser changes invalidate the cache. Entries are evicted least recently used first once
+the entries take more than `max_bytes`. The miners keep the cache in `.parse_cache` under their
+`data_root_path` unless they are given another directory (Refer `default_parse_cache_path`).
+"""
+import os
+import gzip
+import shutil
+import hashlib
+import tempfile
+from threading import Lock
+from .latex_parser import PARSER_VERSION
+from .config import Config
+from .logger import create_logger
+from . import serialization
+
+DEFAULT_PARSE_CACHE_BYTES = 2*1024**3
+# Eviction frees space down to this fraction of `max_bytes` so that it doesn't run on every `put`
+EVICTION_LOW_WATERMARK = 0.9
+ENTRY_SUFFIX = '.json.gz'
+DEFAULT_PARSE_CACHE_DIR_NAME = '.parse_cache'
+
+
+def default_parse_cache_path(data_root_path):
+    return os.path.join(data_root_path,DEFAULT_PARSE_CACHE_DIR_NAME)
+
+
+class HashingReader:
+    """HashingReader
+    File like object computing the SHA-256 of everything read from `fileobj`. Lets a
+    source be hashed while it is streamed into `tarfile`.
+    """
+    def __init__(self,fileobj):
+        self.fileobj = fileobj
+        self.sha256 = hashlib.sha256()
+
+    def read(self,size=-1):
+        data = self.fileobj.read(size)
+        self.sha256.update(data)
+        return data
+
+    def drain(self,chunk_size=1<<16):
+        """drain
+        Reads the rest of the stream. `tarfile` stops at the end of archive marker which may not be the end of the file.
+        """
+        while len(self.read(chunk_size)) > 0:
+            pass
+
+    def hexdigest(self):
+        return self.sha256.hexdigest()
+
+
+def file_digest(file_path,chunk_size=1<<20):
+    sha256 = hashlib.sha256()
+    with open(file_path,'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size),b''):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+class ParseCache:
+    """ParseCache
+    :param cache_dir: directory holding the cache. Usually inside the `data_root_path` of the miner.
+    :param max_bytes: size of the entries after which the least recently used ones are evicted.
+    :param parser_version: namespace of the entries. Defaults to `PARSER_VERSION` with `Config.section_extractor`.
+    """
+    def __init__(self,cache_dir,max_bytes=DEFAULT_PARSE_CACHE_BYTES,parser_version=None):
+        if parser_version is None:
+            parser_version = '%s-%s'%(PARSER_VERSION,Config.section_extractor)
+        self.cache_dir = cache_dir
+        self.parser_version = parser_version
+        self.version_dir = os.path.join(cache_dir,'v'+parser_version)
+        self.entries_dir = os.path.join(self.version_dir,'entries')
+        self.aliases_dir = os.path.join(self.version_dir,'aliases')
+        os.makedirs(self.entries_dir,exist_ok=True)
+        os.makedirs(self.aliases_dir,exist_ok=True)
+        self.max_bytes = max_bytes
+        self.lock = Lock()
+        self.total_bytes = None # Computed on the first `put`. Other processes sharing the directory make it an estimate.
+        self.num_hits = 0
+        self.num_misses = 0
+        self.num_evicted = 0
+        self.logger = create_logger(self.__class__.__name__)
+
+    def _entry_path(self,digest):
+        return os.path.join(self.entries_dir,digest[:2],digest+ENTRY_SUFFIX)
+
+    def _alias_path(self,alias):
+        return os.path.join(self.aliases_dir,alias.replace('/','_'))
+
+    @staticmethod
+    def _write_atomic(file_path,data:bytes):
+        file_dir = os.path.dirname(file_path)
+        os.makedirs(file_dir,exist_ok=True)
+        file_handle,tmp_path = tempfile.mkstemp(dir=file_dir,suffix='.tmp')
+        with os.fdopen(file_handle,'wb') as f:
+            f.write(data)
+        os.replace(tmp_path,file_path)
+
+    def get(self,digest):
+        """get
+        :return: the entry of the source with the SHA-256 `digest` or None.
+        """
+        entry_path = self._entry_path(digest)
+        try:
+            with gzip.open(entry_path,'rb') as f:
+                entry = serialization.loads(f.read())
+            os.utime(entry_path) # Recently used
+        except FileNotFoundError:
+            entry = None
+        except (OSError,EOFError)+serialization.DECODE_ERRORS:
+            self.logger.error("Removing Corrupt Parse Cache Entry %s"%entry_path)
+            self._remove(entry_path)
+            entry = None
+        with self.lock:
+            if entry is None:
+                self.num_misses+=1
+            else:
+                self.num_hits+=1
+        return entry
+
+    def put(self,digest,entry:dict):
+        entry_path = self._entry_path(digest)
+        data = gzip.compress(serialization.dumps(entry))
+        self._write_atomic(entry_path,data)
+        with self.lock:
+            if self.total_bytes is None:
+                self.total_bytes = self._entries_size()
+            else:
+                self.total_bytes+=len(data)
+            if self.total_bytes > self.max_bytes:
+                self._evict()
+
+    def get_alias(self,alias):
+        try:
+            with open(self._alias_path(alias),'r') as f:
+                return f.read().strip()
+        except FileNotFoundError:
+            return None
+
+    def put_alias(self,alias,digest):
+        self._write_atomic(self._alias_path(alias),digest.encode('utf-8'))
+
+    def get_by_alias(self,alias):
+        digest = self.get_alias(alias)
+        if digest is None:
+            return None
+        return self.get(digest)
+
+    def _iter_entries(self):
+        for entry_dir in os.scandir(self.entries_dir):
+            if not entry_dir.is_dir():
+                continue
+            for entry_file in os.scandir(entry_dir.path):
+                if entry_file.name.endswith(ENTRY_SUFFIX):
+                    yield entry_file
+
+    def _entries_size(self):
+        return sum(entry_file.stat().st_size for entry_file in self._iter_entries())
+
+    @staticmethod
+    def _remove(file_path):
+        try:
+            os.remove(file_path)
+        except FileNotFoundError:
+            pass
+
+    def _evict(self):
+        """_evict
+        Removes the least recently used entries until they take less than `EVICTION_LOW_WATERMARK` of `max_bytes`.
+        Aliases of evicted entries are left behind and become misses.
+        """
+        entries = []
+        for entry_file in self._iter_entries():
+            entry_stat = entry_file.stat()
+            entries.append((entry_stat.st_mtime,entry_stat.st_size,entry_file.path))
+        entries.sort()
+        total_bytes = sum(entry[1] for entry in entries)
+        for _,entry_size,entry_path in entries:
+            if total_bytes <= EVICTION_LOW_WATERMARK*self.max_bytes:
+                break
+            self._remove(entry_path)
+            total_bytes-=entry_size
+            self.num_evicted+=1
+        self.total_bytes = total_bytes
+
+    def clear_stale_versions(self):
+        """clear_stale_versions
+        Deletes the entries of every other parser version.
+        """
+        for version_dir in os.scandir(self.cache_dir):
+            if version_dir.is_dir() and version_dir.path != self.version_dir:
+                shutil.rmtree(version_dir.path,ignore_errors=True)
+
+    def stats(self):
+        with self.lock:
+            return dict(
+                hits=self.num_hits,
+                misses=self.num_misses,
+                evicted=self.num_evicted,
+                total_bytes=self.total_bytes
+            )
+
+
+parse_caches = {}
+parse_caches_lock = Lock()
+
+def get_parse_cache(cache_dir,max_bytes=DEFAULT_PARSE_CACHE_BYTES):
+    """get_parse_cache
+    The `ParseCache` of `cache_dir` shared within the process.
+    """
+    with parse_caches_lock:
+        if cache_dir not in parse_caches:
+            parse_caches[cache_dir] = ParseCache(cache_dir,max_bytes=max_bytes)
+        return parse_caches[cache_dir]
@@ -0,0 +1,98 @@
+"""
+Process pool for parsing latex.
+
+Parsing latex is CPU bound (`tex2py`, `detex` and `collate_sections`) and the tex files of a
+paper, like the papers themselves, are independent of each other. `ParsingPool` runs such
+parsing jobs on a pool of processes which is shared by all the parsers of a process (refer `get_parsing_pool`).
+
+Every job gets a timeout which is enforced inside the worker with `SIGALRM` so that a
+pathological file is abandoned and the worker is free for the next job. If a job is stuck
+in C code where the alarm can't interrupt it, the caller stops waiting for it after `timeout_grace` more seconds.
+"""
+import os
+import signal
+import multiprocessing
+from threading import Lock
+from concurrent.futures import ProcessPoolExecutor,TimeoutError as FutureTimeoutError
+from .exception import ParseTimeoutException
+
+DEFAULT_PARSE_TIMEOUT = 300
+DEFAULT_TIMEOUT_GRACE = 30
+
+
+def run_with_timeout(timeout,func,*args,**kwargs):
+    """run_with_timeout
+    Runs `func(*args,**kwargs)` in a worker of the pool. Raises `ParseTimeoutException` once it runs over `timeout` seconds.
+    """
+    def on_alarm(signal_received,frame):
+        raise ParseTimeoutException(timeout)
+    previous_handler = signal.signal(signal.SIGALRM,on_alarm)
+    signal.setitimer(signal.ITIMER_REAL,timeout)
+    try:
+        return func(*args,**kwargs)
+    finally:
+        signal.setitimer(signal.ITIMER_REAL,0)
+        signal.signal(signal.SIGALRM,previous_handler)
+
+
+class ParsingPool:
+    """ParsingPool
+    Process pool running parsing jobs with a timeout.
+        - `submit` : starts a job and returns its `Future`.
+        - `result` : waits for a job. Raises `ParseTimeoutException` when it ran out of time.
+        - `map` : runs many jobs and returns their results in order. Failed jobs give their exception.
+
+    Workers are spawned rather than forked since the parent may have other threads holding locks.
+
+    :param max_workers: processes in the pool. Defaults to the number of cores.
+    :param timeout: seconds a job may run.
+    :param timeout_grace: extra seconds the caller waits for a job whose worker didn't honour the timeout.
+    """
+    def __init__(self,max_workers=None,timeout=DEFAULT_PARSE_TIMEOUT,timeout_grace=DEFAULT_TIMEOUT_GRACE):
+        if max_workers is None:
+            max_workers = os.cpu_count()
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.timeout_grace = timeout_grace
+        self.executor = ProcessPoolExecutor(max_workers=max_workers,mp_context=multiprocessing.get_context('spawn'))
+
+    def submit(self,func,*args,**kwargs):
+        return self.executor.submit(run_with_timeout,self.timeout,func,*args,**kwargs)
+
+    def result(self,future):
+        try:
+            return future.result(timeout=self.timeout+self.timeout_grace)
+        except FutureTimeoutError:
+            future.cancel()
+            raise ParseTimeoutException(self.timeout)
+
+    def map(self,func,arguments):
+        """map
+        :param arguments: List[tuple] : positional arguments of each call to `func`
+        :return: list with the result or the raised exception of each call in the order of `arguments`
+        """
+        futures = [self.submit(func,*args) for args in arguments]
+        results = []
+        for future in futures:
+            try:
+                results.append(self.result(future))
+            except Exception as e:
+                results.append(e)
+        return results
+
+    def shutdown(self,wait=True):
+        self.executor.shutdown(wait=wait)
+
+
+parsing_pools = {}
+parsing_pools_lock = Lock()
+
+def get_parsing_pool(max_workers=None,timeout=DEFAULT_PARSE_TIMEOUT):
+    """get_parsing_pool
+    The `ParsingPool` shared within the process. Created with `max_workers` and `timeout` on first use.
+    """
+    with parsing_pools_lock:
+        pool_key = os.getpid() # A forked child can't use the pool of its parent.
+        if pool_key not in parsing_pools:
+            parsing_pools[pool_key] = ParsingPool(max_workers=max_workers,timeout=timeout)
+        return parsing_pools[pool_key]
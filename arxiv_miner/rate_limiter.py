@@ -0,0 +1,208 @@
+"""
+Rate limiting and retries for the requests made to ArXiv.
+
+One `TokenBucket` can be shared between all the threads that hit the same API so
+that together they stay under the request rate ArXiv allows. When ArXiv
+answers with a `Retry-After`, `defer` holds back every thread sharing the bucket.
+
+`RetryPolicy` wraps a call with exponential backoff and jitter. It waits exactly as long
+as the server asks for when a `Retry-After` is present and gives up once its retry budget is spent.
+"""
+import re
+import time
+import random
+import socket
+import email.utils
+from threading import Condition,Lock
+from urllib.error import HTTPError,URLError
+from .logger import create_logger
+from .exception import RetryBudgetExhaustedException
+
+RETRY_STATUS_CODES = (429,500,502,503,504)
+# arxiv.query raises a plain Exception with the status in the message.
+ARXIV_HTTP_ERROR_PATTERN = re.compile(r'HTTP Error (\d+)')
+
+logger = create_logger('RetryPolicy')
+
+
+class TokenBucket:
+    """TokenBucket
+    Thread safe token bucket.
+    :param rate: tokens added per second. i.e. the sustained number of requests per second.
+    :param capacity: maximum number of tokens the bucket holds. i.e. the allowed burst. Defaults to 1
+    """
+    def __init__(self,rate,capacity=1):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self.last_refill = time.monotonic()
+        self.deferred_until = 0.0
+        self.condition = Condition()
+        # Seconds callers spent blocked in `acquire`
+        self.throttled_seconds = 0.0
+
+    def _refill(self,now):
+        # `last_refill` sits in the future while a `defer` is in effect
+        if now > self.last_refill:
+            self.tokens = min(self.capacity,self.tokens + (now - self.last_refill)*self.rate)
+            self.last_refill = now
+
+    def acquire(self,tokens=1):
+        """acquire
+        Blocks until `tokens` are available and no `defer` is in effect.
+        :return: [float] seconds spent waiting
+        """
+        start = time.monotonic()
+        with self.condition:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if now < self.deferred_until:
+                    wait_time = self.deferred_until - now
+                elif self.tokens >= tokens:
+                    self.tokens -= tokens
+                    break
+                else:
+                    wait_time = (tokens - self.tokens)/self.rate
+                self.condition.wait(wait_time)
+            waited = time.monotonic() - start
+            self.throttled_seconds += waited
+        return waited
+
+    def defer(self,seconds):
+        """defer
+        Hold back all callers of `acquire` for `seconds`. Used when the server asks for a `Retry-After`
+        """
+        with self.condition:
+            now = time.monotonic()
+            self.deferred_until = max(self.deferred_until,now + seconds)
+            # The tokens gathered so far shouldn't turn into a burst once the deferral ends.
+            self.tokens = 0.0
+            self.last_refill = max(now,self.deferred_until)
+            self.condition.notify_all()
+
+
+class RetryPolicy:
+    """RetryPolicy
+    Retries calls which fail with transient HTTP/network errors.
+        - 429/5xx responses and connection errors are retried. Other errors are raised right away. 
+        - The wait before a retry is the `Retry-After` of the response if it has one. Otherwise it is 
+          `base_delay*2**attempt` capped at `max_delay` with up to `jitter`% taken off randomly.
+        - When a `rate_limiter` is given the wait is applied through `TokenBucket.defer` so that 
+          everyone sharing the limiter backs off. Every attempt also takes a token from it.
+        - A call gives up with `RetryBudgetExhaustedException` after `max_retries` retries or once 
+          its waits would go over `retry_budget` seconds.
+    
+    The policy keeps count of retries and of the seconds spent waiting so it can be shared to 
+    measure the time lost to throttling.
+
+    :param max_retries: retries per call
+    :param base_delay: wait in seconds before the first retry when the server gives no `Retry-After`
+    :param max_delay: cap on a single wait 
+    :param jitter: fraction of the backoff which is randomly taken off. 
+    :param retry_budget: total seconds one call may spend waiting. None for no limit
+    :param rate_limiter: [TokenBucket]
+    """
+    def __init__(self,\
+                max_retries=5,\
+                base_delay=1,\
+                max_delay=300,\
+                jitter=0.5,\
+                retry_budget=None,\
+                rate_limiter:TokenBucket=None,\
+                retry_status_codes=RETRY_STATUS_CODES):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.retry_budget = retry_budget
+        self.rate_limiter = rate_limiter
+        self.retry_status_codes = retry_status_codes
+        self.stats_lock = Lock()
+        self.num_retries = 0
+        self.num_gave_up = 0
+        self.throttled_seconds = 0.0
+
+    def backoff(self,attempt):
+        delay = min(self.max_delay,self.base_delay*(2**attempt))
+        return delay*(1-self.jitter*random.random())
+
+    @staticmethod
+    def retry_after(error):
+        """retry_after
+        Seconds asked for by the `Retry-After` header of an `HTTPError`. None if absent.
+        """
+        headers = getattr(error,'headers',None)
+        if headers is None:
+            return None
+        value = headers.get('retry-after')
+        if value is None:
+            return None
+        value = value.strip()
+        if value.isdigit():
+            return int(value)
+        try: # HTTP date form
+            retry_at = email.utils.parsedate_to_datetime(value)
+            return max(0,retry_at.timestamp() - time.time())
+        except (TypeError,ValueError):
+            return None
+
+    def _retry_delay(self,error,attempt):
+        """_retry_delay
+        :return: seconds to wait before retrying or None if `error` should not be retried.
+        """
+        if isinstance(error,HTTPError):
+            if error.code not in self.retry_status_codes:
+                return None
+            retry_after = self.retry_after(error)
+            if retry_after is not None:
+                return retry_after
+            return self.backoff(attempt)
+        if isinstance(error,(URLError,socket.timeout,ConnectionError)):
+            return self.backoff(attempt)
+        status_match = ARXIV_HTTP_ERROR_PATTERN.search(str(error))
+        if status_match is not None and int(status_match.group(1)) in self.retry_status_codes:
+            return self.backoff(attempt)
+        return None
+
+    def wait(self,delay):
+        if self.rate_limiter is not None:
+            self.rate_limiter.defer(delay)
+        else:
+            time.sleep(delay)
+        with self.stats_lock:
+            self.num_retries+=1
+            self.throttled_seconds+=delay
+
+    def call(self,func,*args,**kwargs):
+        """call
+        Call `func(*args,**kwargs)` and retry it according to the policy.
+        """
+        attempt = 0
+        waited = 0.0
+        while True:
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            try:
+                return func(*args,**kwargs)
+            except Exception as error:
+                delay = self._retry_delay(error,attempt)
+                if delay is None:
+                    raise
+                over_budget = self.retry_budget is not None and waited+delay > self.retry_budget
+                if attempt >= self.max_retries or over_budget:
+                    with self.stats_lock:
+                        self.num_gave_up+=1
+                    raise RetryBudgetExhaustedException(attempt+1,waited,str(error)) from error
+                logger.info("Retrying After %.1f Seconds On Error : %s"%(delay,str(error)))
+                self.wait(delay)
+                waited+=delay
+                attempt+=1
+
+    def stats(self):
+        with self.stats_lock:
+            return dict(
+                retries=self.num_retries,
+                gave_up=self.num_gave_up,
+                throttled_seconds=self.throttled_seconds
+            )
@@ -4,7 +4,6 @@ All the datastructures are used by Procssing Objects during the processing/resul
 pipeline. 
 """
 import datetime
-import dateparser
 from dataclasses import dataclass,field
 from dataclasses import asdict as D2D
 from typing import List
@@ -13,11 +12,76 @@ from .semantic_parsing import \
     ArxivDocument,\
     ResearchPaper
 
-from .utils import load_json_from_file,dir_exists
+from .utils import dir_exists,parse_timestamp
+from .serialization import load_record
 from .exception import ArxivIdentityNotFoundException,CorruptArxivRecordException
 
+class LazyField:
+    """LazyField 
+    Descriptor of record fields which are kept as they are set and converted on first access. The value 
+    lives in the slot `_<name>` of the record. Loading records whose fields are never read (eg. streaming 
+    the index for the identities) costs no conversion.
+    """
+    def __set_name__(self,owner,name):
+        self.name = name
+        self.slot_name = '_'+name
+
+    def is_loaded(self,value):
+        raise NotImplementedError()
+
+    def load(self,value):
+        raise NotImplementedError()
+
+    def __get__(self,instance,owner):
+        if instance is None:
+            return self
+        value = getattr(instance,self.slot_name)
+        if value is not None and not self.is_loaded(value):
+            value = self.load(value)
+            setattr(instance,self.slot_name,value)
+        return value
+
+    def __set__(self,instance,value):
+        setattr(instance,self.slot_name,value)
+
+
+class Timestamp(LazyField):
+    """Timestamp 
+    Timestamps parsed with `parse_timestamp` on first access.
+    """
+    def is_loaded(self,value):
+        return isinstance(value,datetime.datetime)
+
+    def load(self,value):
+        return parse_timestamp(value)
+
+
+class NestedRecord(LazyField):
+    """NestedRecord 
+    Nested records kept as the JSON they were loaded from until accessed. `to_json` hands back that 
+    JSON as it is when the record was never built.
+    :param record_class: class whose `from_json` builds the record.
+    """
+    def __init__(self,record_class):
+        self.record_class = record_class
+
+    def is_loaded(self,value):
+        return not isinstance(value,dict)
+
+    def load(self,value):
+        return self.record_class.from_json(value)
+
+    def to_json(self,instance):
+        value = getattr(instance,self.slot_name)
+        if value is None or not self.is_loaded(value):
+            return value
+        return value.to_json()
+
+
 # ISO Records Should be a Date Standard For all Record Docs. 
 class ArxivLatexParsingResult:
+    __slots__ = ('section_list','some_section_failed','parsing_error','error_message','error_class','latex_parsing_method','file_results')
+
     # Dict can create indexing issues. with file_results
     def __init__(self,\
                 section_list=None,\
@@ -25,12 +89,14 @@ class ArxivLatexParsingResult:
                 file_results=[],\
                 parsing_error=False,\
                 error_message=None,\
-                latex_parsing_method=None):
+                latex_parsing_method=None,\
+                error_class=None):
                 
         self.section_list = section_list
         self.some_section_failed = some_section_failed
         self.parsing_error = parsing_error
         self.error_message = error_message
+        self.error_class = error_class # Kind of the `parsing_error`. Refer `arxiv_miner.parse_budget.error_class`
         self.latex_parsing_method  = latex_parsing_method
         self.file_results = file_results
 
@@ -39,10 +105,15 @@ class ArxivLatexParsingResult:
             some_section_failed=self.some_section_failed,
             parsing_error=self.parsing_error,
             error_message=self.error_message,
+            error_class=self.error_class,
             latex_parsing_method = self.latex_parsing_method,
             file_results = self.file_results
         )
 
+    @classmethod
+    def from_json(cls,json_object):
+        return cls(**json_object)
+
 
     def __str__(self):
         return """
@@ -58,6 +129,9 @@ class ArxivIdentity:
     """ ArxivIdentity:
     Holds the Individual Identity of the Arxiv Record For Faster Diff in Database.
     """
+    __slots__ = ('identity','url','title','abstract','categories','published','updated','authors','affiliation','version','journal_reference','_created_on')
+    created_on = Timestamp()
+
     def __init__(self,
                 identity=None,
                 url=None,
@@ -84,9 +158,7 @@ class ArxivIdentity:
         self.version = version
         self.journal_reference = journal_reference
         if created_on is None:
-            created_on = datetime.datetime.now().isoformat()
-
-        created_on = dateparser.parse(str(created_on))
+            created_on = datetime.datetime.now()
         self.created_on = created_on
 
     @classmethod
@@ -131,11 +203,15 @@ class ArxivIdentity:
         }
         return cls(**identity_dict)
 
+    @classmethod
+    def from_json(cls,json_object):
+        return cls(**json_object)
+
     @classmethod    
     def from_file(cls,file_path):
         if not dir_exists(file_path):
             raise ArxivIdentityNotFoundException('',file_path)
-        return cls(**load_json_from_file(file_path))
+        return load_record(file_path,cls)
 
     @staticmethod
     def parse_arxiv_url(url):
@@ -151,18 +227,21 @@ class ArxivIdentity:
         return parts[0], int(parts[1])
 
     def to_json(self):
-        data_dict = {**self.__dict__}
-        data_dict['created_on'] = data_dict['created_on'].isoformat()
+        data_dict = {slot_name:getattr(self,slot_name) for slot_name in self.__slots__[:-1]}
+        data_dict['created_on'] = self.created_on.isoformat()
         return data_dict
 
     def __str__(self):
-        meta_str = ''.join(['\t'+str(t[0])+"  :  "+str(t[1])+'\n' for t in self.__dict__.items()])
+        meta_str = ''.join(['\t'+str(t[0])+"  :  "+str(t[1])+'\n' for t in self.to_json().items()])
         return 'ARXIV IDENTITY(%s)\n--------------\n%s'%(self.identity,meta_str)
 
 class ArxivPaperProcessingMeta():
     """ArxivPaperProcessingMeta 
     Holds High Level summary of the Processing Status of the Paper.
     """
+    __slots__ = ('pdf_only','latex_files','mined','latex_parsed','_updated_on')
+    updated_on = Timestamp()
+
     def __init__(self,
                  pdf_only=False,\
                  latex_files=0,\
@@ -174,9 +253,9 @@ class ArxivPaperProcessingMeta():
         self.pdf_only = pdf_only
         self.latex_files = latex_files  # number of files
         if updated_on is None:
-            updated_on = datetime.datetime.now().isoformat()
+            updated_on = datetime.datetime.now()
 
-        self.updated_on = dateparser.parse(str(updated_on))# .isoformat() # When was it Mined. 
+        self.updated_on = updated_on # When was it Mined. 
         # latex-processing status
         self.mined = mined # if no error processing and not a PDF it is True
         
@@ -195,28 +274,39 @@ class ArxivPaperProcessingMeta():
         '''.format(**self.to_json())
         
     def to_json(self):
-        data_dict = {**self.__dict__}
-        data_dict['updated_on'] = data_dict['updated_on'].isoformat()
+        data_dict = {slot_name:getattr(self,slot_name) for slot_name in self.__slots__[:-1]}
+        data_dict['updated_on'] = self.updated_on.isoformat()
         return data_dict
 
+    @classmethod
+    def from_json(cls,json_object):
+        return cls(**json_object)
+
 
 class ArxivRecord(object):
+    """ArxivRecord 
+    The nested records are built from their JSON only when accessed. Lookups which only need 
+    the `identity` never build the section tree of the `latex_parsed_document`.
+    """
+    __slots__ = ('identity','_paper_processing_meta','_latex_parsing_result','_latex_parsed_document','_created_on')
     # Core Identity 
-    identity:ArxivIdentity = None
+    identity:ArxivIdentity
 
     # Processing Metadata
     # meta about processing results 
-    paper_processing_meta : ArxivPaperProcessingMeta = None
+    paper_processing_meta = NestedRecord(ArxivPaperProcessingMeta)
     # latex processing metadata 
-    latex_parsing_result : ArxivLatexParsingResult = None
+    latex_parsing_result = NestedRecord(ArxivLatexParsingResult)
 
     # First Level Of Processing Generated Document 
-    latex_parsed_document : ArxivDocument = None
+    latex_parsed_document = NestedRecord(ArxivDocument)
 
     # ToDo : add Final Organisaed `RearchDocument` to This. 
     # meta about the arxiv article's Identity
     identity_file_name='arxiv.json'
 
+    created_on = Timestamp()
+
     paper_meta_save_file_name='processing_meta.json'
 
     # the actual parsed object document from latex. 
@@ -234,17 +324,17 @@ class ArxivRecord(object):
         self.latex_parsed_document = latex_parsed_document
         self.latex_parsing_result = latex_parsing_result
         if created_on is None:
-            created_on = datetime.datetime.now().isoformat()
+            created_on = datetime.datetime.now()
         
-        self.created_on =dateparser.parse(str(created_on))# .isoformat()
+        self.created_on = created_on
 
 
     def to_json(self):
         data_dict = {
             'identity' :self.identity.to_json(),
-            'paper_processing_meta' : None if self.paper_processing_meta is None else self.paper_processing_meta.to_json(),
-            'latex_parsing_result' : None if self.latex_parsing_result is None else self.latex_parsing_result.to_json(),
-            'latex_parsed_document' : None if self.latex_parsed_document is None else self.latex_parsed_document.to_json(),
+            'paper_processing_meta' : ArxivRecord.paper_processing_meta.to_json(self),
+            'latex_parsing_result' : ArxivRecord.latex_parsing_result.to_json(self),
+            'latex_parsed_document' : ArxivRecord.latex_parsed_document.to_json(self),
             'created_on' : self.created_on.isoformat()
         }
         return data_dict
@@ -259,12 +349,13 @@ class ArxivRecord(object):
             raise CorruptArxivRecordException()
         
         identity = ArxivIdentity(**json_object['identity'])
+        # Kept as JSON until accessed. Refer `NestedRecord`
         if 'paper_processing_meta' in json_object and json_object['paper_processing_meta']:
-            paper_processing_meta = ArxivPaperProcessingMeta(**json_object['paper_processing_meta'])
+            paper_processing_meta = json_object['paper_processing_meta']
         if 'latex_parsing_result' in json_object and json_object['latex_parsing_result']:
-            latex_parsing_result = ArxivLatexParsingResult(**json_object['latex_parsing_result'])
+            latex_parsing_result = json_object['latex_parsing_result']
         if 'latex_parsed_document' in json_object and json_object['latex_parsed_document']:
-            latex_parsed_document = ArxivDocument.from_json(json_object['latex_parsed_document'])
+            latex_parsed_document = json_object['latex_parsed_document']
         
         return cls(
             identity = identity,
@@ -292,30 +383,39 @@ class CoreOntology:
     value:str = None
 
 class ArxivSematicParsedResearch:
-
-    research_object:ResearchPaper
+    """ArxivSematicParsedResearch 
+    The `research_object` is built from its JSON only when accessed. Refer `NestedRecord`
+    """
+    __slots__ = ('identity','ontology','_research_object','_created_on','_parsing_stats')
     identity:ArxivIdentity
     ontology:Ontology
+    research_object = NestedRecord(ResearchPaper)
+    created_on = Timestamp()
 
     def __init__(self,\
             identity=None,\
             research_object=None,\
             created_on = None,
             ontology=Ontology(),
+            parsing_stats=None
             ):
         self.identity = identity
         self.research_object = research_object
+        self._parsing_stats = parsing_stats # `parsing_stats` of the JSON of a `research_object` which wasn't built yet.
         if created_on is None:
-            created_on = datetime.datetime.now().isoformat()
-        self.created_on =dateparser.parse(str(created_on))# .isoformat()
+            created_on = datetime.datetime.now()
+        self.created_on = created_on
         self.ontology = ontology
     
     def to_json(self):
-
+        if self._parsing_stats is not None and not ArxivSematicParsedResearch.research_object.is_loaded(self._research_object):
+            parsing_stats = self._parsing_stats
+        else:
+            parsing_stats = self.research_object.parsing_results
         return {
             'identity': self.identity.to_json(),
-            'research_object': self.research_object.to_json(),
-            'parsing_stats': self.research_object.parsing_results,
+            'research_object': ArxivSematicParsedResearch.research_object.to_json(self),
+            'parsing_stats': parsing_stats,
             'created_on' : self.created_on.isoformat(),
             'ontology':D2D(self.ontology)
         }
@@ -325,15 +425,15 @@ class ArxivSematicParsedResearch:
         if 'identity' not in json_object:
             raise CorruptArxivRecordException()
         identity = ArxivIdentity(**json_object['identity'])
-        research_object = ResearchPaper.from_json(json_object['research_object']) 
         ontology = Ontology()
         if 'ontology' in json_object:
             ontology = Ontology(**json_object['ontology'])
         return cls(\
                 identity=identity,\
-                research_object=research_object,\
+                research_object=json_object['research_object'],\
                 created_on= json_object['created_on'],
-                ontology = ontology
+                ontology = ontology,
+                parsing_stats=json_object.get('parsing_stats')
             )
 
 
@@ -342,14 +442,28 @@ class ArxivPaperStatus:
     This Record will help mark different stages of the 
     process From mining To Scraping Etc. For a Particular paper
     from Arxiv. 
+
+    While a paper is `mining`, `worker_id` holds the miner that claimed it and `leased_until`
+    when the claim expires. Papers with an expired lease can be claimed by other miners.
+    `claim_count` counts the claims of the paper since it was last mined. Papers which can't be mined (eg. their latex 
+    kept going over the parsing budgets or kept crashing miners) are `quarantined` and aren't claimed again until they are reset for re-mining.
     """
+    __slots__ = ('scraped','mined','mining','worker_id','claim_count','quarantined','quarantine_reason','_leased_until','_created_on','_updated_on')
+    created_on = Timestamp()
+    updated_on = Timestamp()
+    leased_until = Timestamp()
 
     def __init__(self,
                 mined = False,
                 created_on =None,
                 scraped = False,
                 mining = False,
-                updated_on = None
+                updated_on = None,
+                worker_id = None,
+                leased_until = None,
+                claim_count = 0,
+                quarantined = False,
+                quarantine_reason = None
                 ):
         self.scraped = scraped
         
@@ -357,24 +471,53 @@ class ArxivPaperStatus:
         self.mined = mined
         self.mining = mining
 
+        # Lease of the miner working on the paper.
+        self.worker_id = worker_id
+        self.leased_until = leased_until
+        self.claim_count = claim_count
+        self.quarantined = quarantined
+        self.quarantine_reason = quarantine_reason
+
         if updated_on is None:
-            updated_on = datetime.datetime.now().isoformat()
+            updated_on = datetime.datetime.now()
 
         if created_on is None:
-            created_on = datetime.datetime.now().isoformat()
+            created_on = datetime.datetime.now()
         
         # Timestamps.
-        self.created_on = dateparser.parse(str(created_on))# .isoformat()
-        self.updated_on = dateparser.parse(str(updated_on))# .isoformat()
+        self.created_on = created_on
+        self.updated_on = updated_on
     
     def to_json(self):
-        data_dict = {**self.__dict__}
-        data_dict['created_on'] = data_dict['created_on'].isoformat()
-        data_dict['updated_on'] = data_dict['updated_on'].isoformat()
+        data_dict = {slot_name:getattr(self,slot_name) for slot_name in self.__slots__[:-3]}
+        data_dict['leased_until'] = None if self.leased_until is None else self.leased_until.isoformat()
+        data_dict['created_on'] = self.created_on.isoformat()
+        data_dict['updated_on'] = self.updated_on.isoformat()
         return data_dict
 
     def update(self):
         self.updated_on = datetime.datetime.now()# .isoformat()
+
+    def lease(self,worker_id,lease_seconds):
+        """lease 
+        Mark the paper as `mining` by `worker_id` for `lease_seconds` from now.
+        """
+        self.mining = True
+        self.worker_id = worker_id
+        self.leased_until = datetime.datetime.now() + datetime.timedelta(seconds=lease_seconds)
+        self.claim_count+=1
+        self.update()
+
+    def quarantine(self,reason):
+        self.release()
+        self.quarantined = True
+        self.quarantine_reason = reason
+
+    def release(self):
+        self.mining = False
+        self.worker_id = None
+        self.leased_until = None
+        self.update()
     
     @classmethod
     def from_json(cls,json_object):
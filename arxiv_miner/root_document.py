@@ -0,0 +1,113 @@
+"""
+Root document resolution.
+
+The latex source of a paper is often split into many files : the root document with the
+`\\documentclass`, chapters pulled in with `\\input`/`\\include`/`\\subfile`, macro files,
+standalone figures and leftover drafts. `RootDocumentResolver` finds the root document
+and inlines the files it includes, in order, into one flattened document. Parsing that
+document alone gives the sections in the order of the paper without parsing files which aren't part of it.
+"""
+import os
+import re
+from typing import Dict,List
+from .section_extractor import COMMENT_PATTERN,MAX_INPUT_DEPTH
+
+DOCUMENTCLASS_PATTERN = re.compile(r'\\documentclass\s*(?:\[[^\]]*\])?\s*\{([^}]*)\}')
+BEGIN_DOCUMENT_PATTERN = re.compile(r'\\begin\s*\{document\}')
+END_DOCUMENT_PATTERN = re.compile(r'\\end\s*\{document\}')
+INCLUDE_PATTERN = re.compile(r'\\(input|include|subfile)\b\s*(?:\{([^}]*)\}|([^\s{}\\]+))')
+# Document classes of files meant to be included by another document.
+INCLUDED_DOCUMENT_CLASSES = ['subfiles','standalone']
+
+
+def decode_tex(tex_source:bytes):
+    # `surrogateescape` keeps bytes which aren't utf-8 so the flattened document encodes back to the original bytes.
+    return tex_source.decode('utf-8',errors='surrogateescape')
+
+
+def encode_tex(tex:str):
+    return tex.encode('utf-8',errors='surrogateescape')
+
+
+class RootDocument:
+    """RootDocument
+    :param root_path: tex file with the `\\documentclass`
+    :param source: [bytes] the root document with all the files it includes inlined.
+    :param included_paths: tex files inlined into `source` in the order they appear.
+    """
+    def __init__(self,root_path,source:bytes,included_paths:List[str]):
+        self.root_path = root_path
+        self.source = source
+        self.included_paths = included_paths
+
+
+class RootDocumentResolver:
+    """RootDocumentResolver
+    Finds the root document among the tex files of a paper and flattens it.
+        - Root candidates are the files with a `\\documentclass` and a `\\begin{document}` which aren't subfiles or standalone figures.
+        - With many candidates (e.g. an old draft next to the paper) the one whose flattened document is the largest is chosen.
+        - `\\input`, `\\include` and `\\subfile` are resolved relative to the directory of the root like latex does.
+          Only the body of subfiles is inlined. Commented out includes and files which include themselves are ignored.
+
+    :param tex_sources: Dict[str,bytes] : path of every tex file of the paper -> its contents
+    """
+    def __init__(self,tex_sources:Dict[str,bytes]):
+        self.tex_sources = {os.path.normpath(tex_path):tex_source for tex_path,tex_source in tex_sources.items()}
+        self.original_paths = {os.path.normpath(tex_path):tex_path for tex_path in tex_sources}
+        self._stripped_sources = {}
+
+    def _stripped(self,tex_path):
+        if tex_path not in self._stripped_sources:
+            self._stripped_sources[tex_path] = COMMENT_PATTERN.sub(r'\1',decode_tex(self.tex_sources[tex_path]))
+        return self._stripped_sources[tex_path]
+
+    def root_candidates(self):
+        candidates = []
+        for tex_path in self.tex_sources:
+            tex = self._stripped(tex_path)
+            documentclass = DOCUMENTCLASS_PATTERN.search(tex)
+            if documentclass is None or BEGIN_DOCUMENT_PATTERN.search(tex) is None:
+                continue
+            if documentclass.group(1).strip() in INCLUDED_DOCUMENT_CLASSES:
+                continue
+            candidates.append(tex_path)
+        return sorted(candidates)
+
+    def _lookup(self,root_dir,file_name):
+        file_name = file_name.strip()
+        names = [file_name] if file_name.endswith('.tex') else [file_name+'.tex',file_name]
+        for name in names:
+            tex_path = os.path.normpath(os.path.join(root_dir,name))
+            if tex_path in self.tex_sources:
+                return tex_path
+        return None
+
+    def _flatten(self,tex_path,root_dir,include_stack,included_paths):
+        def inline(include_match):
+            included_path = self._lookup(root_dir,include_match.group(2) or include_match.group(3))
+            if included_path is None or included_path in include_stack or len(include_stack) >= MAX_INPUT_DEPTH:
+                return ''
+            included_paths.append(self.original_paths[included_path])
+            included_tex = self._flatten(included_path,root_dir,include_stack+(included_path,),included_paths)
+            if include_match.group(1) == 'subfile':
+                begin = BEGIN_DOCUMENT_PATTERN.search(included_tex)
+                end = END_DOCUMENT_PATTERN.search(included_tex)
+                if begin is not None and end is not None and begin.end() <= end.start():
+                    included_tex = included_tex[begin.end():end.start()]
+            return '\n'+included_tex+'\n'
+        return INCLUDE_PATTERN.sub(inline,self._stripped(tex_path))
+
+    def flatten(self,root_path) -> RootDocument:
+        root_path = os.path.normpath(root_path)
+        included_paths = []
+        tex = self._flatten(root_path,os.path.dirname(root_path),(root_path,),included_paths)
+        return RootDocument(self.original_paths[root_path],encode_tex(tex),included_paths)
+
+    def resolve(self) -> RootDocument:
+        """resolve
+        :return: the flattened `RootDocument` or None when no tex file is a root document.
+        """
+        root_documents = [self.flatten(root_path) for root_path in self.root_candidates()]
+        if len(root_documents) == 0:
+            return None
+        return max(root_documents,key=lambda root_document:len(root_document.source))
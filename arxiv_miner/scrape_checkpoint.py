@@ -0,0 +1,85 @@
+"""
+Checkpoints for OAI-PMH harvesting.
+
+Every ListRecords page fetched by the `Scraper` ends with a `resumptionToken`.
+`ScrapeCheckpoint` persists the last token of every (category,date window)
+to a JSON file so that a harvest which timed out or died can continue from the
+last page instead of starting again from `from=`.
+"""
+import os
+import datetime
+from threading import RLock
+from .utils import dir_exists,save_json_to_file,load_json_from_file
+
+
+class ScrapeCheckpoint:
+    """ScrapeCheckpoint
+    JSON file backed store of harvesting progress keyed by category and date window.
+    Each entry looks like :
+    ```json
+        {
+            "resumption_token": "6960524|1001",
+            "page": 2,
+            "num_records": 1000,
+            "completed": false,
+            "updated_on": "2020-06-01T10:00:00"
+        }
+    ```
+    The file is rewritten atomically after every page.
+
+    :param checkpoint_path: path of the JSON file holding the checkpoints.
+    """
+    def __init__(self,checkpoint_path):
+        self.checkpoint_path = checkpoint_path
+        self.lock = RLock()
+        self.checkpoints = {}
+        if dir_exists(checkpoint_path):
+            self.checkpoints = load_json_from_file(checkpoint_path)
+
+    @staticmethod
+    def key(category,date_from,date_until):
+        return '%s|%s|%s'%(category,date_from,date_until)
+
+    def get(self,category,date_from,date_until):
+        with self.lock:
+            return self.checkpoints.get(self.key(category,date_from,date_until))
+
+    def is_complete(self,category,date_from,date_until):
+        checkpoint = self.get(category,date_from,date_until)
+        return checkpoint is not None and checkpoint['completed']
+
+    def save_page(self,category,date_from,date_until,resumption_token,page,num_records):
+        self._set(category,date_from,date_until,dict(
+            resumption_token=resumption_token,
+            page=page,
+            num_records=num_records,
+            completed=False
+        ))
+
+    def mark_complete(self,category,date_from,date_until,num_records):
+        self._set(category,date_from,date_until,dict(
+            resumption_token=None,
+            page=None,
+            num_records=num_records,
+            completed=True
+        ))
+
+    def clear(self,category,date_from,date_until):
+        with self.lock:
+            self.checkpoints.pop(self.key(category,date_from,date_until),None)
+            self._flush()
+
+    def _set(self,category,date_from,date_until,checkpoint):
+        checkpoint['updated_on'] = datetime.datetime.now().isoformat()
+        with self.lock:
+            self.checkpoints[self.key(category,date_from,date_until)] = checkpoint
+            self._flush()
+
+    def _flush(self):
+        checkpoint_dir = os.path.dirname(os.path.abspath(self.checkpoint_path))
+        if not dir_exists(checkpoint_dir):
+            os.makedirs(checkpoint_dir)
+        # Write and swap so a crash mid write never leaves a corrupt checkpoint behind
+        tmp_path = self.checkpoint_path+'.tmp'
+        save_json_to_file(self.checkpoints,tmp_path)
+        os.replace(tmp_path,self.checkpoint_path)
@@ -10,6 +10,7 @@ import xml.etree.ElementTree as ET
 import datetime
 import time
 import sys
+from .rate_limiter import RetryPolicy
 PYTHON3 = sys.version_info[0] == 3
 if PYTHON3:
     from urllib.parse import urlencode
@@ -104,12 +105,24 @@ class Scraper(object):
         final date in format 'YYYY-MM-DD'. Updated eprints are included even if
         they were created outside of the given date range. Default: today.
     t: int
-        Waiting time between subsequent calls to API, triggred by Error 503.
+        Base backoff before retrying a failed call to the API when the server doesn't send a `retry-after`.
+        Doubles on every retry.
     timeout: int
-        Timeout in seconds after which the scraping stops. Default: 300s
+        Seconds spent fetching and parsing pages after which the scraping stops. The time the consumer of
+        `iter_records` takes between records isn't counted. `timed_out` tells a harvest which stopped on it
+        from a finished one. None for no timeout. Default: 300s
     filter: dictionary
         A dictionary where keys are used to limit the saved results. Possible keys:
         subcats, author, title, abstract. See the example, below.
+    checkpoint: ScrapeCheckpoint
+        Optional store for the last `resumptionToken`. When given, `iter_records`
+        resumes from the last saved page and saves the token after every page.
+    rate_limiter: TokenBucket
+        Optional limiter shared between scrapers. Every request takes a token and
+        a 503's `retry-after` holds back all scrapers sharing the limiter.
+    retry_policy: RetryPolicy
+        Optional policy for retrying failed calls. Defaults to a `RetryPolicy` with
+        `t` as its base delay over `rate_limiter`.
 
     Example:
     Returning all eprints from
@@ -121,10 +134,11 @@ class Scraper(object):
     ```
     """
 
-    def __init__(self, category, date_from=None, date_until=None, t=30, timeout=300, filters={}):
+    def __init__(self, category, date_from=None, date_until=None, t=30, timeout=300, filters={}, checkpoint=None, rate_limiter=None, retry_policy=None):
         self.cat = str(category)
         self.t = t
         self.timeout = timeout
+        self.timed_out = False
         DateToday = datetime.date.today()
         if date_from is None:
             self.f = str(DateToday.replace(day=1))
@@ -141,67 +155,120 @@ class Scraper(object):
         else:
             self.append_all = False
             self.keys = filters.keys()
+        self.checkpoint = checkpoint
+        self.rate_limiter = rate_limiter
+        if retry_policy is None:
+            retry_policy = RetryPolicy(max_retries=8, base_delay=t, rate_limiter=rate_limiter)
+        self.retry_policy = retry_policy
 
-    def scrape(self):
+    def _passes_filters(self, record):
+        if self.append_all:
+            return True
+        for key in self.keys:
+            for word in self.filters[key]:
+                if word.lower() in record[key]:
+                    return True
+        return False
+
+    def _open(self, url):
+        # 503s wait for exactly the `retry-after` arXiv asks for. Other transient errors back off exponentially.
+        return self.retry_policy.call(urlopen, url)
+
+    def iter_records(self, on_page_end=None):
+        """iter_records
+        Generator version of `scrape`. Every ListRecords page is parsed with 
+        `iterparse` straight off the HTTP response and each `record` element is 
+        cleared once it is converted, so only one record is held in memory at a time.
+        The next page is only requested once the consumer has gone through the current one. 
+
+        If a `checkpoint` is set, the harvest continues from the last saved `resumptionToken`
+        and the token is saved after the consumer has gone through every page.
+
+        :param on_page_end: optional callable invoked once the consumer has gone through a page
+                            and before its checkpoint is saved. Lets consumers flush buffered records.
+        :yield: [dict] output of `Record.output` for records passing `filters`
+        """
         t0 = time.time()
-        tx = time.time()
+        # Seconds spent fetching and parsing pages. Resumed whenever the consumer hands control back.
         elapsed = 0.0
+        resumed_at = time.time()
+        self.timed_out = False
         url = self.url
-        ds = []
+        num_records = 0
         k = 1
+        resumed = False
+        if self.checkpoint is not None:
+            saved = self.checkpoint.get(self.cat, self.f, self.u)
+            if saved is not None and saved['resumption_token'] is not None:
+                print('resuming from page ', saved['page'], ' with token ', saved['resumption_token'])
+                url = BASE + 'resumptionToken=%s' % saved['resumption_token']
+                k = saved['page']
+                num_records = saved['num_records']
+                resumed = True
         while True:
-
             print('fetching up to ', 1000 * k, 'records...')
-            try:
-                response = urlopen(url)
-            except HTTPError as e:
-                if e.code == 503:
-                    print(e)
-                    to = int(e.hdrs.get('retry-after', 30))
-                    print('Got 503. Retrying after {0:d} seconds.'.format(self.t))
-                    time.sleep(self.t)
-                    continue
-                else:
-                    raise
+            response = self._open(url)
             k += 1
-            xml = response.read()
-            root = ET.fromstring(xml)
-            records = root.findall(OAI + 'ListRecords/' + OAI + 'record')
-            for record in records:
-                meta = record.find(OAI + 'metadata').find(ARXIV + 'arXiv')
-                record = Record(meta).output()
-                if self.append_all:
-                    ds.append(record)
-                else:
-                    save_record = False
-                    for key in self.keys:
-                        for word in self.filters[key]:
-                            if word.lower() in record[key]:
-                                save_record = True
-
-                    if save_record:
-                        ds.append(record)
-
-            try:
-                token = root.find(OAI + 'ListRecords').find(OAI + 'resumptionToken')
-            except:
-                return 1
-            if token is None or token.text is None:
+            token = None
+            error_code = None
+            list_records = None
+            for event, elem in ET.iterparse(response, events=('start', 'end')):
+                if event == 'start':
+                    if elem.tag == OAI + 'ListRecords':
+                        list_records = elem
+                    continue
+                if elem.tag == OAI + 'record':
+                    metadata = elem.find(OAI + 'metadata')
+                    # Deleted records come without a metadata block.
+                    if metadata is not None and metadata.find(ARXIV + 'arXiv') is not None:
+                        record = Record(metadata.find(ARXIV + 'arXiv')).output()
+                        if self._passes_filters(record):
+                            num_records += 1
+                            elapsed += time.time() - resumed_at
+                            yield record
+                            resumed_at = time.time()
+                    elem.clear()
+                    if list_records is not None:
+                        list_records.remove(elem)
+                elif elem.tag == OAI + 'resumptionToken':
+                    token = elem.text
+                elif elem.tag == OAI + 'error':
+                    error_code = elem.get('code')
+            response.close()
+            elapsed += time.time() - resumed_at
+            if on_page_end is not None:
+                on_page_end()
+            resumed_at = time.time()
+            if error_code == 'badResumptionToken' and resumed:
+                # Tokens expire on the server. Start the window again from `from=`.
+                print('saved resumptionToken expired. Restarting from ', self.f)
+                self.checkpoint.clear(self.cat, self.f, self.u)
+                url = self.url
+                k = 1
+                num_records = 0
+                resumed = False
+                continue
+            resumed = False
+            # No ListRecords means OAI returned an error like `noRecordsMatch`.
+            if list_records is None or token is None:
+                if self.checkpoint is not None:
+                    self.checkpoint.mark_complete(self.cat, self.f, self.u, num_records)
                 break
-            else:
-                url = BASE + 'resumptionToken=%s' % token.text
+            if self.checkpoint is not None:
+                self.checkpoint.save_page(self.cat, self.f, self.u, token, k, num_records)
+            url = BASE + 'resumptionToken=%s' % token
 
-            ty = time.time()
-            elapsed += (ty-tx)
-            if elapsed >= self.timeout:
+            if self.timeout is not None and elapsed >= self.timeout:
+                self.timed_out = True
+                print('stopped after fetching for {0:.1f} seconds. Records after page {1:d} were not fetched.'.format(elapsed, k - 1))
                 break
-            else:
-                tx = time.time()
 
         t1 = time.time()
         print('fetching is completed in {0:.1f} seconds.'.format(t1 - t0))
-        print ('Total number of records {:d}'.format(len(ds)))
-        return ds
+        print ('Total number of records {:d}'.format(num_records))
+
+    def scrape(self):
+        return list(self.iter_records())
 
 
 def search_all(df, col, *words):
@@ -8,7 +8,8 @@ Information from Arxiv LateX papers
 
 import datetime
 import time
-from threading import Thread
+from threading import Thread,Lock
+from concurrent.futures import ThreadPoolExecutor
 from multiprocessing import Process,Event
 from expiringdict import ExpiringDict
 from signal import signal, SIGINT
@@ -17,6 +18,9 @@ from .database import ArxivDatabase
 from .paper import ResearchPaperFactory
 from .logger import create_logger
 from .scraper import Scraper
+from .scrape_checkpoint import ScrapeCheckpoint
+from .seen_index import SeenIdIndex,ExpiringSeenIdIndex
+from .rate_limiter import TokenBucket
 '''
 How Will Scraping Take Place. ? 
     1. Once Running With a Configuration Of what Subject area to Scrape. 
@@ -52,6 +56,7 @@ CLASSES = [
 MAX_PAPERS_IN_CACHE = 2000
 CACHE_PAPER_TTL = 60*12
 MAX_BACK_DAYS = 365*5
+SAVE_BATCH_SIZE = 500
 # 1 Day ago
 DEFAULT_SCRAPE_UNTIL = (datetime.datetime.now() - datetime.timedelta(days = 1))
 # SCRAPE_UNTIL = 
@@ -62,11 +67,19 @@ class ScrapingEngine:
     """
     daily_id_set = ExpiringDict(MAX_PAPERS_IN_CACHE,max_age_seconds=CACHE_PAPER_TTL)
     date_format = '%Y-%m-%d'
+    # Number of scraped records checked and saved per bulk request. 
+    save_batch_size = SAVE_BATCH_SIZE
+    # Seconds a `Scraper` spends fetching the pages of a date window before giving up on it. None for no timeout.
+    scrape_timeout = 300
 
-    def __init__(self,database:ArxivDatabase,selected_class='cs'):
+    def __init__(self,database:ArxivDatabase,selected_class='cs',seen_index:SeenIdIndex=None):
         self.db = database
         self.selected_class = selected_class
         self.logger = create_logger(self.__class__.__name__)
+        self.checkpoint = None
+        self.rate_limiter = None
+        # Defaults to the class level `daily_id_set` cache.
+        self.seen_index = seen_index if seen_index is not None else ExpiringSeenIdIndex(self.daily_id_set)
 
     def __call__(self):
         """
@@ -75,28 +88,30 @@ class ScrapingEngine:
         raise NotImplementedError()    
     
     def update_cache(self,paper_id):
-        self.daily_id_set[paper_id] = 1
+        self.seen_index.add(paper_id)
 
     def filter_results(self,scraped_id_set:set):
-        cached_keys = set(self.daily_id_set.keys())
-        new_keys = scraped_id_set - cached_keys
-        if len(new_keys) > 0:
-            return list(new_keys)
-        return []
+        return [paper_id for paper_id in scraped_id_set if paper_id not in self.seen_index]
     
+    def _scrape_stream(self,start_date,end_date,on_page_end=None,selected_class=None):
+        """_scrape_stream 
+        Streams the OAI records between the dates which are not in the cache. 
+        Records are yielded while later pages are still to be fetched.
+        """
+        selected_class = self.selected_class if selected_class is None else selected_class
+        scraper = Scraper(category=selected_class, date_from=start_date,date_until=end_date,timeout=self.scrape_timeout,checkpoint=self.checkpoint,rate_limiter=self.rate_limiter)
+        num_scraped = 0
+        for record in scraper.iter_records(on_page_end=on_page_end):
+            num_scraped+=1
+            if len(self.filter_results({record['id']})) == 0:
+                continue
+            yield record
+        if scraper.timed_out:
+            self.logger.error("Scraping %s From %s To %s Timed Out After %d Records. The Rest Of The Dates Weren't Scraped"%(selected_class,start_date,end_date,num_scraped))
+        self.logger.info("Scraped %d Records of %s From %s To %s"%(num_scraped,selected_class,start_date,end_date))
+
     def _scrape(self,start_date,end_date):
-        try:
-            scraper = Scraper(category=self.selected_class, date_from=start_date,date_until=end_date)
-            output = scraper.scrape()
-            if output is 1:
-                return []
-        except Exception as e:
-            raise e
-        scraped_id_set = set(map(lambda x : x['id'],output))
-        self.logger.info("Scraped %d Records From %s To %s"%(len(scraped_id_set),start_date,end_date))
-        cache_miss = self.filter_results(scraped_id_set)
-        db_check_records = list(filter(lambda x : x['id'] in cache_miss,output))
-        return db_check_records 
+        return list(self._scrape_stream(start_date,end_date))
 
     @staticmethod
     def _is_rejected_id(id_str):
@@ -116,7 +131,7 @@ class ScrapingEngine:
             return False
         db_retrieved_identity = self.db.query(oa2_record['id'])
         if db_retrieved_identity: # If we can find the Doc in DB then continue as there is no more need to check/Add
-            self.update_cache(db_retrieved_identity.identity)
+            self.update_cache(db_retrieved_identity.identity.identity)
             return False
         
         # There was nothing in the DB so we create Identity. 
@@ -132,6 +147,58 @@ class ScrapingEngine:
         )
         return True
 
+    def _save_oa2_identities(self,oa2_records):
+        """_save_oa2_identities 
+        Batch version of `_save_oa2_identity`. Checks existance of all records with one 
+        `query_many` call and saves the missing ones with one `save_many_identities` call. 
+        :return: [int] number of new identities saved. 
+        """
+        candidates = {}
+        for oa2_record in oa2_records:
+            if not self._is_rejected_id(oa2_record['id']):
+                candidates[oa2_record['id']] = oa2_record
+        if len(candidates) == 0:
+            return 0
+        existing_ids = set(self.db.query_many(list(candidates.keys())))
+        for paper_id in existing_ids:
+            self.update_cache(paper_id)
+        
+        identities = [
+            ArxivIdentity.from_oa2_response(candidates[paper_id]) \
+                for paper_id in candidates if paper_id not in existing_ids
+        ]
+        parsed_research = [
+            ArxivSematicParsedResearch(\
+                identity=identity,\
+                research_object=ResearchPaperFactory.from_arxiv_record(ArxivRecord(identity=identity))\
+            ) for identity in identities
+        ]
+        saved_ids = self.db.save_many_identities(identities,parsed_research=parsed_research)
+        for paper_id in saved_ids:
+            self.update_cache(paper_id)
+        return len(saved_ids)
+
+    def _scrape_and_save(self,start_date,end_date,selected_class=None):
+        """_scrape_and_save 
+        Saves the streamed OAI records in batches of `save_batch_size`. 
+        The batch is also flushed at the end of every OAI page so that 
+        nothing is pending when the page gets checkpointed. 
+        :return: [int] number of new identities saved. 
+        """
+        new_added = 0
+        batch = []
+        def flush():
+            nonlocal new_added
+            new_added+=self._save_oa2_identities(batch)
+            batch.clear()
+        
+        for oa2_record in self._scrape_stream(start_date,end_date,on_page_end=flush,selected_class=selected_class):
+            batch.append(oa2_record)
+            if len(batch) == self.save_batch_size:
+                flush()
+        flush()
+        return new_added
+
 class DailyScrapingEngine(ScrapingEngine):
     """ ## DailyScrapingEngine
     - Responsible for scraping Records for daily from Arxiv For a Particular Class. 
@@ -140,8 +207,8 @@ class DailyScrapingEngine(ScrapingEngine):
     - This will be responsible for Extracting the New records every day. 
     """
 
-    def __init__(self, database,selected_class='cs'):
-        super().__init__(database,selected_class=selected_class)
+    def __init__(self, database,selected_class='cs',seen_index:SeenIdIndex=None):
+        super().__init__(database,selected_class=selected_class,seen_index=seen_index)
         
 
     def get_date_ranges(self):
@@ -150,20 +217,16 @@ class DailyScrapingEngine(ScrapingEngine):
         return (today,yesterday)
 
     def __call__(self):
-        scrape_status = []
         today,yesterday  = self.get_date_ranges()
         try : 
-            db_check_records = self._scrape(yesterday,today)
+            new_added = self._scrape_and_save(yesterday,today)
         except Exception as e:
-            self.logger.error(e)
-            time.sleep(self.timeout_per_scrape)
             self.logger.error("Failure At Scraping For Dates %s To %s"%(today,yesterday))
             self.logger.error("%s"%str(e))
             return 
+        finally:
+            self.seen_index.flush()
 
-        for cache_missed_paper in db_check_records:
-            scrape_status.append(self._save_oa2_identity(cache_missed_paper))
-        new_added = sum([1 for st in scrape_status if st])
         self.logger.info("Saved %d Records For %s To %s"%(new_added,yesterday,today))
         
 
@@ -172,39 +235,41 @@ class MassDataHarvestingEngine(ScrapingEngine):
     Ment To harvest Data until a `scrape_until` date in the Past for a `selected_class`. 
     Requires a `selected_class` because of `arxivscraper.Scraper`'s requirements. 
     
+    If `checkpoint_path` is given, the last `resumptionToken` of every date window is persisted there. 
+    A rerun skips the windows which completed and resumes the others from their last page. 
     """
     
-    def __init__(self, database,selected_class='cs',start_date = DEFAULT_SCRAPE_UNTIL, end_date = datetime.datetime.now(),timeout_per_scrape=5):
-        super().__init__(database)
+    def __init__(self, database,selected_class='cs',start_date = DEFAULT_SCRAPE_UNTIL, end_date = datetime.datetime.now(),timeout_per_scrape=5,checkpoint_path=None,seen_index:SeenIdIndex=None):
+        super().__init__(database,selected_class=selected_class,seen_index=seen_index)
         self.scraping_dates = self.get_date_arr(start_date,end_date)
         self.timeout_per_scrape = timeout_per_scrape
+        if checkpoint_path is not None:
+            self.checkpoint = ScrapeCheckpoint(checkpoint_path)
 
-    def get_date_arr(self,start_date:datetime.datetime,end_date:datetime.datetime):
+    def get_date_arr(self,start_date:datetime.datetime,end_date:datetime.datetime,window_days=1):
         delta = end_date - start_date
         date_arr = []
-        for i in range(delta.days + 1):
-            if i==0:
-                continue
-            save_st_day = start_date + datetime.timedelta(days=i-1)
-            save_end_day = start_date + datetime.timedelta(days=i)
+        for i in range(0,delta.days,window_days):
+            save_st_day = start_date + datetime.timedelta(days=i)
+            save_end_day = start_date + datetime.timedelta(days=min(i+window_days,delta.days))
             date_arr.append((save_st_day.strftime(self.date_format),save_end_day.strftime(self.date_format)))
         
         return date_arr
         
     def __call__(self):
         for start_date,end_date in self.scraping_dates:
-            scrape_status = []
+            if self.checkpoint is not None and self.checkpoint.is_complete(self.selected_class,start_date,end_date):
+                self.logger.info("Skipping Completed Dates %s To %s"%(start_date,end_date))
+                continue
             try : 
-                db_check_records = self._scrape(start_date,end_date)
+                new_added = self._scrape_and_save(start_date,end_date)
             except:
                 time.sleep(self.timeout_per_scrape)
                 self.logger.error("Failure At Scraping For Dates %s To %s"%(start_date,end_date))
                 continue
-            for cache_missed_paper in db_check_records:
-                scrape_status.append(self._save_oa2_identity(cache_missed_paper))
-            new_added = sum([1 for st in scrape_status if st])
             self.logger.info("Saved %d Records For %s To %s"%(new_added,start_date,end_date))
             time.sleep(self.timeout_per_scrape) # Sleep For X Number of Seconds Before One Starts Again. 
+        self.seen_index.flush()
                 
 
     @classmethod
@@ -213,7 +278,9 @@ class MassDataHarvestingEngine(ScrapingEngine):
             selected_class='cs',\
             start_date='2020-05-01',\
             end_date='2020-05-03',\
-            timeout_per_scrape=5):
+            timeout_per_scrape=5,\
+            checkpoint_path=None,\
+            seen_index=None):
         
         start_date = datetime.datetime.strptime(start_date,cls.date_format)
         end_date = datetime.datetime.strptime(end_date,cls.date_format)
@@ -221,7 +288,105 @@ class MassDataHarvestingEngine(ScrapingEngine):
             selected_class=selected_class,\
             start_date=start_date,\
             end_date=end_date,\
-            timeout_per_scrape=timeout_per_scrape)
+            timeout_per_scrape=timeout_per_scrape,\
+            checkpoint_path=checkpoint_path,\
+            seen_index=seen_index)
+
+class ShardedHarvestingEngine(MassDataHarvestingEngine):
+    """ShardedHarvestingEngine
+    Harvests many `categories` over a date range by splitting it into (category,date window) shards
+    which are scraped by a bounded pool of `num_workers` threads. 
+        - All workers share one `TokenBucket` so together they make at most `requests_per_second` requests. 
+          A 503's `retry-after` holds back every worker. 
+        - Every shard is checkpointed on its own in `checkpoint_path` so a rerun only redoes the unfinished shards. 
+        - Progress is logged every `progress_every` shards and available from `progress()`.
+        - Shards have no scraping timeout since the wait for the shared `TokenBucket` alone can run past it. 
+          A shard whose checkpoint isn't complete after scraping is counted as failed.
+    """
+    scrape_timeout = None
+    def __init__(self, database,\
+                categories=['cs'],\
+                start_date = DEFAULT_SCRAPE_UNTIL,\
+                end_date = datetime.datetime.now(),\
+                window_days=1,\
+                num_workers=4,\
+                requests_per_second=0.25,\
+                checkpoint_path=None,\
+                seen_index:SeenIdIndex=None,\
+                progress_every=10):
+        super().__init__(database,selected_class=categories[0],start_date=start_date,end_date=end_date,timeout_per_scrape=0,checkpoint_path=checkpoint_path,seen_index=seen_index)
+        self.categories = categories
+        self.num_workers = num_workers
+        self.rate_limiter = TokenBucket(requests_per_second)
+        self.progress_every = progress_every
+        self.shards = [
+            (category,window_start,window_end) \
+                for category in categories \
+                    for window_start,window_end in self.get_date_arr(start_date,end_date,window_days=window_days)
+        ]
+        self.progress_lock = Lock()
+        self.stats = dict(completed=0,skipped=0,failed=0,records_saved=0)
+        self.started_at = None
+
+    def progress(self):
+        with self.progress_lock:
+            stats = dict(**self.stats)
+        done = stats['completed']+stats['skipped']+stats['failed']
+        elapsed = 0 if self.started_at is None else time.time()-self.started_at
+        stats['total'] = len(self.shards)
+        stats['elapsed_seconds'] = elapsed
+        stats['throttled_seconds'] = self.rate_limiter.throttled_seconds
+        stats['eta_seconds'] = None
+        if done > 0:
+            stats['eta_seconds'] = (elapsed/done)*(len(self.shards)-done)
+        return stats
+
+    def _update_progress(self,outcome,records_saved=0):
+        with self.progress_lock:
+            self.stats[outcome]+=1
+            self.stats['records_saved']+=records_saved
+            done = self.stats['completed']+self.stats['skipped']+self.stats['failed']
+        if done % self.progress_every == 0 or done == len(self.shards):
+            stats = self.progress()
+            self.logger.info("Progress : %d/%d Shards (%d Failed). Saved %d Records. ETA %s Seconds"%(\
+                done,stats['total'],stats['failed'],stats['records_saved'],\
+                'NA' if stats['eta_seconds'] is None else '%d'%stats['eta_seconds']))
+
+    def _harvest_shard(self,category,start_date,end_date):
+        if self.checkpoint is not None and self.checkpoint.is_complete(category,start_date,end_date):
+            self._update_progress('skipped')
+            return
+        try:
+            new_added = self._scrape_and_save(start_date,end_date,selected_class=category)
+        except Exception as e:
+            self.logger.error("Failure At Scraping %s For Dates %s To %s : %s"%(category,start_date,end_date,str(e)))
+            self._update_progress('failed')
+            return
+        if self.checkpoint is not None and not self.checkpoint.is_complete(category,start_date,end_date):
+            self.logger.error("Scraping %s For Dates %s To %s Stopped Before The Last Page"%(category,start_date,end_date))
+            self._update_progress('failed',records_saved=new_added)
+            return
+        self._update_progress('completed',records_saved=new_added)
+
+    def __call__(self):
+        self.started_at = time.time()
+        self.logger.info("Harvesting %d Shards With %d Workers"%(len(self.shards),self.num_workers))
+        with ThreadPoolExecutor(max_workers=self.num_workers) as executor:
+            for category,start_date,end_date in self.shards:
+                executor.submit(self._harvest_shard,category,start_date,end_date)
+        self.seen_index.flush()
+        return self.progress()
+
+    @classmethod
+    def from_string_dates(cls,\
+            database,\
+            categories=['cs'],\
+            start_date='2020-05-01',\
+            end_date='2020-05-03',\
+            **kwargs):
+        start_date = datetime.datetime.strptime(start_date,cls.date_format)
+        end_date = datetime.datetime.strptime(end_date,cls.date_format)
+        return cls(database,categories=categories,start_date=start_date,end_date=end_date,**kwargs)
 
 class HarvestingThread(Thread):
     def __init__(self,scraping_engine:ScrapingEngine):
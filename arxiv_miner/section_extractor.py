@@ -0,0 +1,161 @@
+"""
+Regex based heading extraction.
+
+`get_tex_tree` builds a full `tex2py` tree of a tex file only for the parsers to read the names
+of its sections and subsections. That is slow, memory heavy and fails on big or unusual files.
+`RegexSectionExtractor` scans the source for the sectioning commands instead and returns a
+`HeadingTree` which the parsers read the same way as a `tex2py` tree. It handles :
+    - `\\section`, `\\subsection` ... with starred variants and optional short titles : `\\section*[Short]{Long}`
+    - titles with nested braces : `\\section{The \\emph{Big} Picture}`
+    - comments and `comment`/`verbatim` environments, which are skipped.
+    - `\\input`/`\\include`, which are resolved through a `read_tex` callable when one is given.
+
+Which extractor the parsers use is set by `Config.section_extractor`.
+"""
+import os
+import re
+from typing import Callable,List
+
+SECTION_EXTRACTOR_TEX2PY = 'tex2py'
+SECTION_EXTRACTOR_REGEX = 'regex'
+SECTION_EXTRACTORS = [SECTION_EXTRACTOR_TEX2PY,SECTION_EXTRACTOR_REGEX]
+
+# Sectioning commands from the highest to the lowest level.
+HEADING_LEVELS = ['part','chapter','section','subsection','subsubsection']
+MAX_INPUT_DEPTH = 10
+
+# `%` up to the end of the line unless the `%` is escaped. `\\%` is an escaped backslash followed by a comment.
+COMMENT_PATTERN = re.compile(r'(?<!\\)((?:\\\\)*)%[^\n]*')
+SKIPPED_ENVIRONMENT_PATTERN = re.compile(r'\\begin\{(comment|verbatim\*?|lstlisting|minted)\}.*?\\end\{\1\}',re.DOTALL)
+HEADING_PATTERN = re.compile(r'\\(%s)\b\s*(\*?)\s*(?:\[[^\]]*\]\s*)?\{'%'|'.join(HEADING_LEVELS))
+INPUT_PATTERN = re.compile(r'\\(?:input|include)\b\s*(?:\{([^}]*)\}|([^\s{}\\]+))')
+WHITESPACE_PATTERN = re.compile(r'\s+')
+BRACE_PATTERN = re.compile(r'(?<!\\)[{}]')
+
+
+def strip_comments(tex:str):
+    """strip_comments
+    Removes comments and the `comment`/`verbatim` like environments which can't hold headings.
+    """
+    tex = COMMENT_PATTERN.sub(r'\1',tex)
+    return SKIPPED_ENVIRONMENT_PATTERN.sub('',tex)
+
+
+def read_braced(tex:str,start:int):
+    """read_braced
+    Reads the group opened by the `{` right before `start` taking nested braces into account.
+    :return: Tuple(str,int) : contents of the group and the index after its closing brace. None if it is never closed.
+    """
+    depth = 1
+    position = start
+    while depth > 0:
+        next_brace = BRACE_PATTERN.search(tex,position)
+        if next_brace is None:
+            return None
+        depth += 1 if next_brace.group() == '{' else -1
+        position = next_brace.end()
+    return tex[start:position-1],position
+
+
+def input_file_name(input_match):
+    file_name = (input_match.group(1) or input_match.group(2)).strip()
+    if not file_name.endswith('.tex'):
+        file_name+='.tex'
+    return file_name
+
+
+def disk_tex_reader(root_dir):
+    """disk_tex_reader
+    `read_tex` resolving `\\input`/`\\include` file names relative to `root_dir` like latex does.
+    """
+    def read_tex(file_name):
+        file_path = os.path.join(root_dir,file_name)
+        if not os.path.isfile(file_path):
+            return None
+        with open(file_path,'rb') as f:
+            return f.read().decode('utf-8',errors='replace')
+    return read_tex
+
+
+class HeadingNode:
+    """HeadingNode
+    A heading found in the tex source. Reads like a node of a `tex2py` tree : `str(node)`, `node.string` and `node.subsections`.
+    """
+    def __init__(self,level,string,starred=False):
+        self.level = level
+        self.string = string
+        self.starred = starred
+        self.subsections = []
+
+    def __str__(self):
+        return self.string
+
+    def __repr__(self):
+        return '%s(%s,%s)'%(self.__class__.__name__,self.level,self.string)
+
+
+class HeadingTree:
+    """HeadingTree
+    Headings of the highest level present in a document (`branches`) each with the headings of
+    the next level present under them (`subsections`). Reads like the root of a `tex2py` tree.
+    """
+    def __init__(self,headings:List[HeadingNode]):
+        self.branches = []
+        levels = sorted(set(HEADING_LEVELS.index(heading.level) for heading in headings))
+        if len(levels) == 0:
+            return
+        top_level = HEADING_LEVELS[levels[0]]
+        sub_level = HEADING_LEVELS[levels[1]] if len(levels) > 1 else None
+        for heading in headings:
+            if heading.level == top_level:
+                self.branches.append(heading)
+            elif heading.level == sub_level and len(self.branches) > 0:
+                self.branches[-1].subsections.append(heading)
+
+    def __iter__(self):
+        return iter(self.branches)
+
+
+class RegexSectionExtractor:
+    """RegexSectionExtractor
+    Extracts the headings of a tex document with regular expressions.
+
+    :param read_tex: callable taking the file name of an `\\input`/`\\include` and returning its source or None.
+                     The inputs are not followed when None.
+    """
+    def __init__(self,read_tex:Callable[[str],str]=None):
+        self.read_tex = read_tex
+
+    def iter_headings(self,tex:str,input_stack=()):
+        """iter_headings
+        Yields the `HeadingNode`s of `tex` in document order. The headings of an input file take the place of its `\\input`.
+        :param input_stack: names of the files being input to reach `tex`. Files including themselves are skipped. 
+        """
+        tex = strip_comments(tex)
+        position = 0
+        while True:
+            heading_match = HEADING_PATTERN.search(tex,position)
+            input_match = None
+            if self.read_tex is not None and len(input_stack) < MAX_INPUT_DEPTH:
+                input_match = INPUT_PATTERN.search(tex,position,heading_match.start() if heading_match else len(tex))
+            if input_match is not None:
+                file_name = input_file_name(input_match)
+                input_tex = None if file_name in input_stack else self.read_tex(file_name)
+                if input_tex is not None:
+                    yield from self.iter_headings(input_tex,input_stack=input_stack+(file_name,))
+                position = input_match.end()
+                continue
+            if heading_match is None:
+                return
+            braced = read_braced(tex,heading_match.end())
+            if braced is None:
+                return
+            title,position = braced
+            yield HeadingNode(heading_match.group(1),WHITESPACE_PATTERN.sub(' ',title).strip(),starred=heading_match.group(2) == '*')
+
+    def extract(self,tex:str) -> HeadingTree:
+        return HeadingTree(list(self.iter_headings(tex)))
+
+    def extract_from_file(self,tex_path) -> HeadingTree:
+        with open(tex_path,'rb') as f:
+            return self.extract(f.read().decode('utf-8',errors='replace'))
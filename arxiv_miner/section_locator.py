@@ -0,0 +1,239 @@
+"""
+Section locator working on offsets.
+
+`SingleDocumentLatexParser.collate_sections` used to find every heading with `split_match`.
+That is a `str.split` of the whole remaining text for every prefix tried, followed by a re-join
+of the pieces after the heading, so every heading copied the rest of the document.
+`SectionLocator` gets the same results without rebuilding the text:
+
+    - The text left after each located heading is tracked as live segments of the original text.
+      It is only sliced when a section's text is handed out.
+    - Prefixes of a heading are searched with `str.find` on the original text from the current
+      position. The search stops at the first live occurrence instead of splitting the whole text.
+      The last result of every search is kept so a prefix which isn't in the rest of the text is 
+      never searched for again.
+    - When `pyahocorasick` is installed, one Aho-Corasick scan over the text for all prefixes of all 
+      headings finds the first occurrence of each prefix up front. Prefixes which don't occur 
+      then cost nothing, which is where most of the time of `split_match` went on large papers.
+
+`str.split(sep)` followed by `''.join(parts[1:])` keeps the text after the first `sep` but drops
+every later occurrence of `sep` as well. The dropped occurrences are removed from the live segments.
+Removals glue the text around them together, which can form matches for later headings
+that aren't in the original text. These are looked for around each join.
+"""
+from bisect import bisect_left,bisect_right
+from typing import List
+from .latex_parser import split_candidates
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+
+def find_first_occurrences(text:str,patterns:List[str]):
+    """find_first_occurrences
+    One Aho-Corasick scan of `text` for all `patterns`. Needs `pyahocorasick`.
+    :returns dict : pattern -> start index of its first occurrence. Patterns which don't occur are left out.
+    """
+    automaton = ahocorasick.Automaton()
+    for pattern in patterns:
+        automaton.add_word(pattern,pattern)
+    automaton.make_automaton()
+    first_occurrences = {}
+    for end_index,pattern in automaton.iter(text):
+        if pattern not in first_occurrences:
+            first_occurrences[pattern] = end_index-len(pattern)+1
+    return first_occurrences
+
+
+class SectionLocator:
+    """SectionLocator
+    Splits `text` at the headings given to `locate` one after the other exactly the way repeated
+    calls to `split_match` followed by a re-join of the pieces after the heading do.
+
+    :param text: the text of the document
+    :param headings: all headings which will be located.
+    :param split_upto: refer `split_match`
+    :param split_bins: refer `split_match`
+    """
+    def __init__(self,text:str,headings:List[str],split_upto=0.5,split_bins=10):
+        self.text = text
+        self.split_upto = split_upto
+        self.split_bins = split_bins
+        self.candidates = {}
+        for heading in headings:
+            if heading not in self.candidates:
+                self.candidates[heading] = [
+                    candidate for candidate in split_candidates(heading,split_upto=split_upto,split_bins=split_bins) \
+                        if candidate != ''
+                ]
+        # pattern -> (position,start) : `start` is the first occurrence of the pattern in `text` at or after `position`. -1 if none.
+        self.find_cache = {}
+        if ahocorasick is not None:
+            patterns = list(set(candidate for candidates in self.candidates.values() for candidate in candidates))
+            if len(patterns) > 0:
+                first_occurrences = find_first_occurrences(text,patterns)
+                for pattern in patterns:
+                    self.find_cache[pattern] = (0,first_occurrences.get(pattern,-1))
+        # The remaining text is made of these live segments of `text`. [start,end) pairs sorted by start.
+        self.segment_starts = [0]
+        self.segment_ends = [len(text)]
+
+    def _find(self,pattern,position):
+        """_find
+        `self.text.find(pattern,position)` reusing the result of the last search for `pattern`.
+        """
+        if pattern in self.find_cache:
+            cached_position,cached_start = self.find_cache[pattern]
+            if position >= cached_position and (cached_start == -1 or position <= cached_start):
+                return cached_start
+        start = self.text.find(pattern,position)
+        self.find_cache[pattern] = (position,start)
+        return start
+
+    ############ Live Segment Helpers ############
+
+    def _segment_index(self,position):
+        """_segment_index
+        Index of the last segment starting at or before `position`. -1 if none.
+        """
+        return bisect_right(self.segment_starts,position)-1
+
+    def _is_live(self,start,end):
+        segment = self._segment_index(start)
+        return segment >= 0 and end <= self.segment_ends[segment]
+
+    def _slice(self,start,end):
+        """_slice
+        The remaining text between the `text` positions `start` and `end`.
+        """
+        pieces = []
+        segment = max(self._segment_index(start),0)
+        while segment < len(self.segment_starts) and self.segment_starts[segment] < end:
+            piece_start = max(start,self.segment_starts[segment])
+            piece_end = min(end,self.segment_ends[segment])
+            if piece_start < piece_end:
+                pieces.append(self.text[piece_start:piece_end])
+            segment+=1
+        return ''.join(pieces)
+
+    def _delete(self,start,end):
+        """_delete
+        Remove the `text` positions [start,end) from the remaining text.
+        """
+        first = bisect_right(self.segment_ends,start) # first segment ending after `start`
+        last = bisect_left(self.segment_starts,end) # segments before this start before `end`
+        if first >= last:
+            return
+        new_starts,new_ends = [],[]
+        if self.segment_starts[first] < start:
+            new_starts.append(self.segment_starts[first])
+            new_ends.append(start)
+        if self.segment_ends[last-1] > end:
+            new_starts.append(end)
+            new_ends.append(self.segment_ends[last-1])
+        self.segment_starts[first:last] = new_starts
+        self.segment_ends[first:last] = new_ends
+
+    def _live_positions_before(self,segment,count,lower_bound):
+        """_live_positions_before
+        `text` positions of up to `count` live characters ending with `segment`, none below `lower_bound`. In order.
+        """
+        positions = []
+        while segment >= 0 and len(positions) < count:
+            start = max(self.segment_starts[segment],lower_bound)
+            position = self.segment_ends[segment]-1
+            while position >= start and len(positions) < count:
+                positions.append(position)
+                position-=1
+            if start == lower_bound:
+                break
+            segment-=1
+        positions.reverse()
+        return positions
+
+    def _live_positions_after(self,segment,count):
+        positions = []
+        while segment < len(self.segment_starts) and len(positions) < count:
+            position = self.segment_starts[segment]
+            while position < self.segment_ends[segment] and len(positions) < count:
+                positions.append(position)
+                position+=1
+            segment+=1
+        return positions
+
+    ############ ############
+
+    def _first_occurrence(self,pattern,cursor):
+        """_first_occurrence
+        First occurrence of `pattern` in the remaining text starting at or after the `text` position `cursor`.
+        :returns (start,end) : `text` positions of the first and one past the last character. None if absent.
+        """
+        length = len(pattern)
+        best = None
+        # Occurrences present in `text` which weren't touched by deletions.
+        start = self._find(pattern,cursor)
+        while start != -1:
+            if self._is_live(start,start+length):
+                best = (start,start+length)
+                break
+            start = self._find(pattern,start+1)
+        if length == 1:
+            return best
+        # Occurrences which span the join of two live segments.
+        segment = max(self._segment_index(cursor),0)
+        while segment < len(self.segment_starts)-1:
+            if self.segment_ends[segment] <= cursor:
+                segment+=1
+                continue
+            before = self._live_positions_before(segment,length-1,cursor)
+            if len(before) == 0 or (best is not None and before[0] > best[0]):
+                break
+            after = self._live_positions_after(segment+1,length-1)
+            positions = before+after
+            window = ''.join(self.text[position] for position in positions)
+            found = window.find(pattern)
+            while found != -1 and found < len(before):
+                if found+length > len(before):
+                    if best is None or positions[found] < best[0]:
+                        best = (positions[found],positions[found+length-1]+1)
+                    break
+                found = window.find(pattern,found+1)
+            segment+=1
+        return best
+
+    def locate(self,heading):
+        """locate
+        Splits the remaining text at `heading` like `split_match`.
+        :returns str : the text before the heading or None if no prefix of the heading was found.
+                       On a match, the remaining text becomes the text after the heading with
+                       all later occurrences of the matched prefix removed.
+        """
+        if heading not in self.candidates:
+            raise KeyError(heading)
+        cursor = self.segment_starts[0] if len(self.segment_starts) > 0 else len(self.text)
+        for candidate in self.candidates[heading]:
+            occurrence = self._first_occurrence(candidate,cursor)
+            if occurrence is not None:
+                break
+        else:
+            return None
+        portion_before_section = self._slice(cursor,occurrence[0])
+        # Like `str.split`, later occurrences are found left to right without overlapping in the current text.
+        removals = [(cursor,occurrence[1])]
+        search_from = occurrence[1]
+        while True:
+            removal = self._first_occurrence(candidate,search_from)
+            if removal is None:
+                break
+            removals.append(removal)
+            search_from = removal[1]
+        for start,end in removals:
+            self._delete(start,end)
+        return portion_before_section
+
+    def remainder(self):
+        """remainder
+        :returns str : the remaining text.
+        """
+        return self._slice(0,len(self.text))
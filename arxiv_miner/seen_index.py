@@ -0,0 +1,298 @@
+"""
+Indexes of arXiv ids which were already scraped.
+
+The `ScrapingEngine` consults a `SeenIdIndex` before it reaches out to the database
+so that ids it has seen before never cost a network round trip.
+    - `ExpiringSeenIdIndex` : In memory `ExpiringDict`. Lost on restart.
+    - `DiskSeenIdIndex` : Sorted array of ids encoded as integers + Bloom filter. Memory mapped from disk and survives restarts.
+"""
+import os
+import mmap
+import array
+import bisect
+from threading import RLock
+from typing import Iterable
+from expiringdict import ExpiringDict
+from .utils import dir_exists
+
+UINT64_MASK = (1 << 64) - 1
+ID_NUMBER_BASE = 100000 # Arxiv ids carry up to 5 digits after the `YYMM.`
+
+def encode_arxiv_id(paper_id:str):
+    """encode_arxiv_id
+    Encodes new style arxiv ids (`YYMM.NNNN` / `YYMM.NNNNN`, optionally with a `vN` suffix) as
+    `YYMM*100000 + NNNNN`. Returns None for ids which cannot be encoded (old style ids like `cs/0101001`).
+    """
+    parts = paper_id.split('v')[0].split('.')
+    if len(parts) != 2 or not parts[0].isdigit() or not parts[1].isdigit():
+        return None
+    if len(parts[0]) != 4 or len(parts[1]) > 5:
+        return None
+    return int(parts[0])*ID_NUMBER_BASE + int(parts[1])
+
+def decode_arxiv_id(encoded_id:int):
+    yymm,number = divmod(encoded_id,ID_NUMBER_BASE)
+    # Arxiv moved from 4 to 5 digit numbers in January 2015
+    if yymm < 1501:
+        return '%04d.%04d'%(yymm,number)
+    return '%04d.%05d'%(yymm,number)
+
+
+class SeenIdIndex:
+    """SeenIdIndex
+    Interface of the index of arxiv ids that were already scraped.
+    """
+    def __contains__(self,paper_id:str) -> bool:
+        raise NotImplementedError()
+
+    def add(self,paper_id:str):
+        raise NotImplementedError()
+
+    def add_many(self,paper_ids:Iterable[str]):
+        for paper_id in paper_ids:
+            self.add(paper_id)
+
+    def flush(self):
+        """flush
+        Persist whatever is held in memory.
+        """
+        pass
+
+
+class ExpiringSeenIdIndex(SeenIdIndex):
+    """ExpiringSeenIdIndex
+    `SeenIdIndex` over an `ExpiringDict`. This is what the `ScrapingEngine` used before
+    the index was pluggable.
+    """
+    def __init__(self,cache:ExpiringDict):
+        self.cache = cache
+
+    def __contains__(self,paper_id):
+        return paper_id in self.cache
+
+    def add(self,paper_id):
+        self.cache[paper_id] = 1
+
+
+class BloomFilter:
+    """BloomFilter
+    Bloom filter over integer keys with double hashing.
+    :param num_bits: size of the bit array
+    :param num_hashes: number of bit positions set per key
+    """
+    def __init__(self,num_bits,num_hashes=7,bits=None):
+        # Whole bytes so that the filter reloads from disk with the same size.
+        self.num_bits = max(((num_bits+7)//8)*8,8)
+        self.num_hashes = num_hashes
+        if bits is None:
+            bits = bytearray((self.num_bits+7)//8)
+        self.bits = bits
+
+    @classmethod
+    def for_capacity(cls,capacity,bits_per_item=10,num_hashes=7):
+        return cls(capacity*bits_per_item,num_hashes=num_hashes)
+
+    def _positions(self,key:int):
+        h1 = (key * 0x9E3779B97F4A7C15) & UINT64_MASK
+        h2 = (((key ^ (key >> 31)) * 0xBF58476D1CE4E5B9) & UINT64_MASK) | 1
+        for i in range(self.num_hashes):
+            yield ((h1 + i*h2) & UINT64_MASK) % self.num_bits
+
+    def add(self,key:int):
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= (1 << (pos & 7))
+
+    def __contains__(self,key:int):
+        for pos in self._positions(key):
+            if not self.bits[pos >> 3] & (1 << (pos & 7)):
+                return False
+        return True
+
+
+class DiskSeenIdIndex(SeenIdIndex):
+    """DiskSeenIdIndex
+    Persistent `SeenIdIndex` stored in `index_dir` as :
+        - `ids.bin` : sorted uint64 array of encoded ids. Memory mapped at startup.
+        - `bloom.bin` : Bloom filter over the ids in `ids.bin` and the pending ids.
+        - `pending.log` : ids added since the last merge. Appended on every `add` so restarts don't lose them.
+
+    Lookups check the Bloom filter first so that unseen ids are rejected in O(1) without touching the array.
+    Pending ids are merged into `ids.bin` on `flush` or once `merge_threshold` of them pile up.
+
+    :param index_dir: directory holding the index files.
+    :param merge_threshold: number of pending ids after which they get merged into the sorted array.
+    """
+    ids_file_name = 'ids.bin'
+    bloom_file_name = 'bloom.bin'
+    pending_file_name = 'pending.log'
+    bloom_bits_per_item = 10
+    bloom_hashes = 7
+    min_bloom_capacity = 100000
+
+    def __init__(self,index_dir,merge_threshold=50000):
+        self.index_dir = index_dir
+        self.merge_threshold = merge_threshold
+        self.lock = RLock()
+        if not dir_exists(index_dir):
+            os.makedirs(index_dir)
+        self._ids_file = None
+        self._ids_mmap = None
+        self.ids = array.array('Q')
+        self.pending = set()
+        self.unencodable = set() # Old style ids are kept in memory and `pending.log`.
+        self._map_ids()
+        self._load_pending()
+        self._load_bloom()
+        self._pending_log = open(self.pending_path,'a')
+
+    @property
+    def ids_path(self):
+        return os.path.join(self.index_dir,self.ids_file_name)
+
+    @property
+    def bloom_path(self):
+        return os.path.join(self.index_dir,self.bloom_file_name)
+
+    @property
+    def pending_path(self):
+        return os.path.join(self.index_dir,self.pending_file_name)
+
+    def __len__(self):
+        return len(self.ids) + len(self.pending) + len(self.unencodable)
+
+    def _map_ids(self):
+        self._unmap_ids()
+        if not dir_exists(self.ids_path) or os.path.getsize(self.ids_path) == 0:
+            self.ids = array.array('Q')
+            return
+        self._ids_file = open(self.ids_path,'rb')
+        self._ids_mmap = mmap.mmap(self._ids_file.fileno(),0,access=mmap.ACCESS_READ)
+        self.ids = memoryview(self._ids_mmap).cast('Q')
+
+    def _unmap_ids(self):
+        if isinstance(self.ids,memoryview):
+            self.ids.release()
+        if self._ids_mmap is not None:
+            self._ids_mmap.close()
+            self._ids_file.close()
+        self._ids_mmap = None
+        self._ids_file = None
+
+    def _load_pending(self):
+        if not dir_exists(self.pending_path):
+            return
+        with open(self.pending_path,'r') as f:
+            for line in f:
+                paper_id = line.strip()
+                if paper_id != '':
+                    self._add_to_memory(paper_id)
+
+    def _new_bloom(self):
+        capacity = max(self.min_bloom_capacity,2*(len(self.ids)+len(self.pending)))
+        return BloomFilter.for_capacity(capacity,bits_per_item=self.bloom_bits_per_item,num_hashes=self.bloom_hashes)
+
+    def _load_bloom(self):
+        bloom = None
+        if dir_exists(self.bloom_path):
+            with open(self.bloom_path,'rb') as f:
+                bits = bytearray(f.read())
+            bloom = BloomFilter(len(bits)*8,num_hashes=self.bloom_hashes,bits=bits)
+        if bloom is None or len(bloom.bits)*8 < len(self.ids)*self.bloom_bits_per_item:
+            # Missing or outgrown bloom filter. Rebuild it from the ids.
+            bloom = self._new_bloom()
+            for encoded_id in self.ids:
+                bloom.add(encoded_id)
+        for encoded_id in self.pending:
+            bloom.add(encoded_id)
+        self.bloom = bloom
+
+    def _add_to_memory(self,paper_id):
+        encoded_id = encode_arxiv_id(paper_id)
+        if encoded_id is None:
+            self.unencodable.add(paper_id)
+            return None
+        self.pending.add(encoded_id)
+        return encoded_id
+
+    def _in_sorted_ids(self,encoded_id):
+        index = bisect.bisect_left(self.ids,encoded_id)
+        return index < len(self.ids) and self.ids[index] == encoded_id
+
+    def __contains__(self,paper_id):
+        encoded_id = encode_arxiv_id(paper_id)
+        with self.lock:
+            if encoded_id is None:
+                return paper_id in self.unencodable
+            if encoded_id not in self.bloom:
+                return False
+            return encoded_id in self.pending or self._in_sorted_ids(encoded_id)
+
+    def add(self,paper_id):
+        with self.lock:
+            if paper_id in self:
+                return
+            encoded_id = self._add_to_memory(paper_id)
+            if encoded_id is not None:
+                self.bloom.add(encoded_id)
+            self._pending_log.write(paper_id+'\n')
+            self._pending_log.flush()
+            if len(self.pending) >= self.merge_threshold:
+                self.flush()
+
+    def flush(self):
+        """flush
+        Merges the pending ids into the sorted id array and rewrites the Bloom filter.
+        """
+        with self.lock:
+            if len(self.pending) == 0:
+                return
+            merged = array.array('Q',sorted(set(self.ids).union(self.pending)))
+            self._write_atomic(self.ids_path,merged.tobytes())
+            self.pending = set()
+            self._map_ids()
+            self.bloom = self._new_bloom()
+            for encoded_id in self.ids:
+                self.bloom.add(encoded_id)
+            self._write_atomic(self.bloom_path,bytes(self.bloom.bits))
+            # Everything pending is now in `ids.bin`
+            self._pending_log.close()
+            self._pending_log = open(self.pending_path,'w')
+            for paper_id in self.unencodable:
+                self._pending_log.write(paper_id+'\n')
+            self._pending_log.flush()
+
+    @staticmethod
+    def _write_atomic(file_path,data:bytes):
+        tmp_path = file_path+'.tmp'
+        with open(tmp_path,'wb') as f:
+            f.write(data)
+        os.replace(tmp_path,file_path)
+
+    def close(self):
+        with self.lock:
+            self.flush()
+            self._pending_log.close()
+            self._unmap_ids()
+
+    def iter_ids(self):
+        for encoded_id in self.ids:
+            yield decode_arxiv_id(encoded_id)
+        for encoded_id in self.pending:
+            yield decode_arxiv_id(encoded_id)
+        for paper_id in self.unencodable:
+            yield paper_id
+
+    def update_from_stream(self,paper_id_stream:Iterable[str]):
+        """update_from_stream
+        Adds ids from a stream like `ArxivDatabase.paper_id_stream`. Only new ids are added
+        so the index can be rebuilt incrementally against a database.
+        :return: [int] number of ids added
+        """
+        num_added = 0
+        for paper_id in paper_id_stream:
+            if paper_id in self:
+                continue
+            self.add(paper_id)
+            num_added+=1
+        self.flush()
+        return num_added
@@ -1,6 +1,6 @@
-import json
 from typing import List
 from ..exception import SectionSerialisationException
+from ..utils import save_json_to_file
 import os 
 from .constants import *
 
@@ -8,6 +8,8 @@ class Section():
     """Section 
     Section will contain subsections which are of type Section
     """
+    __slots__ = ('name','subsections','text')
+
     def __init__(self,name=None):
         # Core Attributes
         self.name = self.__class__.__name__ if name is None else name
@@ -72,8 +74,7 @@ class Section():
         return generated_obj
     
     def save_to_file(self,file_path):
-        with open(file_path,'w') as f:
-            json.dump(self.to_json(),f)
+        save_json_to_file(self.to_json(),file_path)
 
     def _get_hierarchy(self):
         hierarchy = []
@@ -98,6 +99,8 @@ class SemanticParsedSection(Section):
     """SemanticParsedSection 
     Helps Parse and Match Sections. 
     """
+    __slots__ = ('text_match_tokens','matched','required')
+
     def __init__(self, name=None,text_match_tokens=[],required=False):
         super().__init__(name=name)
         self.text_match_tokens = text_match_tokens
@@ -162,6 +165,8 @@ class Dataset(SemanticParsedSection):
 
 
 class ArxivDocument(Section):
+    __slots__ = ('id_val','title','published','url')
+
     def __init__(self, 
                 name=None,
                 id_val=None,
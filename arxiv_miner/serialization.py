@@ -0,0 +1,240 @@
+"""
+JSON serialization of the records.
+
+Every JSON file and Elasticsearch request goes through a `JSONCodec` :
+    - `stdlib` : the `json` module. Always available.
+    - `orjson` : needs `orjson`. Many times faster on the large section trees of the records.
+    - `msgspec` : needs `msgspec`. As fast as `orjson` and decodes typed schemas (Refer `decode_record`).
+
+`get_codec` picks the codec named by `Config.json_codec` (`ARXIV_MINER_JSON_CODEC`). The default `auto`
+takes the fastest installed one. Documents the fast codecs can't encode or decode (eg. latex text holding
+lone surrogates) go through `stdlib`.
+
+`decode_record` decodes JSON straight into records with typed `msgspec` schemas instead of
+building the dict of the document first. Other codecs decode the dict and call `from_json`.
+The schemas forbid unknown fields so every codec rejects the same documents.
+"""
+import json
+import datetime
+from typing import Any,Dict,List,Optional
+from .config import Config
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+CODEC_STDLIB = 'stdlib'
+CODEC_ORJSON = 'orjson'
+CODEC_MSGSPEC = 'msgspec'
+CODEC_AUTO = 'auto'
+CODECS = [CODEC_STDLIB,CODEC_ORJSON,CODEC_MSGSPEC]
+# Raised by `loads` of the codecs on malformed JSON.
+DECODE_ERRORS = (ValueError,) if msgspec is None else (ValueError,msgspec.DecodeError)
+
+
+def json_default(obj):
+    if isinstance(obj,(datetime.datetime,datetime.date)):
+        return obj.isoformat()
+    if hasattr(obj,'to_json'):
+        return obj.to_json()
+    raise TypeError("Object of type %s is not JSON serializable"%type(obj).__name__)
+
+
+class JSONCodec:
+    """JSONCodec
+    Base class of the codecs. `dumps` gives utf-8 `bytes` and `loads` takes `bytes` or `str`.
+    """
+    name = None
+
+    def dumps(self,obj) -> bytes:
+        raise NotImplementedError()
+
+    def loads(self,data):
+        raise NotImplementedError()
+
+
+class StdlibCodec(JSONCodec):
+    name = CODEC_STDLIB
+
+    def dumps(self,obj):
+        return json.dumps(obj,default=json_default).encode('utf-8')
+
+    def loads(self,data):
+        return json.loads(data)
+
+
+class OrjsonCodec(JSONCodec):
+    name = CODEC_ORJSON
+
+    def __init__(self):
+        if orjson is None:
+            raise ImportError("OrjsonCodec Needs orjson")
+        self.fallback = StdlibCodec()
+
+    def dumps(self,obj):
+        try:
+            return orjson.dumps(obj,default=json_default,option=orjson.OPT_NON_STR_KEYS)
+        except TypeError: # orjson.JSONEncodeError. Lone surrogates or integers over 64 bits.
+            return self.fallback.dumps(obj)
+
+    def loads(self,data):
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            return self.fallback.loads(data)
+
+
+class MsgspecCodec(JSONCodec):
+    name = CODEC_MSGSPEC
+
+    def __init__(self):
+        if msgspec is None:
+            raise ImportError("MsgspecCodec Needs msgspec")
+        self.encoder = msgspec.json.Encoder(enc_hook=json_default)
+        self.decoder = msgspec.json.Decoder()
+        self.fallback = StdlibCodec()
+
+    def dumps(self,obj):
+        try:
+            return self.encoder.encode(obj)
+        except (TypeError,msgspec.EncodeError,UnicodeEncodeError):
+            return self.fallback.dumps(obj)
+
+    def loads(self,data):
+        try:
+            return self.decoder.decode(data)
+        except msgspec.DecodeError:
+            return self.fallback.loads(data)
+
+
+codecs = {}
+
+def get_codec(codec_name=None) -> JSONCodec:
+    """get_codec
+    :param codec_name: one of `CODECS` or `auto`. Defaults to `Config.json_codec`.
+    """
+    if codec_name is None:
+        codec_name = Config.json_codec
+    if codec_name == CODEC_AUTO:
+        codec_name = CODEC_ORJSON if orjson is not None else CODEC_MSGSPEC if msgspec is not None else CODEC_STDLIB
+    if codec_name not in codecs:
+        codec_classes = {CODEC_STDLIB:StdlibCodec,CODEC_ORJSON:OrjsonCodec,CODEC_MSGSPEC:MsgspecCodec}
+        if codec_name not in codec_classes:
+            raise ValueError("JSON Codec %s Not In %s"%(codec_name,str(CODECS)))
+        codecs[codec_name] = codec_classes[codec_name]()
+    return codecs[codec_name]
+
+
+def dumps(obj) -> bytes:
+    return get_codec().dumps(obj)
+
+
+def loads(data):
+    return get_codec().loads(data)
+
+
+def save_json(obj,file_path):
+    with open(file_path,'wb') as f:
+        f.write(dumps(obj))
+
+
+def load_json(file_path):
+    with open(file_path,'rb') as f:
+        return loads(f.read())
+
+
+# Typed schemas of the records : (name,type,default) or (name,type) for required fields. Fields are in the
+# order of the constructor arguments of the record so that a decoded schema builds the record with positional arguments.
+RECORD_SCHEMA_FIELDS = {
+    'ArxivIdentity':[
+        ('identity',Optional[str],None),
+        ('url',Optional[str],None),
+        ('title',Optional[str],None),
+        ('abstract',Optional[str],None),
+        ('categories',Optional[List[str]],None),
+        ('published',Optional[str],None),
+        ('updated',Optional[str],None),
+        ('authors',Optional[List[str]],None),
+        ('affiliation',Any,None),
+        ('journal_reference',Optional[str],None),
+        ('version',Optional[int],None),
+        ('created_on',Optional[str],None),
+    ],
+    'ArxivPaperStatus':[
+        ('mined',bool,False),
+        ('created_on',Optional[str],None),
+        ('scraped',bool,False),
+        ('mining',bool,False),
+        ('updated_on',Optional[str],None),
+        ('worker_id',Optional[str],None),
+        ('leased_until',Optional[str],None),
+        ('claim_count',int,0),
+        ('quarantined',bool,False),
+        ('quarantine_reason',Optional[str],None),
+    ],
+    # The nested records stay JSON until they are accessed. Refer `record.NestedRecord`
+    'ArxivRecord':[
+        ('identity','ArxivIdentity'),
+        ('paper_processing_meta',Optional[Dict[str,Any]],None),
+        ('latex_parsed_document',Optional[Dict[str,Any]],None),
+        ('latex_parsing_result',Optional[Dict[str,Any]],None),
+        ('created_on',Optional[str],None),
+    ],
+}
+# Fields holding nested records. Their empty JSON is read as no record, like `ArxivRecord.from_json` does.
+NESTED_RECORD_FIELDS = {'paper_processing_meta','latex_parsed_document','latex_parsing_result'}
+record_schemas = {} # record class -> `msgspec.Struct` type
+schema_record_classes = {} # `msgspec.Struct` type -> record class
+typed_decoders = {}
+
+
+def record_schema(record_class):
+    if record_class not in record_schemas:
+        schema_fields = []
+        for field_spec in RECORD_SCHEMA_FIELDS[record_class.__name__]:
+            field_type = field_spec[1]
+            if isinstance(field_type,str): # Schema of a nested record
+                from . import record as record_module
+                field_type = record_schema(getattr(record_module,field_type))
+            schema_fields.append((field_spec[0],field_type)+tuple(field_spec[2:]))
+        schema = msgspec.defstruct(record_class.__name__+'Schema',schema_fields,forbid_unknown_fields=True)
+        record_schemas[record_class] = schema
+        schema_record_classes[schema] = record_class
+    return record_schemas[record_class]
+
+
+def record_from_schema(decoded):
+    values = []
+    for field_name,value in zip(decoded.__struct_fields__,msgspec.structs.astuple(decoded)):
+        if type(value) in schema_record_classes:
+            value = record_from_schema(value)
+        elif field_name in NESTED_RECORD_FIELDS and not value:
+            value = None
+        values.append(value)
+    return schema_record_classes[type(decoded)](*values)
+
+
+def decode_record(data,record_class):
+    """decode_record
+    Decodes the JSON `data` of a record into a `record_class` object.
+    With the `msgspec` codec the records of `RECORD_SCHEMA_FIELDS` are decoded with their typed schema.
+    Documents which don't fit the schema and all other records are decoded with `record_class.from_json`.
+    """
+    codec = get_codec()
+    if codec.name == CODEC_MSGSPEC and record_class.__name__ in RECORD_SCHEMA_FIELDS:
+        if record_class not in typed_decoders:
+            typed_decoders[record_class] = msgspec.json.Decoder(record_schema(record_class))
+        try:
+            return record_from_schema(typed_decoders[record_class].decode(data))
+        except msgspec.DecodeError: # Includes `msgspec.ValidationError`
+            pass
+    return record_class.from_json(codec.loads(data))
+
+
+def load_record(file_path,record_class):
+    with open(file_path,'rb') as f:
+        return decode_record(f.read(),record_class)
@@ -0,0 +1,144 @@
+"""
+Stores of latex source tar files.
+
+`SourceHarvestingEngine` collects the sources of many papers ahead of mining. A `SourceStore`
+holds such a harvest so that `ArxivPaper.download_latex` reads the source from it and only
+goes to arxiv for papers which aren't held. Sources downloaded from arxiv are written through
+to the store, so the store fills up as papers are mined.
+    - `LocalSourceStore` : directory tree sharded by the first four digits of the id (the `yymm` of the paper).
+    - `S3SourceStore` : the same layout in an S3 compatible bucket. Needs `boto3`.
+
+`get_source_store` builds either from a URI : `s3://bucket/prefix` or a directory path.
+"""
+import os
+import re
+import shutil
+import tempfile
+try:
+    import boto3
+    from botocore.exceptions import ClientError
+except ImportError:
+    boto3 = None
+
+SOURCE_SUFFIX = '.tar.gz'
+S3_URI_PATTERN = re.compile(r'^s3://([^/]+)/?(.*)$')
+
+
+def source_key(paper_id:str):
+    """source_key
+    Path of the source of `paper_id` within a store. Eg. `1904.03367` -> `1904/1904.03367.tar.gz`
+    and `hep-th/9901001` -> `9901/hep-th_9901001.tar.gz`.
+    """
+    shard = re.sub(r'[^0-9]','',paper_id)[:4]
+    return '/'.join([shard,paper_id.replace('/','_')+SOURCE_SUFFIX])
+
+
+class SourceStore:
+    """SourceStore
+    Base class of the stores.
+        - `contains` : whether the source of a paper is held.
+        - `fetch` : places a copy of the source at a path. The caller may delete it.
+        - `put` : stores a source tar file.
+    """
+    def contains(self,paper_id) -> bool:
+        raise NotImplementedError()
+
+    def fetch(self,paper_id,destination_path) -> str:
+        """fetch
+        :return: `destination_path` or None when the source isn't held.
+        """
+        raise NotImplementedError()
+
+    def put(self,paper_id,tarball_path):
+        raise NotImplementedError()
+
+
+class LocalSourceStore(SourceStore):
+    """LocalSourceStore
+    :param root_path: directory of the store. Created when it doesn't exist.
+    """
+    def __init__(self,root_path):
+        self.root_path = root_path
+        os.makedirs(root_path,exist_ok=True)
+
+    def source_path(self,paper_id):
+        return os.path.join(self.root_path,*source_key(paper_id).split('/'))
+
+    def contains(self,paper_id):
+        return os.path.isfile(self.source_path(paper_id))
+
+    def fetch(self,paper_id,destination_path):
+        source_path = self.source_path(paper_id)
+        if not os.path.isfile(source_path):
+            return None
+        os.makedirs(os.path.dirname(destination_path),exist_ok=True)
+        # Copied and not linked so that writes to the `destination_path` never change the store's file.
+        file_handle,tmp_path = tempfile.mkstemp(dir=os.path.dirname(destination_path),suffix='.tmp')
+        os.close(file_handle)
+        shutil.copyfile(source_path,tmp_path)
+        os.replace(tmp_path,destination_path)
+        return destination_path
+
+    def put(self,paper_id,tarball_path):
+        source_path = self.source_path(paper_id)
+        os.makedirs(os.path.dirname(source_path),exist_ok=True)
+        file_handle,tmp_path = tempfile.mkstemp(dir=os.path.dirname(source_path),suffix='.tmp')
+        os.close(file_handle)
+        shutil.copyfile(tarball_path,tmp_path)
+        os.replace(tmp_path,source_path)
+
+
+class S3SourceStore(SourceStore):
+    """S3SourceStore
+    :param bucket_name: bucket holding the sources.
+    :param prefix: key prefix of the store in the bucket.
+    :param endpoint_url: endpoint of S3 compatible stores like minio. None for AWS.
+    Credentials are read by `boto3` from the usual `AWS_ACCESS_KEY_ID` and `AWS_SECRET_ACCESS_KEY`.
+    """
+    def __init__(self,bucket_name,prefix='',endpoint_url=None):
+        if boto3 is None:
+            raise ImportError("S3SourceStore Needs boto3")
+        self.bucket_name = bucket_name
+        self.prefix = prefix.strip('/')
+        self.s3_client = boto3.client('s3',endpoint_url=endpoint_url)
+
+    def object_key(self,paper_id):
+        if self.prefix == '':
+            return source_key(paper_id)
+        return '/'.join([self.prefix,source_key(paper_id)])
+
+    @staticmethod
+    def _is_missing(error):
+        return error.response.get('Error',{}).get('Code') in ['404','NoSuchKey','NotFound']
+
+    def contains(self,paper_id):
+        try:
+            self.s3_client.head_object(Bucket=self.bucket_name,Key=self.object_key(paper_id))
+            return True
+        except ClientError as e:
+            if self._is_missing(e):
+                return False
+            raise
+
+    def fetch(self,paper_id,destination_path):
+        os.makedirs(os.path.dirname(destination_path),exist_ok=True)
+        try:
+            self.s3_client.download_file(self.bucket_name,self.object_key(paper_id),destination_path)
+        except ClientError as e:
+            if self._is_missing(e):
+                return None
+            raise
+        return destination_path
+
+    def put(self,paper_id,tarball_path):
+        self.s3_client.upload_file(tarball_path,self.bucket_name,self.object_key(paper_id))
+
+
+def get_source_store(source_store_uri,endpoint_url=None) -> SourceStore:
+    """get_source_store
+    :param source_store_uri: `s3://bucket/prefix` for an `S3SourceStore` or a directory for a `LocalSourceStore`.
+    """
+    s3_match = S3_URI_PATTERN.match(source_store_uri)
+    if s3_match is not None:
+        return S3SourceStore(s3_match.group(1),prefix=s3_match.group(2),endpoint_url=endpoint_url)
+    return LocalSourceStore(source_store_uri)
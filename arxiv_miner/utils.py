@@ -1,7 +1,8 @@
 
 import os
-import json
+import socket
 import datetime
+from . import serialization
 
 def dir_exists(dir_path):
   try:
@@ -11,15 +12,40 @@ def dir_exists(dir_path):
     return False
 
 def load_json_from_file(file_path):
-    with open(file_path,'r') as f:
-        json_file = json.load(f)
-    return json_file
+    return serialization.load_json(file_path)
 
 def save_json_to_file(json_dict,file_path):
-    with open(file_path,'w') as f:
-        json.dump(json_dict,f)
+    serialization.save_json(json_dict,file_path)
+
+def parse_timestamp(timestamp):
+    """parse_timestamp 
+    `datetime` of a timestamp. ISO-8601 timestamps (all the ones the records write) are parsed with 
+    `datetime.fromisoformat`. Only free form timestamps fall back to the much slower `dateparser`.
+    :return: `datetime.datetime` or None when `dateparser` can't make sense of it either.
+    """
+    if isinstance(timestamp,datetime.datetime):
+        return timestamp
+    timestamp = str(timestamp)
+    try:
+        return datetime.datetime.fromisoformat(timestamp)
+    except ValueError:
+        pass
+    if timestamp.endswith('Z'): # `fromisoformat` only takes `Z` from python 3.11
+        try:
+            return datetime.datetime.fromisoformat(timestamp[:-1]+'+00:00')
+        except ValueError:
+            pass
+    # Imported here as importing it takes long.
+    import dateparser
+    return dateparser.parse(timestamp)
 
 def get_date_range_from_today(num_days):
     end_date = datetime.datetime.now()
     start_date = (datetime.datetime.now() - datetime.timedelta(days = num_days))
     return (start_date,end_date)
+
+def get_worker_id():
+    """get_worker_id 
+    Identifier of the current process used when claiming work from the database. 
+    """
+    return '%s-%d'%(socket.gethostname(),os.getpid())
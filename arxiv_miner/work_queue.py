@@ -0,0 +1,178 @@
+"""
+Work queue of papers to mine on top of the status index.
+
+Papers are handed out as leases. `LeaseWorkQueue` claims papers for one worker,
+`LeaseHeartbeat` keeps extending the leases of the papers the worker holds while it
+is alive and `LeaseReaper` returns the papers of dead workers to the pool once their
+leases expire.
+"""
+from collections import deque
+from threading import Thread,Event,Lock
+from .database import ArxivDatabase
+from .record import ArxivRecord,ArxivIdentity
+from .logger import create_logger
+from .utils import get_worker_id
+from .parse_budget import QUARANTINED_ERROR_CLASSES
+
+DEFAULT_LEASE_SECONDS = 3600
+DEFAULT_CLAIM_BATCH_SIZE = 5
+# Papers left `mining` without a lease by miners which predate leases.
+DEFAULT_STALE_SECONDS = 24*3600
+# Papers whose latex went over the parsing budgets or timed out on this many claims are quarantined.
+MAX_PARSE_FAILURE_CLAIMS = 3
+
+
+class LeaseWorkQueue:
+    """LeaseWorkQueue
+    Hands out unmined papers to one worker.
+        - `next` claims `claim_batch_size` papers at a time and returns them one by one.
+        - `heartbeat` renews the leases of all the papers the worker holds.
+        - `complete` marks a paper as done and drops its lease.
+        - `finish` completes a mined paper or quarantines it when its latex keeps going over the parsing budgets.
+        - `abandon` stops renewing the lease of a paper so that the reaper returns it once the lease expires.
+
+    :param database: `ArxivDatabase`
+    :param worker_id: identifier of the worker holding the leases.
+    :param claim_batch_size: number of papers claimed at once
+    :param lease_seconds: lifetime of a lease which isn't renewed.
+    """
+    def __init__(self,\
+                database:ArxivDatabase,\
+                worker_id=None,\
+                claim_batch_size=DEFAULT_CLAIM_BATCH_SIZE,\
+                lease_seconds=DEFAULT_LEASE_SECONDS):
+        self.db = database
+        if worker_id is None:
+            worker_id = get_worker_id()
+        self.worker_id = worker_id
+        self.claim_batch_size = claim_batch_size
+        self.lease_seconds = lease_seconds
+        self.claimed_records = deque()
+        self.held_ids = set() # Claimed and not completed. Includes the paper being mined.
+        self.lock = Lock()
+
+    def next(self) -> ArxivRecord:
+        """next
+        :return: the next claimed `ArxivRecord` or None if there is nothing to mine.
+        """
+        with self.lock:
+            if len(self.claimed_records) == 0:
+                claimed_records = self.db.claim_unmined_papers(\
+                    self.claim_batch_size,self.worker_id,lease_seconds=self.lease_seconds)
+                self.claimed_records.extend(claimed_records)
+                self.held_ids.update(record.identity.identity for record in claimed_records)
+            if len(self.claimed_records) == 0:
+                return None
+            return self.claimed_records.popleft()
+
+    def pending(self):
+        """pending
+        :return: List[ArxivRecord] : papers claimed but not handed out by `next` yet.
+        """
+        with self.lock:
+            return list(self.claimed_records)
+
+    def heartbeat(self):
+        """heartbeat
+        Extend the leases of all held papers by `lease_seconds` from now.
+        :return: [int] number of leases renewed
+        """
+        with self.lock:
+            held_ids = list(self.held_ids)
+        if len(held_ids) == 0:
+            return 0
+        return self.db.renew_leases(held_ids,self.worker_id,self.lease_seconds)
+
+    def complete(self,identity:ArxivIdentity,mined_status:bool):
+        self.db.set_mined(identity,mined_status)
+        with self.lock:
+            self.held_ids.discard(identity.identity)
+
+    def quarantine(self,identity:ArxivIdentity,reason,min_claim_count=0):
+        self.db.quarantine_paper(identity,reason,min_claim_count=min_claim_count)
+        with self.lock:
+            self.held_ids.discard(identity.identity)
+
+    def abandon(self,identity:ArxivIdentity):
+        with self.lock:
+            self.held_ids.discard(identity.identity)
+
+    def finish(self,paper_record:ArxivRecord,mined_status:bool):
+        """finish
+        `complete` the paper unless its latex parsing went over a budget or timed out. Those depend on the 
+        load of the box so the paper is handed back to be retried and only quarantined once it was claimed 
+        `MAX_PARSE_FAILURE_CLAIMS` times.
+        """
+        parsing_result = paper_record.latex_parsing_result
+        if parsing_result is not None and parsing_result.error_class in QUARANTINED_ERROR_CLASSES:
+            self.quarantine(paper_record.identity,parsing_result.error_message,min_claim_count=MAX_PARSE_FAILURE_CLAIMS)
+        else:
+            self.complete(paper_record.identity,mined_status)
+
+    def release_all(self):
+        """release_all
+        Hand back the claimed papers which were not mined so that other workers can pick them up before the lease expires.
+        Their claims don't count towards the quarantine of the papers.
+        """
+        with self.lock:
+            paper_ids = [record.identity.identity for record in self.claimed_records]
+            self.claimed_records.clear()
+        self.db.release_claims(paper_ids,self.worker_id)
+        with self.lock:
+            self.held_ids.difference_update(paper_ids)
+
+    def stats(self):
+        return self.db.queue_stats()
+
+
+class LeaseHeartbeat(Thread):
+    """LeaseHeartbeat
+    Daemon thread calling `work_queue.heartbeat` every `interval` seconds.
+    Defaults to a third of the lease so that a lease survives two missed heartbeats.
+    """
+    def __init__(self,work_queue:LeaseWorkQueue,interval=None):
+        super().__init__(daemon=True)
+        self.work_queue = work_queue
+        if interval is None:
+            interval = work_queue.lease_seconds/3
+        self.interval = interval
+        self.stop_event = Event()
+        self.logger = create_logger(self.__class__.__name__+"__"+work_queue.worker_id)
+
+    def run(self):
+        while not self.stop_event.wait(self.interval):
+            try:
+                num_renewed = self.work_queue.heartbeat()
+                self.logger.debug("Renewed %d Leases"%num_renewed)
+            except Exception as e:
+                self.logger.error("Lease Heartbeat Failed : %s"%str(e))
+
+    def stop(self):
+        self.stop_event.set()
+
+
+class LeaseReaper:
+    """LeaseReaper
+    Returns papers with expired leases to the pool. Papers marked `mining` without
+    any lease are returned once they haven't been updated for `stale_seconds`.
+    """
+    def __init__(self,database:ArxivDatabase,stale_seconds=DEFAULT_STALE_SECONDS):
+        self.db = database
+        self.stale_seconds = stale_seconds
+        self.logger = create_logger(self.__class__.__name__)
+
+    def __call__(self):
+        """__call__
+        :return: [int] number of papers returned to the pool
+        """
+        num_released = self.db.release_expired_leases(stale_seconds=self.stale_seconds)
+        self.logger.info("Returned %d Papers With Expired Leases To The Pool"%num_released)
+        return num_released
+
+    def run_forever(self,interval,stop_event:Event=None):
+        if stop_event is None:
+            stop_event = Event()
+        while True:
+            self()
+            if stop_event.wait(interval):
+                break
@@ -68,7 +68,7 @@ def create_backup(\
     for rec in database.parsed_research_stream():
         research_object = rec.to_json()
         rec_id = rec.identity.identity
-        save_json_to_file(arxiv_object,os.path.join(
+        save_json_to_file(research_object,os.path.join(
             parsed_json_save_path,
             rec_id+'.json'
         ))
@@ -0,0 +1,100 @@
+"""
+Benchmarks loading records from their JSON (like `record_stream` does) with the timestamp parsers.
+    - `dateparser` : every timestamp parsed with `dateparser` when the record is built. How records used to load.
+    - `fromisoformat` : every timestamp parsed with `parse_timestamp` when the record is built.
+    - `lazy` : timestamps parsed only when they are read. Here they never are.
+"""
+import json
+import time
+import datetime
+import click
+import dateparser
+import arxiv_miner.record as record_module
+from arxiv_miner.record import \
+    ArxivRecord,\
+    ArxivIdentity,\
+    ArxivPaperProcessingMeta,\
+    ArxivLatexParsingResult,\
+    ArxivPaperStatus
+from arxiv_miner.semantic_parsing import ArxivDocument,Section
+from arxiv_miner.utils import parse_timestamp
+
+BENCHMARK_HELP = '''
+
+Measure the documents per second at which records load from JSON with each timestamp parser.
+Records are synthetic unless `records_path` points to a file with a JSON record on every line.
+
+'''
+TIMESTAMP_PARSERS = ['dateparser','fromisoformat','lazy']
+
+
+def synthetic_record(index):
+    identity = ArxivIdentity(
+        identity='2006.%05d'%index,
+        url='http://arxiv.org/abs/2006.%05dv1'%index,
+        title='Paper %d'%index,
+        abstract='Abstract '*50,
+        categories=['cs.LG','cs.AI'],
+        published='2020-06-%02dT17:59:52Z'%(index%28+1),
+        authors=['Author %d'%i for i in range(5)],
+        version=1
+    )
+    document = ArxivDocument(name=identity.title,id_val=identity.identity,title=identity.title,url=identity.url,published=identity.published)
+    for section_index in range(6):
+        section = Section(name='Section %d'%section_index)
+        section.text = 'Text '*200
+        document.subsections.append(section)
+    return ArxivRecord(
+        identity=identity,
+        paper_processing_meta=ArxivPaperProcessingMeta(latex_files=3),
+        latex_parsing_result=ArxivLatexParsingResult(),
+        latex_parsed_document=document
+    ).to_json()
+
+
+def read_timestamps(record:ArxivRecord):
+    timestamps = [record.created_on,record.identity.created_on]
+    if record.paper_processing_meta is not None:
+        timestamps.append(record.paper_processing_meta.updated_on)
+    return timestamps
+
+
+def run_parser(record_jsons,status_jsons,timestamp_parser):
+    if timestamp_parser == 'dateparser':
+        record_module.parse_timestamp = lambda timestamp: dateparser.parse(str(timestamp))
+    else:
+        record_module.parse_timestamp = parse_timestamp
+    start = time.time()
+    for record_json in record_jsons:
+        record = ArxivRecord.from_json(record_json)
+        if timestamp_parser != 'lazy':
+            read_timestamps(record)
+    for status_json in status_jsons:
+        status = ArxivPaperStatus.from_json(status_json)
+        if timestamp_parser != 'lazy':
+            _ = status.created_on,status.updated_on,status.leased_until
+    time_taken = time.time()-start
+    record_module.parse_timestamp = parse_timestamp
+    return time_taken
+
+
+@click.command(help=BENCHMARK_HELP)
+@click.option('--num_docs',default=2000,type=int,help='Number Of Synthetic Records')
+@click.option('--records_path',default=None,type=click.Path(exists=True),help='File With A JSON Record On Every Line')
+def benchmark(num_docs=2000,records_path=None):
+    if records_path is not None:
+        with open(records_path,'r') as f:
+            record_jsons = [json.loads(line) for line in f if line.strip() != '']
+    else:
+        record_jsons = [synthetic_record(index) for index in range(num_docs)]
+    status_jsons = [ArxivPaperStatus(leased_until=datetime.datetime.now()).to_json() for _ in record_jsons]
+    click.secho('Loading %d Records And %d Statuses'%(len(record_jsons),len(status_jsons)),fg='green',bold=True)
+    for timestamp_parser in TIMESTAMP_PARSERS:
+        time_taken = run_parser(record_jsons,status_jsons,timestamp_parser)
+        click.secho('\n%s'%timestamp_parser,fg='magenta',bold=True)
+        click.secho('\tTime : %.2f Seconds'%time_taken)
+        click.secho('\tDocs Per Second : %.1f'%((len(record_jsons)+len(status_jsons))/max(time_taken,1e-9)))
+
+
+if __name__ == '__main__':
+    benchmark()
@@ -0,0 +1,109 @@
+"""
+Benchmarks the section extractors used by the latex parsers on a corpus of tex files.
+For every extractor it reports the time taken, the files it failed on and how well its
+headings agree with the ones of `tex2py`.
+"""
+import os
+import glob
+import time
+import json
+import click
+from arxiv_miner.latex_parser import get_tex_tree
+from arxiv_miner.section_extractor import SECTION_EXTRACTORS,SECTION_EXTRACTOR_TEX2PY
+
+BENCHMARK_HELP = '''
+
+Compare the speed and accuracy of the section extractors (%s)
+on a corpus of tex files. `corpus_path` is searched recursively for `.tex` files.
+eg. the `latex` folders of papers extracted by the miner.
+
+'''%', '.join(SECTION_EXTRACTORS)
+
+
+def tree_headings(tex_tree):
+    """tree_headings
+    :return: List[Tuple(str,List[str])] : section names with their subsection names
+    """
+    headings = []
+    for node in tex_tree:
+        try:
+            subsections = [str(subsection.string) for subsection in node.subsections]
+        except:
+            subsections = []
+        headings.append((str(node),subsections))
+    return headings
+
+
+def flat_headings(headings):
+    names = []
+    for section_name,subsection_names in headings:
+        names.append(section_name)
+        names.extend(subsection_names)
+    return names
+
+
+def run_extractor(tex_files,section_extractor):
+    results = {}
+    start = time.time()
+    for tex_file in tex_files:
+        try:
+            results[tex_file] = tree_headings(get_tex_tree(tex_file,section_extractor=section_extractor))
+        except Exception:
+            results[tex_file] = None
+    return results,time.time()-start
+
+
+@click.command(help=BENCHMARK_HELP)
+@click.option('--corpus_path',required=True,type=click.Path(exists=True),help='Directory Holding The Tex Files')
+@click.option('--max_files',default=None,type=int,help='Benchmark Only The First `max_files` Files')
+@click.option('--output_path',default=None,type=click.Path(),help='Save The Headings Found By Each Extractor As JSON')
+def benchmark(corpus_path,max_files=None,output_path=None):
+    tex_files = sorted(glob.glob(os.path.join(corpus_path,'**/*.tex'),recursive=True))
+    if max_files is not None:
+        tex_files = tex_files[:max_files]
+    click.secho('Benchmarking %d Tex Files From %s'%(len(tex_files),corpus_path),fg='green',bold=True)
+
+    extractor_results = {}
+    for section_extractor in SECTION_EXTRACTORS:
+        results,time_taken = run_extractor(tex_files,section_extractor)
+        extractor_results[section_extractor] = results
+        num_failed = len([tex_file for tex_file in results if results[tex_file] is None])
+        click.secho('\n%s'%section_extractor,fg='magenta',bold=True)
+        click.secho('\tTime : %.2f Seconds (%.2f ms Per File)'%(time_taken,1000*time_taken/max(len(tex_files),1)))
+        click.secho('\tFailed Files : %d'%num_failed)
+
+    reference = extractor_results[SECTION_EXTRACTOR_TEX2PY]
+    for section_extractor in SECTION_EXTRACTORS:
+        if section_extractor == SECTION_EXTRACTOR_TEX2PY:
+            continue
+        results = extractor_results[section_extractor]
+        compared,identical,rescued = 0,0,0
+        num_reference,num_found,num_common = 0,0,0
+        for tex_file in tex_files:
+            if reference[tex_file] is None:
+                if results[tex_file] is not None:
+                    rescued+=1
+                continue
+            if results[tex_file] is None:
+                continue
+            compared+=1
+            identical+= 1 if reference[tex_file] == results[tex_file] else 0
+            reference_names = flat_headings(reference[tex_file])
+            found_names = flat_headings(results[tex_file])
+            num_reference+=len(reference_names)
+            num_found+=len(found_names)
+            num_common+=len(set(reference_names).intersection(found_names))
+        click.secho('\n%s vs %s'%(section_extractor,SECTION_EXTRACTOR_TEX2PY),fg='magenta',bold=True)
+        click.secho('\tIdentical Headings : %d Of %d Files Parsed By Both'%(identical,compared))
+        click.secho('\tHeading Recall : %.3f'%(num_common/num_reference if num_reference > 0 else 1.0))
+        click.secho('\tHeading Precision : %.3f'%(num_common/num_found if num_found > 0 else 1.0))
+        click.secho('\tParsed Files That %s Failed On : %d'%(SECTION_EXTRACTOR_TEX2PY,rescued))
+
+    if output_path is not None:
+        with open(output_path,'w') as f:
+            json.dump(extractor_results,f,indent=2)
+        click.secho('\nSaved Headings To %s'%output_path,fg='green')
+
+
+if __name__ == '__main__':
+    benchmark()
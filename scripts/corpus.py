@@ -0,0 +1,68 @@
+"""
+Packs papers mined to a directory per paper into a `CorpusStore` and lists a corpus.
+"""
+import os
+import click
+from arxiv_miner import ArxivPaper
+from arxiv_miner.corpus_store import CorpusStore,COMPRESSION_ZSTD,COMPRESSION_ZLIB
+from arxiv_miner.exception import ArxivFSLoadingError
+from arxiv_miner.logger import create_logger
+
+CORPUS_HELP = '''
+
+Sharded corpus of mined papers. `pack` copies the papers of a `root_papers_path` with a directory
+per paper into a corpus. A corpus is used as the `root_papers_path` of `ArxivPaper.to_fs`/`from_fs`.
+
+'''
+
+
+@click.group(help=CORPUS_HELP)
+def cli():
+    pass
+
+
+@cli.command(help='Copy The Papers Saved With A Directory Per Paper Into A Corpus')
+@click.option('--papers_path',required=True,type=click.Path(exists=True),help='Directory Holding A Directory Per Paper')
+@click.option('--corpus_path',required=True,type=click.Path(),help='Directory Of The Corpus. Created When Missing')
+@click.option('--compression',default=None,type=click.Choice([COMPRESSION_ZSTD,COMPRESSION_ZLIB]),help='Compression Of A New Corpus')
+@click.option('--print_every',default=1000,help="Print Message After Packing X Papers")
+def pack(papers_path,corpus_path,compression=None,print_every=1000):
+    logger = create_logger('Corpus Packing')
+    corpus_store = CorpusStore(corpus_path,compression=compression)
+    num_packed = 0
+    for entry in os.scandir(papers_path):
+        if not entry.is_dir() or entry.name.startswith('.'): # eg. the `.parse_cache` of the miners
+            continue
+        # Old style ids like `hep-th/9901001` are saved one directory deeper.
+        paper_ids = [entry.name]
+        if not os.path.isfile(os.path.join(entry.path,ArxivPaper.identity_file_name)):
+            paper_ids = [entry.name+'/'+sub_entry.name for sub_entry in os.scandir(entry.path) if sub_entry.is_dir()]
+        for paper_id in paper_ids:
+            try:
+                paper = ArxivPaper.from_fs(paper_id,papers_path)
+            except (ArxivFSLoadingError,OSError) as e:
+                logger.error("Skipping %s : %s"%(paper_id,str(e)))
+                continue
+            corpus_store.put(paper_id,paper.to_arxiv_record().to_json())
+            num_packed+=1
+            if num_packed % print_every == 0:
+                logger.info("Packed %d Papers"%num_packed)
+    corpus_store.close()
+    logger.info("Packed %d Papers Into %s"%(num_packed,corpus_path))
+
+
+@cli.command(name='ls',help='List The Papers Of A Corpus')
+@click.option('--corpus_path',required=True,type=click.Path(exists=True),help='Directory Of The Corpus')
+@click.option('--with_titles',is_flag=True,help='Print The Titles Too. Reads Every Record')
+def list_papers(corpus_path,with_titles=False):
+    corpus_store = CorpusStore(corpus_path)
+    if not with_titles:
+        for paper_id in sorted(corpus_store.ids()):
+            click.echo(paper_id)
+        return
+    for paper_id,record_json in corpus_store.scan():
+        click.echo('%s\t%s'%(paper_id,record_json['identity']['title']))
+
+
+if __name__ == '__main__':
+    cli()
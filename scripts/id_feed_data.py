@@ -14,7 +14,6 @@ from arxiv_miner.config import Config
 from arxiv_miner.cli import db_cli
 import random
 import time
-import json
 import pandas
 
 
@@ -61,8 +60,7 @@ def extract_ids(ctx, # click context object: populated from db_cli
     logger.info("Starting Database Stream And Writing to Folder : %s"%root_path )
 
     database_client = ctx.obj['db_class'](**ctx.obj['db_args']) # Create Database 
-    with open(id_dict_path,'r') as f :
-        id_json = json.load(f)
+    id_json = load_json_from_file(id_dict_path)
     
     id_list = id_json['id_list']
     if sample is not None:
@@ -5,6 +5,7 @@ From arxiv and then store it To S3 based Object store.
 ENVIRONMENT VARIABLES FOR AWS_ACCESS_KEY_ID and AWS_SECRET_ACCESS_KEY Expected
 '''
 from arxiv_miner.mining_engine import SourceHarvestingEngine
+from arxiv_miner.source_store import get_source_store
 import boto3
 import metaflow
 import os
@@ -61,7 +62,10 @@ def store_source_to_s3(download_path_tuples:List[Tuple[str,str]]):
 @click.option('--max-chunks',default=1,help='Maximum Chunks To Harvest from S3 Bucket')
 @click.option('--download-rootpath',default=DEFAULT_DOWNLOAD_PATH,help='Root Path to which Source From Latex Will be Downloaded')
 @click.option('--sample',default=None,help='Extract Sampled Data. It will not delete file from remote. Will Do a Dry Run of the code. Sample Value <100 ')
-def harvest(max_chunks=1,download_rootpath=DEFAULT_DOWNLOAD_PATH,type=int,sample=None):
+@click.option('--source-store',default=None,help='Also Write The Sources To This Source Store (A Directory Or s3://bucket/prefix) For The Miners To Read. Papers It Holds Are Skipped')
+def harvest(max_chunks=1,download_rootpath=DEFAULT_DOWNLOAD_PATH,type=int,sample=None,source_store=None):
+    if source_store is not None:
+        source_store = get_source_store(source_store)
     for i in range(max_chunks):
         logger.info(f"Starting Harvest For Chuck Number {i} With Sample of {sample}")
         id_list_obj = get_chunk_from_s3(sample=sample)
@@ -72,7 +76,8 @@ def harvest(max_chunks=1,download_rootpath=DEFAULT_DOWNLOAD_PATH,type=int,sample
         harvest_engine = SourceHarvestingEngine(
             id_list,
             download_rootpath,
-            error_sleep_time=5
+            error_sleep_time=5,
+            source_store=source_store
         )
         download_path_tuples = harvest_engine.harvest() # returns [(arxiv_id,download_path)]
         logger.info(f"Extracted Data : {len(download_path_tuples)}")
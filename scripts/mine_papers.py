@@ -3,7 +3,9 @@ The Purpose Of this Script is To Connect to ArxivDatabase
 Mine Records and Send them back to The DB. 
 """
 from arxiv_miner import \
-    MiningProcess
+    MiningProcess,\
+    PipelinedMiningProcess
+from arxiv_miner.work_queue import LeaseReaper
 
 import click
 import os
@@ -19,6 +21,14 @@ SLEEP_BETWEEEN_PORCS = 5
 DEFAULT_MINING_LIMIT=30
 DEFAULT_EMPTY_WAIT_TIME= 600
 DEFAULT_SLEEP_INTERVAL_COUNT = 50
+DEFAULT_CLAIM_BATCH_SIZE = 5
+DEFAULT_LEASE_SECONDS = 3600
+DEFAULT_STALE_SECONDS = 24*3600
+DEFAULT_REAP_INTERVAL = 600
+DEFAULT_FETCH_WORKERS = 4
+DEFAULT_INDEX_BATCH_SIZE = 20
+DEFAULT_REQUESTS_PER_SECOND = 1
+DEFAULT_PARSE_CACHE_SIZE_MB = 2048
 APP_NAME = 'ArXiv-Miner'
 MINER_HELP = '''
 
@@ -36,6 +46,15 @@ Mine Records and Send them back to The DB.
 @click.option('--mining_limit',default=DEFAULT_MINING_LIMIT,help='Maximum Number of Papers To Mine')
 @click.option('--empty_wait_time',default=DEFAULT_EMPTY_WAIT_TIME,help='Time To Wait if No Unmined Records Were Returned')
 @click.option('--sleep_interval_count',default=DEFAULT_SLEEP_INTERVAL_COUNT,help='The Process Will Sleep for `empty_wait_time` after `sleep_interval_count` records')
+@click.option('--claim_batch_size',default=DEFAULT_CLAIM_BATCH_SIZE,help='Number Of Papers Each Process Claims From The Database At Once')
+@click.option('--lease_seconds',default=DEFAULT_LEASE_SECONDS,help='Seconds After Which Papers Claimed By a Process Can Be Claimed By Others')
+@click.option('--write_behind', is_flag=True, help="Buffer Database Writes And Send Them In Bulk")
+@click.option('--in_memory_latex', is_flag=True, help="Read Only The Tex Files Of The Latex Sources Into Memory Instead Of Extracting Them To Disk")
+@click.option('--parse_cache_path',default=None,type=click.Path(),help='Directory Caching Parsed Latex Sources So Unchanged Sources Are Not Parsed Again. Defaults To .parse_cache Under mining_data_path')
+@click.option('--no_parse_cache', is_flag=True, help="Parse Every Paper Without Caching The Parsed Latex Sources")
+@click.option('--parse_cache_size_mb',default=DEFAULT_PARSE_CACHE_SIZE_MB,help='Megabytes After Which The Least Recently Used Parsed Sources Are Evicted')
+@click.option('--source_store',default=None,help='Read Latex Sources From This Source Store (A Directory Or s3://bucket/prefix) Before Asking ArXiv. Downloaded Sources Are Written To It')
+@click.option('--parsing_pool_workers',default=None,type=int,help='Parse The Tex Files Of A Paper In Parallel On A Pool Of This Many Processes Per Mining Process')
 @click.pass_context
 def start_miner(ctx, # click context object: populated from db_cli
                 num_procs,
@@ -45,7 +64,16 @@ def start_miner(ctx, # click context object: populated from db_cli
                 mining_interval=5,\
                 mining_limit=30,
                 empty_wait_time = 600,
-                sleep_interval_count=DEFAULT_SLEEP_INTERVAL_COUNT
+                sleep_interval_count=DEFAULT_SLEEP_INTERVAL_COUNT,
+                claim_batch_size=DEFAULT_CLAIM_BATCH_SIZE,
+                lease_seconds=DEFAULT_LEASE_SECONDS,
+                write_behind=False,
+                in_memory_latex=False,
+                parse_cache_path=None,
+                no_parse_cache=False,
+                parse_cache_size_mb=DEFAULT_PARSE_CACHE_SIZE_MB,
+                source_store=None,
+                parsing_pool_workers=None
                 ):
     if forever:
         mining_limit = None
@@ -59,7 +87,16 @@ def start_miner(ctx, # click context object: populated from db_cli
                                 mining_interval = mining_interval,\
                                 mining_limit = mining_limit,\
                                 empty_wait_time = empty_wait_time,\
-                                sleep_interval_count=sleep_interval_count)
+                                sleep_interval_count=sleep_interval_count,\
+                                claim_batch_size=claim_batch_size,\
+                                lease_seconds=lease_seconds,\
+                                write_behind=write_behind,\
+                                in_memory_latex=in_memory_latex,\
+                                parse_cache_path=parse_cache_path,\
+                                parse_cache_size=parse_cache_size_mb*1024**2,\
+                                source_store_uri=source_store,\
+                                parsing_pool_workers=parsing_pool_workers,\
+                                use_parse_cache=not no_parse_cache)
         process.start()
         proc_list.append(process)
         time.sleep(3)
@@ -68,6 +105,90 @@ def start_miner(ctx, # click context object: populated from db_cli
         p.join()
 
 
+@db_cli.command(help='Mine papers with a pipeline of concurrent download, parse and index stages.')
+@click.option('--mining_data_path',default=DEFAULT_PATH,type=click.Path())
+@click.option('--forever', is_flag=True, help="Run the Miner Without any max Caps")
+@click.option('--detex_path',default=DEFAULT_DETEX_PATH,help='Path To Detex Binary For Latex Processing')
+@click.option('--mining_limit',default=DEFAULT_MINING_LIMIT,help='Maximum Number of Papers To Mine')
+@click.option('--empty_wait_time',default=DEFAULT_EMPTY_WAIT_TIME,help='Time To Wait if No Unmined Records Were Returned')
+@click.option('--fetch_workers',default=DEFAULT_FETCH_WORKERS,help='Number Of Threads Downloading Latex Sources')
+@click.option('--parse_workers',default=None,type=int,help='Number Of Processes Parsing Latex. Defaults To The Number Of Cores')
+@click.option('--index_batch_size',default=DEFAULT_INDEX_BATCH_SIZE,help='Number Of Papers Written To The Database Together')
+@click.option('--requests_per_second',default=DEFAULT_REQUESTS_PER_SECOND,type=float,help='Requests Per Second To ArXiv Shared By All Download Threads')
+@click.option('--claim_batch_size',default=DEFAULT_CLAIM_BATCH_SIZE,help='Number Of Papers Claimed From The Database At Once')
+@click.option('--lease_seconds',default=DEFAULT_LEASE_SECONDS,help='Seconds After Which Claimed Papers Can Be Claimed By Others')
+@click.option('--in_memory_latex', is_flag=True, help="Read Only The Tex Files Of The Latex Sources Into Memory Instead Of Extracting Them To Disk")
+@click.option('--parse_cache_path',default=None,type=click.Path(),help='Directory Caching Parsed Latex Sources So Unchanged Sources Are Not Parsed Again. Defaults To .parse_cache Under mining_data_path')
+@click.option('--no_parse_cache', is_flag=True, help="Parse Every Paper Without Caching The Parsed Latex Sources")
+@click.option('--parse_cache_size_mb',default=DEFAULT_PARSE_CACHE_SIZE_MB,help='Megabytes After Which The Least Recently Used Parsed Sources Are Evicted')
+@click.option('--source_store',default=None,help='Read Latex Sources From This Source Store (A Directory Or s3://bucket/prefix) Before Asking ArXiv. Downloaded Sources Are Written To It')
+@click.pass_context
+def start_pipelined_miner(ctx, # click context object: populated from db_cli
+                        mining_data_path,\
+                        forever=False,
+                        detex_path=DEFAULT_DETEX_PATH,
+                        mining_limit=DEFAULT_MINING_LIMIT,
+                        empty_wait_time=DEFAULT_EMPTY_WAIT_TIME,
+                        fetch_workers=DEFAULT_FETCH_WORKERS,
+                        parse_workers=None,
+                        index_batch_size=DEFAULT_INDEX_BATCH_SIZE,
+                        requests_per_second=DEFAULT_REQUESTS_PER_SECOND,
+                        claim_batch_size=DEFAULT_CLAIM_BATCH_SIZE,
+                        lease_seconds=DEFAULT_LEASE_SECONDS,
+                        in_memory_latex=False,
+                        parse_cache_path=None,
+                        no_parse_cache=False,
+                        parse_cache_size_mb=DEFAULT_PARSE_CACHE_SIZE_MB,
+                        source_store=None
+                        ):
+    if forever:
+        mining_limit = None
+    database_client = ctx.obj['db_class'](**ctx.obj['db_args']) # Create Database 
+    process = PipelinedMiningProcess(database_client,\
+                                    mining_data_path,\
+                                    detex_path,\
+                                    num_fetch_workers=fetch_workers,\
+                                    num_parse_workers=parse_workers,\
+                                    index_batch_size=index_batch_size,\
+                                    requests_per_second=requests_per_second,\
+                                    claim_batch_size=claim_batch_size,\
+                                    lease_seconds=lease_seconds,\
+                                    mining_limit=mining_limit,\
+                                    empty_wait_time=empty_wait_time,\
+                                    in_memory_latex=in_memory_latex,\
+                                    parse_cache_path=parse_cache_path,\
+                                    parse_cache_size=parse_cache_size_mb*1024**2,\
+                                    source_store_uri=source_store,\
+                                    use_parse_cache=not no_parse_cache)
+    process.start()
+    process.join()
+
+
+@db_cli.command(help='Show the number of queued, in flight, expired and mined papers.')
+@click.pass_context
+def queue_stats(ctx):
+    database_client = ctx.obj['db_class'](**ctx.obj['db_args']) # Create Database 
+    for queue_state,count in database_client.queue_stats().items():
+        click.echo('%s : %d'%(queue_state,count))
+
+
+@db_cli.command(help='Return papers with expired leases back to the pool of unmined papers.')
+@click.option('--stale_seconds',default=DEFAULT_STALE_SECONDS,help='Also Return Papers Marked As Mining Without a Lease That Were Not Updated For These Many Seconds')
+@click.option('--forever', is_flag=True, help="Keep Reaping Every `reap_interval` Seconds")
+@click.option('--reap_interval',default=DEFAULT_REAP_INTERVAL,help='Seconds Between Reaps When Running `--forever`')
+@click.pass_context
+def reap_leases(ctx,
+                stale_seconds=DEFAULT_STALE_SECONDS,
+                forever=False,
+                reap_interval=DEFAULT_REAP_INTERVAL):
+    database_client = ctx.obj['db_class'](**ctx.obj['db_args']) # Create Database 
+    reaper = LeaseReaper(database_client,stale_seconds=stale_seconds)
+    if forever:
+        reaper.run_forever(reap_interval)
+    else:
+        reaper()
+
+
 if __name__ == "__main__":
     db_cli()
     # run_wrapped_cli(db_cli,app_name=APP_NAME)
\ No newline at end of file
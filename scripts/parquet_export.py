@@ -0,0 +1,44 @@
+"""
+Exports the parsed research of the ArxivDatabase into Parquet files partitioned by published month.
+"""
+import click
+from arxiv_miner.cli import db_cli
+from arxiv_miner.logger import create_logger
+from arxiv_miner.parquet_export import \
+    ParquetExporter,\
+    DEFAULT_EXPORT_BATCH_SIZE,\
+    DEFAULT_MAX_BUFFERED_ROWS
+
+EXPORT_HELP = '''
+
+The Purpose Of this Script is To Connect to ArxivDatabase,
+And Stream The Parsed Research Into Parquet Files Partitioned By Published Month.
+Needs pyarrow.
+
+'''
+DEFAULT_OUTPUT_PATH = 'parsed_research_parquet'
+
+
+@db_cli.command(help=EXPORT_HELP)
+@click.option('--output_path',default=DEFAULT_OUTPUT_PATH,help='Directory Of The Partitions')
+@click.option('--batch_size',default=DEFAULT_EXPORT_BATCH_SIZE,type=int,help='Records Per Parquet Row Group')
+@click.option('--max_buffered_rows',default=DEFAULT_MAX_BUFFERED_ROWS,type=int,help='Records Held In Memory Across Partitions')
+@click.option('--compression',default='zstd',type=click.Choice(['zstd','snappy','gzip','none']),help='Parquet Compression Codec')
+@click.option('--print_every',default=10000,help="Print Message After Exporting X Records")
+@click.pass_context
+def export_parquet(ctx, # click context object: populated from db_cli
+                output_path=DEFAULT_OUTPUT_PATH,
+                batch_size=DEFAULT_EXPORT_BATCH_SIZE,
+                max_buffered_rows=DEFAULT_MAX_BUFFERED_ROWS,
+                compression='zstd',
+                print_every=10000
+                ):
+    logger = create_logger('Parquet Export')
+    database_client = ctx.obj['db_class'](**ctx.obj['db_args']) # Create Database
+    exporter = ParquetExporter(output_path,batch_size=batch_size,max_buffered_rows=max_buffered_rows,compression=compression)
+    logger.info("Starting Database Stream And Writing to Folder : %s"%output_path)
+    num_exported = exporter.export(database_client.parsed_research_stream(),print_every=print_every)
+    logger.info("Exported %d Records To %s"%(num_exported,output_path))
+
+if __name__ == "__main__":
+    db_cli()
@@ -14,7 +14,6 @@ from arxiv_miner.config import Config
 from arxiv_miner.cli import db_cli
 import random
 import time
-import json
 import pandas
 
 
@@ -52,8 +51,7 @@ def remine_data(ctx, # click context object: populated from db_cli
     logger.info("Starting Database Stream " )
 
     database_client = ctx.obj['db_class'](**ctx.obj['db_args']) # Create Database 
-    with open(id_dict_path,'r') as f :
-        id_json = json.load(f)
+    id_json = load_json_from_file(id_dict_path)
     
     id_list = id_json['id_list']
     if sample is not None:
@@ -61,7 +59,7 @@ def remine_data(ctx, # click context object: populated from db_cli
     
     for datatup in database_client.id_stream(id_list):
         arxiv_id,rec_obj,_ = datatup
-        database_client.set_mined(rec_obj.identity,False)
+        database_client.set_mined(rec_obj.identity,False,reset_claim_count=True)
         logger.info(f"Set {arxiv_id} to Unmined")
 
 if __name__ == "__main__":
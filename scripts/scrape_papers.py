@@ -1,5 +1,6 @@
 from arxiv_miner import \
     MassDataHarvestingEngine,\
+    ShardedHarvestingEngine,\
     DailyScrapingEngine,\
     ScrapingEngine,\
     DailyHarvestationProcess,\
@@ -13,6 +14,7 @@ from arxiv_miner import ArxivElasticSeachDatabaseClient
 # mp.set_start_method('spawn')
 
 from arxiv_miner.scraping_engine import CLASSES
+from arxiv_miner.seen_index import DiskSeenIdIndex
 
 import os
 import click
@@ -28,6 +30,8 @@ DEFAULT_END_DATE = (datetime.datetime.now() - datetime.timedelta(days=1)).strfti
 DEFAUL_TIMEOUT_PER_DAILY_SCRAPE = 1000 # In Seconds
 DEFAULT_TIMEOUT_PER_DATE_RANGE_SCRAPE = 5
 DEFAULT_THREADMODE = False
+DEFAULT_NUM_WORKERS = 4
+DEFAULT_REQUESTS_PER_SECOND = 0.25
 
 CLASS_STR = '\n'.join(['\t'+c['name']+' : '+c['code']+'\n' for c in CLASSES])
 APP_NAME = 'ArXiv-Scraper'
@@ -46,6 +50,7 @@ The Following CLASSES are Available for Scraping : \n
 def common_run_options(func):
     @click.option('--selected_class',default=DEFAULT_SELECTED_CLASS,help='Topic Of ArXiv Papers to Scrape')
     @click.option('--thread-mode',is_flag=True,help='Run In Thread Mode Instead of Process Mode')
+    @click.option('--seen_index_path',default=None,help='Directory of the On-Disk Index of Already Scraped Ids. Uses In-Memory Cache If Not Given')
     @wraps(func)
     def wrapper(*args, **kwargs):
         return func(*args, **kwargs)
@@ -57,20 +62,70 @@ def common_run_options(func):
 @click.option('--start_date',default=DEFAULT_START_DATE,help='Start Date in Y-m-d Format')
 @click.option('--end_date',default=DEFAULT_END_DATE,help='End Date in Y-m-d Format')
 @click.option('--timeout_per_scrape',default=DEFAULT_TIMEOUT_PER_DATE_RANGE_SCRAPE,help="Time To Wait Before Next Scraping")
+@click.option('--checkpoint_path',default=None,help="JSON File To Persist resumptionTokens. Reruns Resume From The Last Scraped Page")
 @click.pass_context
 def date_range(ctx, # click context
                 selected_class=DEFAULT_SELECTED_CLASS,\
                 thread_mode=DEFAULT_THREADMODE,\
                 start_date=DEFAULT_START_DATE,\
                 end_date=DEFAULT_END_DATE,\
-                timeout_per_scrape=DEFAULT_TIMEOUT_PER_DATE_RANGE_SCRAPE):
+                timeout_per_scrape=DEFAULT_TIMEOUT_PER_DATE_RANGE_SCRAPE,\
+                checkpoint_path=None,\
+                seen_index_path=None):
     database_client = ctx.obj['db_class'](**ctx.obj['db_args'])
     harvester = MassDataHarvestingEngine.from_string_dates(
                                     database_client,\
                                     start_date=start_date,\
                                     selected_class=selected_class,\
                                     end_date=end_date,\
-                                    timeout_per_scrape=timeout_per_scrape\
+                                    timeout_per_scrape=timeout_per_scrape,\
+                                    checkpoint_path=checkpoint_path,\
+                                    seen_index=None if seen_index_path is None else DiskSeenIdIndex(seen_index_path)\
+                                    )
+    hp = None
+    if thread_mode:
+        click.secho("Thread Mode Detected",fg='blue')
+        hp = MassHarvestationThread(harvester)
+    else:
+        click.secho("Running Process Mode",fg='yellow')
+        hp =  MassHarvestationProcess(harvester)
+    harvesting_process = hp
+    harvesting_process.start()
+    harvesting_process.join()
+
+@db_cli.command(help='Start Scraping Engine that will Scrape Between Date Ranges For Many Classes With a Pool of Workers')
+@common_run_options
+@click.option('--start_date',default=DEFAULT_START_DATE,help='Start Date in Y-m-d Format')
+@click.option('--end_date',default=DEFAULT_END_DATE,help='End Date in Y-m-d Format')
+@click.option('--categories',default=None,help='Comma Separated Topics To Scrape. Defaults To `selected_class`')
+@click.option('--window_days',default=1,help='Number of Days Scraped By One Shard')
+@click.option('--num_workers',default=DEFAULT_NUM_WORKERS,help='Number of Shards Scraped Concurrently')
+@click.option('--requests_per_second',default=DEFAULT_REQUESTS_PER_SECOND,help='Requests Per Second To ArXiv Shared By All Workers')
+@click.option('--checkpoint_path',default=None,help="JSON File To Persist resumptionTokens. Reruns Resume From The Last Scraped Page")
+@click.pass_context
+def sharded_range(ctx, # click context
+                selected_class=DEFAULT_SELECTED_CLASS,\
+                thread_mode=DEFAULT_THREADMODE,\
+                seen_index_path=None,\
+                start_date=DEFAULT_START_DATE,\
+                end_date=DEFAULT_END_DATE,\
+                categories=None,\
+                window_days=1,\
+                num_workers=DEFAULT_NUM_WORKERS,\
+                requests_per_second=DEFAULT_REQUESTS_PER_SECOND,\
+                checkpoint_path=None):
+    database_client = ctx.obj['db_class'](**ctx.obj['db_args'])
+    categories = [selected_class] if categories is None else categories.split(',')
+    harvester = ShardedHarvestingEngine.from_string_dates(
+                                    database_client,\
+                                    categories=categories,\
+                                    start_date=start_date,\
+                                    end_date=end_date,\
+                                    window_days=window_days,\
+                                    num_workers=num_workers,\
+                                    requests_per_second=requests_per_second,\
+                                    checkpoint_path=checkpoint_path,\
+                                    seen_index=None if seen_index_path is None else DiskSeenIdIndex(seen_index_path)\
                                     )
     hp = None
     if thread_mode:
@@ -90,9 +145,11 @@ def date_range(ctx, # click context
 def daily_harvest(ctx, # click context
                 selected_class=DEFAULT_SELECTED_CLASS,\
                 thread_mode=DEFAULT_THREADMODE,\
-                timeout_per_scrape=DEFAUL_TIMEOUT_PER_DAILY_SCRAPE):
+                timeout_per_scrape=DEFAUL_TIMEOUT_PER_DAILY_SCRAPE,\
+                seen_index_path=None):
     database_client = ctx.obj['db_class'](**ctx.obj['db_args']) # Create Database 
-    harvester = DailyScrapingEngine(database_client,selected_class=selected_class)
+    seen_index = None if seen_index_path is None else DiskSeenIdIndex(seen_index_path)
+    harvester = DailyScrapingEngine(database_client,selected_class=selected_class,seen_index=seen_index)
     hp = None
     if thread_mode:
         click.secho("Thread Mode Detected",fg='blue')
@@ -104,6 +161,17 @@ def daily_harvest(ctx, # click context
     harvesting_process.start()
     harvesting_process.join()
 
+@db_cli.command(help='Add the Ids Of All Records In The Database To The On-Disk Seen Id Index')
+@click.option('--seen_index_path',required=True,help='Directory of the On-Disk Index of Already Scraped Ids')
+@click.pass_context
+def rebuild_seen_index(ctx, # click context
+                seen_index_path=None):
+    database_client = ctx.obj['db_class'](**ctx.obj['db_args']) # Create Database 
+    seen_index = DiskSeenIdIndex(seen_index_path)
+    num_added = seen_index.update_from_stream(database_client.paper_id_stream())
+    seen_index.close()
+    click.secho("Added %d Ids To Seen Index At %s"%(num_added,seen_index_path),fg='green')
+
 if __name__ =='__main__':
     db_cli.help = SCRAPING_HELP
     db_cli()
\ No newline at end of file
@@ -0,0 +1,119 @@
+"""
+Round trips of the records through their JSON. Nested records are built lazily so every record
+is checked both after it is built and while it is still the JSON it was loaded from.
+"""
+import pickle
+import datetime
+import pytest
+from arxiv_miner import serialization
+from arxiv_miner.config import Config
+from arxiv_miner.record import \
+    ArxivRecord,\
+    ArxivIdentity,\
+    ArxivPaperProcessingMeta,\
+    ArxivLatexParsingResult,\
+    ArxivSematicParsedResearch,\
+    ArxivPaperStatus,\
+    Ontology
+from arxiv_miner.semantic_parsing import ArxivDocument,Section,ResearchPaper
+
+
+def make_identity():
+    return ArxivIdentity(
+        identity='2006.00001',
+        url='http://arxiv.org/abs/2006.00001v1',
+        title='Paper',
+        abstract='Abstract',
+        categories=['cs.LG','cs.AI'],
+        published='2020-06-01T17:59:52Z',
+        authors=['Author 1','Author 2'],
+        version=1
+    )
+
+
+def make_record():
+    identity = make_identity()
+    document = ArxivDocument(name=identity.title,id_val=identity.identity,title=identity.title,url=identity.url,published=identity.published)
+    for section_index in range(3):
+        section = Section(name='Section %d'%section_index)
+        section.text = 'Text %d'%section_index
+        subsection = Section(name='Subsection %d'%section_index)
+        subsection.text = 'Subsection Text'
+        section.subsections.append(subsection)
+        document.subsections.append(section)
+    return ArxivRecord(
+        identity=identity,
+        paper_processing_meta=ArxivPaperProcessingMeta(latex_files=2),
+        latex_parsing_result=ArxivLatexParsingResult(parsing_error=False,latex_parsing_method='MultiDocumentLatexParser'),
+        latex_parsed_document=document
+    )
+
+
+def make_research():
+    research_paper = ResearchPaper()
+    research_paper.introduction.text = 'Introduction Text'
+    research_paper.introduction.matched = True
+    unknown_section = Section(name='Appendix')
+    unknown_section.text = 'Appendix Text'
+    research_paper.unknown_sections.append(unknown_section)
+    return ArxivSematicParsedResearch(
+        identity=make_identity(),
+        research_object=research_paper,
+        ontology=Ontology(union=['machine learning'],mined=True)
+    )
+
+
+def test_built_record_round_trip():
+    record_json = make_record().to_json()
+    assert ArxivRecord.from_json(record_json).to_json() == record_json
+
+
+def test_lazy_record_round_trip():
+    record_json = make_record().to_json()
+    lazy_record = ArxivRecord.from_json(record_json)
+    assert not ArxivRecord.latex_parsed_document.is_loaded(lazy_record._latex_parsed_document)
+    assert lazy_record.to_json() == record_json
+    # Building the nested records doesn't change the JSON.
+    assert len(lazy_record.latex_parsed_document.subsections) == 3
+    assert ArxivRecord.latex_parsed_document.is_loaded(lazy_record._latex_parsed_document)
+    assert lazy_record.to_json() == record_json
+
+
+def test_unbuilt_research_round_trip():
+    research_json = make_research().to_json()
+    lazy_research = ArxivSematicParsedResearch.from_json(research_json)
+    assert lazy_research.to_json() == research_json
+    assert not ArxivSematicParsedResearch.research_object.is_loaded(lazy_research._research_object)
+    assert ArxivSematicParsedResearch.from_json(lazy_research.to_json()).to_json() == research_json
+
+
+def test_leased_status_round_trip():
+    status = ArxivPaperStatus()
+    status.lease('worker-1',3600)
+    status_json = status.to_json()
+    loaded_status = ArxivPaperStatus.from_json(status_json)
+    assert loaded_status.to_json() == status_json
+    assert loaded_status.claim_count == 1
+    assert isinstance(loaded_status.leased_until,datetime.datetime)
+
+
+def test_pickle_lazy_record():
+    lazy_record = ArxivRecord.from_json(make_record().to_json())
+    unpickled_record = pickle.loads(pickle.dumps(lazy_record))
+    assert unpickled_record.to_json() == lazy_record.to_json()
+    assert unpickled_record.latex_parsed_document.subsections[0].name == 'Section 0'
+
+
+@pytest.mark.parametrize('codec_name',serialization.CODECS)
+def test_codecs_decode_records_alike(codec_name,monkeypatch):
+    try:
+        serialization.get_codec(codec_name)
+    except ImportError:
+        pytest.skip('%s Not Installed'%codec_name)
+    monkeypatch.setattr(Config,'json_codec',codec_name)
+    record_json = make_record().to_json()
+    record_json['identity']['affiliation'] = {}
+    record_json['paper_processing_meta'] = {}
+    loaded_json = serialization.decode_record(serialization.dumps(record_json),ArxivRecord).to_json()
+    assert loaded_json['identity']['affiliation'] == {}
+    assert loaded_json['paper_processing_meta'] is None